@@ -1,13 +1,13 @@
 import sys
 from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QStackedWidget
-from src.gui.chess_gui import ChessGUI
 from src.gui.main_menu import MainMenu
-from src.gui.game_selector import GameSelector
 from PyQt5.QtGui import QIcon
+# The other screens are imported when first shown: the game screen pulls in the whole engine
 
 class ChessApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, profile=False):
         super().__init__()
+        self.profile = profile  # Show engine counters and phase times in the game screen
         self.initUI()
 
     def initUI(self):
@@ -24,31 +24,38 @@ class ChessApp(QMainWindow):
         self.main_menu = MainMenu(self.go_to_game_selector)
         self.central_widget.addWidget(self.main_menu)
 
-        # Initialize Side Selection Page with callbacks for choosing a side and returning to the menu
-        self.game_selector = GameSelector(self.start_game, self.show_main_menu)
-        self.central_widget.addWidget(self.game_selector)
+        # Side Selection Page, created on first use
+        self.game_selector = None
 
         # Placeholder for Chess GUI
         self.chess_gui = None
 
     def go_to_game_selector(self):
         """Switch to the side selection screen."""
+        if self.game_selector is None:
+            from src.gui.game_selector import GameSelector
+            # Callbacks for choosing a side and returning to the menu
+            self.game_selector = GameSelector(self.start_game, self.show_main_menu)
+            self.central_widget.addWidget(self.game_selector)
         self.central_widget.setCurrentWidget(self.game_selector)
 
     def start_game(self, side):
         if self.chess_gui is None:
+            from src.gui.chess_gui import ChessGUI
             # Create the Chess GUI and add a callback to return to the main menu
-            self.chess_gui = ChessGUI(self.show_main_menu, player_side=side)
+            self.chess_gui = ChessGUI(self.show_main_menu, player_side=side, profile=self.profile)
             self.central_widget.addWidget(self.chess_gui)
 
-        # Pass the selected side (white or black) to the chess GUI
-        self.chess_gui.chessboard.to_move = side
-
         # Switch to the Chess GUI screen
         self.central_widget.setCurrentWidget(self.chess_gui)
         self.setStyleSheet("background: none;")
 
     def show_main_menu(self):
+        if self.chess_gui is not None:
+            # Stop the engine thread before dropping the game screen
+            self.chess_gui.shutdown()
+            self.central_widget.removeWidget(self.chess_gui)
+            self.chess_gui.deleteLater()
         self.chess_gui = None
         # Switch back to the main menu screen
         self.central_widget.setCurrentWidget(self.main_menu)
@@ -56,7 +63,7 @@ class ChessApp(QMainWindow):
 
 def main():
     app = QApplication(sys.argv)
-    main_window = ChessApp()
+    main_window = ChessApp(profile='--profile' in sys.argv[1:])
     main_window.show()
     sys.exit(app.exec_())
 
@@ -0,0 +1,5 @@
+# Headless UCI entry point for GUIs, tournament managers and servers (no PyQt5 import)
+from src.chess_engine.uci import main
+
+if __name__ == '__main__':
+    raise SystemExit(main())
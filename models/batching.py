@@ -0,0 +1,167 @@
+"""Dynamic batching of single-position model requests.
+
+Many callers (search threads, MCTS workers, asyncio game loops) each ask for one
+position at a time, while a network is far cheaper per position in large batches.
+InferenceBatcher sits between them: requests are queued with a Future, a background
+thread turns whatever is queued within a few milliseconds into one
+ChessAI.predict_batch call, and each Future gets its own row of the result. stats()
+reports the batch sizes and queue latencies reached, to tune max_batch_size and
+max_wait_ms against the request rate.
+"""
+
+import asyncio
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+import numpy as np
+
+from src.chessboard.encoding import pack_board
+from src.chess_engine.movegen import generate_legal_moves
+from models.models import best_policy_move
+
+_SHUTDOWN = object()
+
+
+def _deliver(setter, value):
+    """Resolve a Future; one that is already done must not take the batching thread down."""
+    try:
+        setter(value)
+    except InvalidStateError:
+        pass
+
+
+class InferenceBatcher:
+    """Groups single-position requests from many threads or coroutines into batched forward passes.
+
+    Callers submit a position and get a Future back. A background thread takes the first
+    waiting request, then keeps collecting until max_batch_size requests are queued or
+    max_wait_ms has passed since that first request, runs one ChessAI.predict_batch call and
+    resolves every Future with its own (policy, value) row.
+    """
+
+    def __init__(self, ai, max_batch_size=64, max_wait_ms=2.0, latency_window=10000):
+        self.ai = ai
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=latency_window)  # Seconds from submit to batch start
+        self._batch_sizes = collections.Counter()
+        self.requests = 0
+        self.batches = 0
+        self._closed = False
+        self._submit_lock = threading.Lock()  # Orders submit() against close()
+        self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, board):
+        """Queue a position (snapshotted, so the caller may keep mutating board) and return a Future."""
+        row = pack_board(board)
+        future = Future()
+        with self._submit_lock:  # Never queue behind the shutdown marker
+            if self._closed:
+                raise RuntimeError("InferenceBatcher is closed")
+            self._requests.put((row, future, time.perf_counter()))
+        return future
+
+    def predict(self, board, timeout=None):
+        """Blocking (policy, value) for one position."""
+        return self.submit(board).result(timeout)
+
+    async def predict_async(self, board):
+        """Awaitable (policy, value) for one position, for use from asyncio code."""
+        return await asyncio.wrap_future(self.submit(board))
+
+    def predict_move(self, board):
+        """Best legal move by the model policy, evaluated as part of a batch."""
+        moves = generate_legal_moves(board)
+        if not moves:
+            return None
+        policy, _ = self.predict(board)
+        return best_policy_move(moves, policy)
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or the wait expires.
+
+        Requests whose Future was cancelled while queued are dropped; the others are marked
+        running, so they can no longer be cancelled.
+        """
+        batch = []
+        deadline = None
+        while len(batch) < self.max_batch_size:
+            if not batch:
+                item = self._requests.get()
+            else:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+                except queue.Empty:
+                    break
+            if item is _SHUTDOWN:
+                if not batch:
+                    return None
+                self._requests.put(_SHUTDOWN)  # Finish this batch, stop on the next round
+                break
+            if not item[1].set_running_or_notify_cancel():
+                continue
+            if not batch:
+                deadline = time.perf_counter() + self.max_wait
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            with self._lock:
+                self.requests += len(batch)
+                self.batches += 1
+                self._batch_sizes[len(batch)] += 1
+                self._latencies.extend(started - submitted for _, _, submitted in batch)
+            try:
+                policies, values = self.ai.predict_batch(np.array([row for row, _, _ in batch], dtype=np.uint64))
+            except Exception as error:  # Deliver the failure to every waiting caller
+                for _, future, _ in batch:
+                    _deliver(future.set_exception, error)
+                continue
+            for index, (_, future, _) in enumerate(batch):
+                _deliver(future.set_result, (policies[index], None if values is None else float(values[index])))
+
+    def stats(self):
+        """Batch-size and queue-latency statistics since creation (latencies in milliseconds)."""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            sizes = dict(self._batch_sizes)
+            requests, batches = self.requests, self.batches
+        report = {
+            "requests": requests,
+            "batches": batches,
+            "mean_batch_size": requests / batches if batches else 0.0,
+            "batch_sizes": sizes,
+            "queue_depth": self._requests.qsize(),
+        }
+        if len(latencies):
+            report.update(latency_mean_ms=float(latencies.mean()),
+                          latency_p50_ms=float(np.percentile(latencies, 50)),
+                          latency_p99_ms=float(np.percentile(latencies, 99)))
+        return report
+
+    def close(self):
+        """Stop the batching thread after the requests already queued have been served."""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._requests.put(_SHUTDOWN)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,17 +1,135 @@
 # ai/ai_model.py
+import threading
+import time
+
+from src.chessboard.chessboard import Chessboard
+from src.chess_engine.engine import GameEngine
+from src.chess_engine.movegen import generate_legal_moves
+from src.chess_engine.search import SearchLimits
+
+POLICY_SIZE = 4096  # One policy logit per (from square, to square) pair
+
+
+def policy_index(move):
+    # Promotions share the index of the plain from/to move
+    return move & 4095
+
+
+def best_policy_move(moves, policy):
+    # The legal move with the highest policy logit
+    return max(moves, key=lambda candidate: policy[policy_index(candidate)])
+
 
 class ChessAI:
-    def __init__(self, model_path=None):
-        self.model = self.load_model(model_path) if model_path else self.build_model()
+    def __init__(self, model_path=None, engine=None, tablebase=None, warm_up=False):
+        self.model_path = model_path
+        self._model = None
+        self._loaded = False  # The model is loaded (or built) on first use of self.model, see warm_up()
+        self._load_lock = threading.Lock()
+        self.load_seconds = None  # How long loading the model took, once it has been loaded
+        self.engine = engine  # Search engine used when no trained model is available
+        self.tablebase = tablebase  # Endgame tables played from before anything else (the engine's by default)
+        self.profiler = None  # profiling.Profiler timing encoding and inference (the engine's by default)
+        self.warm_thread = None
+        if warm_up:
+            self.warm_up()
+
+    @property
+    def model(self):
+        # The model, loaded from model_path (or built) on first access; thread-safe
+        if not self._loaded:
+            with self._load_lock:
+                if not self._loaded:
+                    start = time.perf_counter()
+                    self._model = self.load_model(self.model_path) if self.model_path else self.build_model()
+                    self.load_seconds = time.perf_counter() - start
+                    self._loaded = True
+                    profiler = self._profiler()
+                    if profiler is not None:
+                        profiler.times["model_load"] += self.load_seconds
+                        profiler.count("model_load")
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        with self._load_lock:
+            self._model = model
+            self._loaded = True
+
+    def warm_up(self, background=True):
+        # Load the model and run one prediction now instead of on the first real move,
+        # on a daemon thread unless background is False. Returns the thread, if any
+        if not background:
+            self._warm()
+            return None
+        self.warm_thread = threading.Thread(target=self._warm, name="model-warm-up", daemon=True)
+        self.warm_thread.start()
+        return self.warm_thread
+
+    def _warm(self):
+        if self.model is not None:
+            self.predict_batch([Chessboard()])
+
+    def _profiler(self):
+        return self.profiler if self.profiler is not None or self.engine is None else self.engine.profiler
 
     def build_model(self):
         # Initialize a new AI model
         return None
 
     def load_model(self, model_path):
-        # Load an existing AI model from file
-        pass
+        # Load an existing Keras model from file. The framework is imported here rather than at
+        # module level, so processes that never predict do not pay for it
+        try:
+            import keras
+        except ImportError as error:
+            raise ImportError(f"loading the model {model_path} needs Keras (pip install keras tensorflow)") from error
+        return keras.models.load_model(model_path)
+
+    def predict_batch(self, positions):
+        # One forward pass for many positions (Chessboards, FENs or packed rows, see encoding.encode_batch).
+        # Returns (policies, values); values is None for policy-only models
+        if self.model is None:
+            raise ValueError("ChessAI has no model loaded")
+        from src.chessboard.encoding import encode_batch  # Deferred with NumPy until the first prediction
+        import numpy as np
+        profiler = self._profiler()
+        if profiler is None:
+            return self._forward(encode_batch(positions, dtype=np.float32))
+        with profiler.phase("encode"):
+            inputs = encode_batch(positions, dtype=np.float32)
+        with profiler.phase("inference"):
+            outputs = self._forward(inputs)
+        profiler.count("positions", len(inputs))
+        return outputs
+
+    def _forward(self, inputs):
+        # Run the model on encoded inputs; returns (policies, values)
+        import numpy as np
+        outputs = self.model(inputs, training=False)
+        if isinstance(outputs, (list, tuple)):
+            policies, values = outputs[0], outputs[1]
+            return np.asarray(policies), np.asarray(values).reshape(-1)
+        return np.asarray(outputs), None
+
+    def predict_policy(self, board_state):
+        # Policy logits over POLICY_SIZE moves for a single Chessboard
+        policies, _ = self.predict_batch([board_state])
+        return policies[0]
 
-    def predict_move(self, board_state):
-        # Predict the best move given the board state
-        return (start_pos, end_pos)
+    def predict_move(self, board_state, limits=None):
+        # Predict the best move given the board state, as (start_pos, end_pos) indices
+        moves = generate_legal_moves(board_state)
+        if not moves:
+            return None
+        tablebase = self.tablebase if self.tablebase is not None or self.engine is None else self.engine.tablebase
+        found = tablebase.best_move(board_state) if tablebase is not None else None
+        if found is not None:
+            move = found[0]
+        elif self.model is None:
+            if self.engine is None:
+                self.engine = GameEngine()
+            move = self.engine.search(board_state, limits or SearchLimits(depth=3)).best_move
+        else:
+            move = best_policy_move(moves, self.predict_policy(board_state))
+        return (move & 63, (move >> 6) & 63)
@@ -0,0 +1,167 @@
+"""Efficiently updatable neural evaluation (NNUE-style) in plain NumPy.
+
+Network: 768 one-hot inputs (piece * 64 + square) seen from each side, a shared first
+layer into HIDDEN accumulator units per side, a clipped ReLU, and one linear output over
+the side-to-move and opponent halves concatenated:
+
+    out = w2 . [crelu(W1 x_us + b1), crelu(W1 x_them + b1)] + b2
+
+"them" features mirror the board (colours swapped, square ^ 56), so one weight matrix
+serves both sides. The first layer is stored as int16 scaled by QA, the output layer as
+int8 scaled by QB, and the first layer is never recomputed from scratch while searching:
+the evaluator keeps one accumulator pair per ply and derives each child's accumulators
+from the parent's by adding and removing the weight rows of the pieces the move touched.
+Those adds and removes are read from the undo record Chessboard.make() pushes, so
+make()/unmake() themselves stay untouched and unmake costs nothing here.
+"""
+
+import numpy as np
+
+from src.chessboard.chessboard import (
+    BLACK, CASTLING_ROOK_SQUARES, FLAG_CASTLE, FLAG_EN_PASSANT, FLAG_PROMO_KNIGHT, WHITE,
+)
+
+INPUTS = 768
+QA = 255  # First layer scale: crelu clips the accumulator to [0, QA]
+QB = 64  # Output layer scale
+OUTPUT_SCALE = 400  # Centipawns per unit of network output
+
+
+def feature_index(piece, square, perspective):
+    """Input index of piece on square as seen by perspective (WHITE or BLACK)."""
+    if perspective == WHITE:
+        return piece * 64 + square
+    return ((piece + 6) % 12) * 64 + (square ^ 56)
+
+
+def board_features(board, perspective):
+    features = []
+    for piece, bitboard in enumerate(board.bitboards):
+        while bitboard:
+            lsb = bitboard & -bitboard
+            features.append(feature_index(piece, lsb.bit_length() - 1, perspective))
+            bitboard ^= lsb
+    return features
+
+
+def move_deltas(record):
+    """(added, removed) lists of (piece, square) for an undo record of Chessboard.make()."""
+    move, piece, captured = record[0], record[1], record[2]
+    start, end, flag = move & 63, (move >> 6) & 63, move >> 12
+    us = piece // 6
+    added = [(piece if flag < FLAG_PROMO_KNIGHT else 6 * us + flag - 3, end)]
+    removed = [(piece, start)]
+    if captured >= 0:
+        removed.append((captured, end))
+    elif flag == FLAG_EN_PASSANT:
+        removed.append((6 * (us ^ 1), end + 8 if us == WHITE else end - 8))
+    elif flag == FLAG_CASTLE:
+        rook_from, rook_to = CASTLING_ROOK_SQUARES[end]
+        removed.append((6 * us + 3, rook_from))
+        added.append((6 * us + 3, rook_to))
+    return added, removed
+
+
+class NNUEEvaluator:
+    def __init__(self, w1, b1, w2, b2):
+        """Quantized weights: w1 int16 (768, H), b1 int16 (H,), w2 int8 (2H,), b2 int32 scalar."""
+        self.w1 = np.ascontiguousarray(w1, dtype=np.int16)
+        self.b1 = np.asarray(b1, dtype=np.int16)
+        self.w2 = np.asarray(w2, dtype=np.int8).reshape(-1)
+        self.b2 = int(b2)
+        hidden = self.hidden = self.b1.shape[0]
+        # Accumulators are kept as one array [white half | black half]. Row piece * 64 + square of
+        # pair_rows holds that piece's first-layer weights for both halves, so a piece add/remove
+        # is a single vector operation
+        squares = np.arange(64)
+        white_rows = np.array([feature_index(piece, square, WHITE) for piece in range(12) for square in squares])
+        black_rows = np.array([feature_index(piece, square, BLACK) for piece in range(12) for square in squares])
+        self.pair_rows = np.concatenate([self.w1[white_rows], self.w1[black_rows]], axis=1)
+        self.pair_bias = np.concatenate([self.b1, self.b1])
+        # Output weights widened once, ordered for white to move and for black to move (own half first)
+        w2 = self.w2.astype(np.int32)
+        self.output_weights = (w2, np.concatenate([w2[hidden:], w2[:hidden]]))
+        self.stack = []  # [(position key, accumulator pair)] for plies base .. base + len(stack) - 1
+        self.base = 0
+
+    @classmethod
+    def from_float(cls, w1, b1, w2, b2):
+        """Quantize float weights, e.g. those of the trained Keras model."""
+        w1 = np.clip(np.round(np.asarray(w1) * QA), -32767, 32767)
+        b1 = np.clip(np.round(np.asarray(b1) * QA), -32767, 32767)
+        w2 = np.clip(np.round(np.asarray(w2).reshape(-1) * QB), -127, 127)
+        b2 = np.round(float(np.asarray(b2).reshape(-1)[0]) * QA * QB)
+        return cls(w1, b1, w2, b2)
+
+    @classmethod
+    def from_keras_weights(cls, weights):
+        """Build from Keras get_weights() of the shared first Dense layer and the output Dense layer.
+
+        The Keras model takes the two 768-feature perspectives (side to move first) through one
+        Dense(H) layer, clips to [0, 1], concatenates and applies Dense(1):
+        weights == [W1 (768, H), b1 (H,), W2 (2H, 1), b2 (1,)].
+        """
+        w1, b1, w2, b2 = weights
+        return cls.from_float(w1, b1, w2, b2)
+
+    @classmethod
+    def load(cls, path):
+        """Load a network saved with save() (quantized) or export_keras_model() (float)."""
+        with np.load(path) as data:
+            if data["w1"].dtype == np.int16:
+                return cls(data["w1"], data["b1"], data["w2"], data["b2"])
+            return cls.from_float(data["w1"], data["b1"], data["w2"], data["b2"])
+
+    def save(self, path):
+        np.savez(path, w1=self.w1, b1=self.b1, w2=self.w2, b2=np.int32(self.b2))
+
+    def refresh(self, board):
+        """Accumulator pair [white | black] computed from scratch for board."""
+        return self.pair_bias + self.pair_rows[board_features(board, WHITE)].sum(axis=0, dtype=np.int16)
+
+    def _accumulators(self, board):
+        """Accumulators for the current position, updated incrementally along board.history."""
+        history = board.history
+        ply = len(history)
+        stack = self.stack
+        # Deepest cached ply that is still on the board's path from the root
+        top = min(self.base + len(stack) - 1, ply)
+        while top >= self.base:
+            key = history[top][6] if top < ply else board.key
+            if stack[top - self.base][0] == key:
+                break
+            top -= 1
+        if top < self.base:
+            accumulator = self.refresh(board)
+            self.stack = [(board.key, accumulator)]
+            self.base = ply
+            return accumulator
+        del stack[top - self.base + 1:]
+
+        rows = self.pair_rows
+        accumulator = stack[-1][1]
+        for index in range(top, ply):
+            record = history[index]
+            if record[0]:  # Null moves change no pieces
+                added, removed = move_deltas(record)
+                for piece, square in added:
+                    accumulator = accumulator + rows[piece * 64 + square]
+                for piece, square in removed:
+                    accumulator = accumulator - rows[piece * 64 + square]
+            key = history[index + 1][6] if index + 1 < ply else board.key
+            stack.append((key, accumulator))
+        return accumulator
+
+    def evaluate(self, board):
+        """Score in centipawns from the side to move's point of view."""
+        active = np.minimum(np.maximum(self._accumulators(board), 0), QA).astype(np.int32)
+        total = int(np.dot(active, self.output_weights[board.side]))
+        return (total + self.b2) * OUTPUT_SCALE // (QA * QB)
+
+
+def export_keras_model(model, path, first_layer, output_layer):
+    """Save the float weights of two Dense layers of a trained Keras model for NNUEEvaluator.load()."""
+    w1, b1 = model.get_layer(first_layer).get_weights()
+    w2, b2 = model.get_layer(output_layer).get_weights()
+    np.savez(path, w1=w1.astype(np.float32), b1=b1.astype(np.float32),
+             w2=w2.astype(np.float32), b2=b2.astype(np.float32))
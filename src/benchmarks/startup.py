@@ -0,0 +1,138 @@
+"""Startup-time report: import and initialization cost of the entry points.
+
+    python -m src.benchmarks.startup [--repeat 5] [--top 6] [--out startup.json] [--model model.keras]
+
+Every target runs in a fresh interpreter started with ``python -X importtime``, so the
+numbers are what a newly started engine, worker or GUI process pays (cold imports, warm OS
+file cache). Per target the report gives the whole process time, the import time, the time
+of each initialization step, whether NumPy was imported, and the heaviest imported
+packages (import self time summed per top-level package). Each time is the best of
+--repeat runs. --out writes the same as JSON, with the metadata of suite.py. The model
+target only constructs ChessAI unless --model names a model file, which it then loads.
+"""
+
+import argparse
+import collections
+import json
+import os
+import subprocess
+import sys
+import time
+
+from src.benchmarks.suite import metadata
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (name, import statement, [(step name, statement), ...]); steps share one namespace
+TARGETS = [
+    ("chessboard", "from src.chessboard.chessboard import Chessboard", [("construct", "board = Chessboard()")]),
+    ("engine", "from src.chess_engine.engine import GameEngine; from src.chess_engine.search import SearchLimits",
+     [("construct", "engine = GameEngine()"), ("first move", "engine.search(limits=SearchLimits(depth=1))")]),
+    ("uci", "import io; from src.chess_engine.uci import UCIEngine",
+     [("construct", "uci = UCIEngine(output=io.StringIO())")]),
+    ("model", "from models.models import ChessAI", [("construct", "ai = ChessAI()")]),
+    ("gui", "from PyQt5.QtWidgets import QApplication; import chess_app",
+     [("construct", "app = QApplication([]); window = chess_app.ChessApp()")]),
+]
+
+SCRIPT = """
+import json, sys, time
+namespace = {}
+start = time.perf_counter()
+exec(%r, namespace)
+times = {"import": time.perf_counter() - start}
+for name, statement in %r:
+    start = time.perf_counter()
+    exec(statement, namespace)
+    times[name] = time.perf_counter() - start
+print(json.dumps({"times": times, "numpy": "numpy" in sys.modules, "modules": len(sys.modules)}))
+"""
+
+
+def model_target(model_path):
+    """The model target, constructing ChessAI for model_path and timing the model load."""
+    return ("model", "from models.models import ChessAI",
+            [("construct", f"ai = ChessAI({model_path!r})"), ("load", "ai.model")])
+
+
+def parse_importtime(stderr):
+    """{top-level package: import self time in seconds} from -X importtime output."""
+    packages = collections.Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        if self_time.strip().isdigit():
+            packages[name.strip().split(".")[0]] += int(self_time) / 1e6
+    return packages
+
+
+def measure(import_statement, steps):
+    """One fresh-process run: (times, packages, numpy imported, module count)."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    if not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")  # Let the GUI target run headless
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", SCRIPT % (import_statement, steps)],
+                               cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if completed.returncode:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed")
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    report["times"]["process"] = elapsed
+    return report["times"], parse_importtime(completed.stderr), report["numpy"], report["modules"]
+
+
+def startup_report(targets=TARGETS, repeat=5, top=6):
+    """{target: result dict} with the best time of repeat runs for every step."""
+    results = {}
+    for name, import_statement, steps in targets:
+        best, packages = None, None
+        try:
+            for _ in range(repeat):
+                times, run_packages, numpy_imported, modules = measure(import_statement, steps)
+                if best is None or times["import"] < best["import"]:
+                    packages = run_packages
+                best = times if best is None else {step: min(best[step], times[step]) for step in best}
+        except RuntimeError as error:
+            results[name] = {"error": str(error)}
+            continue
+        results[name] = {"seconds": best, "numpy": numpy_imported, "modules": modules,
+                         "packages": dict(packages.most_common(top))}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import and initialization time of the entry points")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes per target; the best is reported")
+    parser.add_argument("--top", type=int, default=6, help="heaviest packages listed per target")
+    parser.add_argument("--only", help="comma-separated targets (default: all)")
+    parser.add_argument("--out", help="write the report as JSON here")
+    parser.add_argument("--model", help="model file loaded (and timed) by the model target")
+    args = parser.parse_args(argv)
+
+    names = [name for name, _, _ in TARGETS]
+    only = set(args.only.split(",")) if args.only else None
+    unknown = (only or set()) - set(names)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))} (choose from {', '.join(names)})")
+    targets = [model_target(args.model) if args.model and target[0] == "model" else target
+               for target in TARGETS if not only or target[0] in only]
+    results = startup_report(targets, args.repeat, args.top)
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<11} error: {result['error']}")
+            continue
+        steps = "  ".join(f"{step} {seconds * 1000:.1f}ms" for step, seconds in result["seconds"].items())
+        packages = ", ".join(f"{package} {seconds * 1000:.1f}" for package, seconds in result["packages"].items())
+        print(f"{name:<11} {steps}  numpy {'yes' if result['numpy'] else 'no'}  {result['modules']} modules")
+        print(f"{'':<11} heaviest imports (ms): {packages}")
+    if args.out:
+        with open(args.out, "w") as handle:
+            json.dump({"meta": metadata({"repeat": args.repeat, "model": args.model}), "results": results}, handle,
+                      indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,251 @@
+"""Benchmarks of the core operations on fixed position sets, with machine-readable output.
+
+    python -m src.benchmarks.suite --out bench.json
+    python -m src.benchmarks.suite --out new.json --compare bench.json
+    python -m src.benchmarks.suite --only search,movegen --depth 4
+
+The positions are the perft reference positions plus --positions positions reached by
+seeded random play from the start (moves picked from the sorted legal move list), so every
+run and every commit times the same work. Each benchmark runs --repeat times; the JSON
+output has, per benchmark, the operation count and the best and median wall time (and
+the time per operation), plus metadata (commit, Python and NumPy versions, machine) to
+tell runs apart. --compare prints the time per operation against an earlier output.
+
+Model inference is timed single (predict_policy per board) and batched (predict_batch in
+--batch-size chunks). Without --model a fixed random linear policy stands in for the
+network, so the numbers measure the encoding and call overhead rather than a real model.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+
+import numpy as np
+
+from src.chessboard.chessboard import Chessboard, START_FEN
+from src.chess_engine.movegen import generate_legal_moves, PROMOTION_SYMBOLS, FLAG_PROMO_KNIGHT
+from src.chess_engine.perft import REFERENCE_POSITIONS
+from src.chess_engine.profiling import Profiler
+from src.chess_engine.search import Searcher, SearchLimits
+from src.chess_engine.transposition import TranspositionTable
+
+BENCHMARKS = ["make_move", "to_fen", "update_from_fen", "to_tensor", "to_bitboards", "movegen", "search",
+              "search_profiled", "model_single", "model_batched"]
+
+
+def benchmark_positions(count=200, seed=1234):
+    """FENs of the reference positions plus count positions from seeded random play."""
+    fens = [fen for _, fen, _ in REFERENCE_POSITIONS]
+    rng = random.Random(seed)
+    board = Chessboard()
+    while len(fens) < len(REFERENCE_POSITIONS) + count:
+        board.update_from_fen(START_FEN)
+        for _ in range(rng.randint(8, 80)):
+            moves = sorted(generate_legal_moves(board))
+            if not moves:
+                break
+            board.make(rng.choice(moves))
+        if generate_legal_moves(board):
+            fens.append(board.to_fen())
+    return fens
+
+
+class LinearPolicy:
+    """Stand-in model: one fixed random dense layer from the 12 piece planes to policy and value."""
+
+    def __init__(self, seed=0):
+        rng = np.random.default_rng(seed)
+        self.weights = rng.standard_normal((12 * 64, 4096 + 1)).astype(np.float32) * 0.01
+
+    def __call__(self, inputs, training=False):
+        outputs = inputs.reshape(len(inputs), -1) @ self.weights
+        return outputs[:, :-1], np.tanh(outputs[:, -1])
+
+
+def _boards(fens):
+    boards = []
+    for fen in fens:
+        board = Chessboard()
+        board.update_from_fen(fen)
+        boards.append(board)
+    return boards
+
+
+def _make_move(boards):
+    operations = 0
+    for board in boards:
+        for move in generate_legal_moves(board):
+            flag = move >> 12
+            promotion = PROMOTION_SYMBOLS[flag] if flag >= FLAG_PROMO_KNIGHT else "q"
+            board.make_move(move & 63, (move >> 6) & 63, promotion)
+            board.unmake()
+            operations += 1
+    return operations
+
+
+def _update_from_fen(fens):
+    board = Chessboard()
+    for fen in fens:
+        board.update_from_fen(fen)
+    return len(fens)
+
+
+def _per_board(method):
+    def run(boards):
+        for board in boards:
+            method(board)
+        return len(boards)
+    return run
+
+
+def _search(boards, depth, profiler=None):
+    """Search every board to depth with a fresh table; returns (operations, extra info)."""
+    nodes = 0
+    for board in boards:
+        searcher = Searcher(TranspositionTable(16))
+        searcher.profiler = profiler
+        nodes += searcher.search(board, SearchLimits(depth=depth)).nodes
+    return len(boards), {"nodes": nodes}
+
+
+def time_benchmark(function, repeat):
+    """Run function repeat times; returns (operations, seconds per run, extra info of the last run)."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outcome = function()
+        times.append(time.perf_counter() - start)
+    operations, extra = outcome if isinstance(outcome, tuple) else (outcome, {})
+    return operations, times, extra
+
+
+def run_suite(fens, only=None, repeat=3, depth=3, search_positions=6, ai=None, batch_size=64):
+    """Run the selected benchmarks; returns {name: result dict}."""
+    boards = _boards(fens)
+    search_boards = boards[:search_positions]
+    if ai is None:
+        from models.models import ChessAI  # Only needed for the model benchmarks
+        ai = ChessAI()
+        ai.model = LinearPolicy()
+
+    def model_single():
+        for board in boards:
+            ai.predict_policy(board)
+        return len(boards)
+
+    def model_batched():
+        for start in range(0, len(boards), batch_size):
+            ai.predict_batch(boards[start:start + batch_size])
+        return len(boards)
+
+    profiler = Profiler()
+
+    def search_profiled():
+        profiler.reset()
+        operations, extra = _search(search_boards, depth, profiler)
+        return operations, dict(extra, profile=profiler.snapshot())
+
+    functions = {
+        "make_move": lambda: _make_move(boards),
+        "to_fen": lambda: _per_board(Chessboard.to_fen)(boards),
+        "update_from_fen": lambda: _update_from_fen(fens),
+        "to_tensor": lambda: _per_board(Chessboard.to_tensor)(boards),
+        "to_bitboards": lambda: _per_board(Chessboard.to_bitboards)(boards),
+        "movegen": lambda: _per_board(generate_legal_moves)(boards),
+        "search": lambda: _search(search_boards, depth),
+        "search_profiled": search_profiled,
+        "model_single": model_single,
+        "model_batched": model_batched,
+    }
+    results = {}
+    for name in BENCHMARKS:
+        if only and name not in only:
+            continue
+        operations, times, extra = time_benchmark(functions[name], repeat)
+        best = min(times)
+        results[name] = dict(extra, operations=operations, best_seconds=best, median_seconds=statistics.median(times),
+                             per_op_us=best / max(operations, 1) * 1e6)
+        if "nodes" in extra:
+            results[name]["nps"] = int(extra["nodes"] / best) if best > 0 else 0
+    return results
+
+
+def metadata(options):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "numpy": np.__version__, "platform": platform.platform(), "processor": platform.processor(),
+            "cpus": os.cpu_count(), "options": options}
+
+
+def compare(results, baseline):
+    """Lines comparing time per operation with a baseline results dict (ratio < 1 is faster)."""
+    lines = [f"{'benchmark':<16} {'base us/op':>12} {'new us/op':>12} {'ratio':>7}"]
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            lines.append(f"{name:<16} {'-':>12} {result['per_op_us']:>12.2f}")
+            continue
+        ratio = result["per_op_us"] / base["per_op_us"] if base["per_op_us"] else float("inf")
+        lines.append(f"{name:<16} {base['per_op_us']:>12.2f} {result['per_op_us']:>12.2f} {ratio:>7.3f}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the board, move generation, search and model")
+    parser.add_argument("--out", help="write the results as JSON here")
+    parser.add_argument("--compare", help="earlier JSON output to compare against")
+    parser.add_argument("--only", help="comma-separated benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the best is reported")
+    parser.add_argument("--positions", type=int, default=200, help="random-play positions besides the reference set")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--depth", type=int, default=3, help="search depth")
+    parser.add_argument("--search-positions", type=int, default=6, help="positions searched (the reference set)")
+    parser.add_argument("--model", help="ChessAI model path (default: a random linear stand-in)")
+    parser.add_argument("--batch-size", type=int, default=64, help="batch size of model_batched")
+    args = parser.parse_args(argv)
+
+    only = set(args.only.split(",")) if args.only else None
+    unknown = (only or set()) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))} (choose from {', '.join(BENCHMARKS)})")
+    ai = None
+    if args.model:
+        from models.models import ChessAI
+        ai = ChessAI(args.model)
+        try:
+            ai.model  # Load now, so the first timed run does not include it
+        except Exception as error:  # Missing framework, unreadable file, ...
+            parser.error(f"could not load a model from {args.model}: {error}")
+        print(f"model loaded in {ai.load_seconds:.2f}s")
+
+    fens = benchmark_positions(args.positions, args.seed)
+    options = {name: getattr(args, name) for name in ("repeat", "positions", "seed", "depth", "search_positions",
+                                                      "model", "batch_size")}
+    results = run_suite(fens, only, args.repeat, args.depth, args.search_positions, ai, args.batch_size)
+    for name, result in results.items():
+        extra = f"  {result['nps']:,} nps" if "nps" in result else ""
+        print(f"{name:<16} {result['operations']:>7} ops {result['best_seconds']:9.4f}s "
+              f"{result['per_op_us']:12.2f} us/op{extra}")
+    if args.out:
+        with open(args.out, "w") as handle:
+            json.dump({"meta": metadata(options), "results": results}, handle, indent=2)
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)["results"]
+        print()
+        for line in compare(results, baseline):
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,149 @@
+"""Precomputed attack tables.
+
+Squares use the Chessboard convention: index 0 is a8 and index 63 is h1, so moving
+"north" (towards rank 8) subtracts 8 from the index.
+
+Leaper attacks (knight, king, pawn) are plain 64-entry tables. Sliding attacks use
+per-line occupancy lookups: every square has four lines through it (rank, file,
+diagonal, anti-diagonal), and for each line a dict maps the relevant blockers on
+that line to the attack set. This is the Python equivalent of magic bitboards: one
+mask and one hash lookup per line, with no ray walking at runtime and tables small
+enough (about 16k entries) to build at import time.
+"""
+
+FULL_BOARD = (1 << 64) - 1
+
+FILE_A = sum(1 << sq for sq in range(64) if sq % 8 == 0)
+FILE_H = FILE_A << 7
+ROWS = [0xFF << (8 * row) for row in range(8)]  # ROWS[0] is rank 8, ROWS[7] is rank 1
+
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+def _leaper_table(offsets):
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        mask = 0
+        for d_row, d_col in offsets:
+            r, c = row + d_row, col + d_col
+            if 0 <= r < 8 and 0 <= c < 8:
+                mask |= 1 << (r * 8 + c)
+        table.append(mask)
+    return table
+
+
+def _ray(sq, d_row, d_col, occupied=0):
+    """Squares reached from sq in one direction, stopping at (and including) the first blocker."""
+    row, col = divmod(sq, 8)
+    mask = 0
+    row, col = row + d_row, col + d_col
+    while 0 <= row < 8 and 0 <= col < 8:
+        bit = 1 << (row * 8 + col)
+        mask |= bit
+        if occupied & bit:
+            break
+        row, col = row + d_row, col + d_col
+    return mask
+
+
+def _relevant_mask(sq, directions):
+    """Squares on the given rays whose occupancy can change the attack set (edges excluded)."""
+    mask = 0
+    for d_row, d_col in directions:
+        row, col = divmod(sq, 8)
+        row, col = row + d_row, col + d_col
+        while 0 <= row + d_row < 8 and 0 <= col + d_col < 8:
+            mask |= 1 << (row * 8 + col)
+            row, col = row + d_row, col + d_col
+    return mask
+
+
+def _ray_table(sq, d_row, d_col):
+    """(mask, {blockers: attacks}) for one ray from sq, over every subset of its relevant squares.
+
+    The attacks only depend on the nearest blocker, so the subsets are enumerated per nearest
+    blocker: that square, plus any subset of the relevant squares beyond it.
+    """
+    squares = []  # Ray squares in order, moving away from sq
+    row, col = divmod(sq, 8)
+    row, col = row + d_row, col + d_col
+    while 0 <= row < 8 and 0 <= col < 8:
+        squares.append(1 << (row * 8 + col))
+        row, col = row + d_row, col + d_col
+    mask = sum(squares[:-1])  # The last square never blocks anything
+    table = {0: sum(squares)}
+    reach = 0
+    beyond = mask
+    for bit in squares[:-1]:
+        reach |= bit
+        beyond ^= bit
+        subset = 0
+        while True:  # Carry-rippler enumeration of every subset of the squares beyond
+            table[bit | subset] = reach
+            subset = (subset - beyond) & beyond
+            if subset == 0:
+                break
+    return mask, table
+
+
+def _line_tables(directions):
+    """Build (masks, tables) for one line orientation given as two opposite directions.
+
+    The two rays are independent, so each line table is the product of two small ray tables.
+    """
+    masks, tables = [], []
+    for sq in range(64):
+        (mask, first), (other_mask, second) = (_ray_table(sq, d_row, d_col) for d_row, d_col in directions)
+        masks.append(mask | other_mask)
+        tables.append({blockers | other: attacks | other_attacks
+                       for blockers, attacks in first.items() for other, other_attacks in second.items()})
+    return masks, tables
+
+
+KNIGHT_ATTACKS = _leaper_table(KNIGHT_OFFSETS)
+KING_ATTACKS = _leaper_table(KING_OFFSETS)
+# PAWN_ATTACKS[color][sq]: squares attacked by a pawn of that colour standing on sq
+PAWN_ATTACKS = [_leaper_table([(-1, -1), (-1, 1)]), _leaper_table([(1, -1), (1, 1)])]
+
+RANK_MASKS, RANK_TABLES = _line_tables([(0, -1), (0, 1)])
+FILE_MASKS, FILE_TABLES = _line_tables([(-1, 0), (1, 0)])
+DIAG_MASKS, DIAG_TABLES = _line_tables([(-1, -1), (1, 1)])
+ANTI_MASKS, ANTI_TABLES = _line_tables([(-1, 1), (1, -1)])
+
+
+def rook_attacks(sq, occupied):
+    return RANK_TABLES[sq][occupied & RANK_MASKS[sq]] | FILE_TABLES[sq][occupied & FILE_MASKS[sq]]
+
+
+def bishop_attacks(sq, occupied):
+    return DIAG_TABLES[sq][occupied & DIAG_MASKS[sq]] | ANTI_TABLES[sq][occupied & ANTI_MASKS[sq]]
+
+
+def queen_attacks(sq, occupied):
+    return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+
+
+def _between_and_line_tables():
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for sq in range(64):
+        for d_row, d_col in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+            full_line = (1 << sq) | _ray(sq, d_row, d_col) | _ray(sq, -d_row, -d_col)
+            path = 0
+            row, col = divmod(sq, 8)
+            row, col = row + d_row, col + d_col
+            while 0 <= row < 8 and 0 <= col < 8:
+                target = row * 8 + col
+                between[sq][target] = path
+                line[sq][target] = full_line
+                path |= 1 << target
+                row, col = row + d_row, col + d_col
+    return between, line
+
+
+# BETWEEN[a][b]: squares strictly between two aligned squares; LINE[a][b]: the whole line through both
+BETWEEN, LINE = _between_and_line_tables()
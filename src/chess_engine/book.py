@@ -0,0 +1,92 @@
+"""Memory-mapped opening book.
+
+The file layout follows Polyglot: a sequence of 16-byte big-endian entries
+
+    key u64 | move u16 | weight u16 | learn u32
+
+sorted by key (then move), one entry per book move. Two details differ, so Polyglot
+books from elsewhere cannot be read and ours cannot be used by Polyglot tools: the key is
+our own Zobrist key (Chessboard.key, see zobrist.py) and the move is our 15-bit move
+encoding (from | to << 6 | flag << 12, see movegen).
+
+The file is mapped read-only and searched in place with a binary search, so a lookup
+touches a couple of dozen bytes and engine processes sharing one book share the OS page
+cache instead of each loading it.
+"""
+
+import mmap
+import os
+import random
+import struct
+
+from src.chess_engine.movegen import generate_legal_moves
+
+ENTRY = struct.Struct(">QHHI")
+ENTRY_SIZE = ENTRY.size  # 16 bytes
+KEY = struct.Struct(">Q")
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.path = path
+        self.handle = open(path, "rb")
+        size = os.fstat(self.handle.fileno()).st_size
+        self.count = size // ENTRY_SIZE
+        # mmap cannot map an empty file
+        self.data = mmap.mmap(self.handle.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self):
+        return self.count
+
+    def _first_index(self, key):
+        """Index of the first entry with an entry key >= key."""
+        data = self.data
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) >> 1
+            if KEY.unpack_from(data, middle * ENTRY_SIZE)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def entries(self, key):
+        """All (move, weight, learn) entries stored for a position key."""
+        data = self.data
+        index = self._first_index(key)
+        found = []
+        while index < self.count:
+            entry_key, move, weight, learn = ENTRY.unpack_from(data, index * ENTRY_SIZE)
+            if entry_key != key:
+                break
+            found.append((move, weight, learn))
+            index += 1
+        return found
+
+    def moves(self, board):
+        """Legal book moves for board as (move, weight), skipping stale or colliding entries."""
+        entries = self.entries(board.key)
+        if not entries:
+            return []
+        legal = set(generate_legal_moves(board))
+        return [(move, weight) for move, weight, _ in entries if move in legal]
+
+    def choose(self, board, rng=random, best=False):
+        """A book move picked with probability proportional to its weight (the heaviest if best), or None."""
+        candidates = [(move, weight) for move, weight in self.moves(board) if weight > 0]
+        if not candidates:
+            return None
+        if best:
+            return max(candidates, key=lambda candidate: candidate[1])[0]
+        return rng.choices([move for move, _ in candidates], [weight for _, weight in candidates])[0]
+
+    def close(self):
+        if self.count:
+            self.data.close()
+        self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
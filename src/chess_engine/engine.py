@@ -1,21 +1,175 @@
 # engine/game_engine.py
+from src.chessboard.chessboard import Chessboard
+from src.chess_engine.movegen import generate_legal_moves, in_check, PROMOTION_SYMBOLS, FLAG_PROMO_KNIGHT
+from src.chess_engine.transposition import TranspositionTable
+from src.chess_engine.evaluation import DEFAULT_EVALUATOR, Evaluator
+from src.chess_engine.search import Searcher, SearchLimits
+from src.chess_engine.book import OpeningBook
+from src.chess_engine.tablebase import Tablebase
+from src.chess_engine.profiling import Profiler
+
 
 class GameEngine:
-    def __init__(self):
+    def __init__(self, hash_mb=16, evaluator=None):
+        self.board = self.initialize_board()
+        self.tt = TranspositionTable(hash_mb)  # Search cache with a fixed memory budget
+        self.evaluator = evaluator  # e.g. models.nnue.NNUEEvaluator; the hand-written evaluation by default
+        self.searcher = Searcher(self.tt, self.evaluator)
+        self.threads = 1  # Search processes; more than one shares the table in shared memory (see smp.py)
+        self.book = None  # OpeningBook consulted before searching, see set_book
+        self.tablebase = None  # Endgame tables probed by the search, see set_tablebase
+        self.profiler = None  # Counters and phase timers of the searches, see set_profiling
+
+    def set_hash_size(self, hash_mb):
+        # Reallocate the transposition table with a new budget in MB (drops its contents)
+        if self.threads > 1:
+            self._start_smp(hash_mb, self.threads)
+        else:
+            self.tt.resize(hash_mb)
+
+    def set_threads(self, threads):
+        # Search with this many processes from now on (Lazy SMP when more than one)
+        if threads == self.threads:
+            return
+        size_mb = self.tt.size_mb
+        if threads > 1:
+            self._start_smp(size_mb, threads)
+        else:
+            self._close_searcher()
+            self.tt = TranspositionTable(size_mb)
+            self.searcher = Searcher(self.tt, self.evaluator)
+            self.searcher.tablebase = self.tablebase
+            self.searcher.profiler = self.profiler
+        self.threads = threads
+
+    def _start_smp(self, size_mb, threads):
+        from src.chess_engine.smp import SMPSearcher  # Deferred: multiprocessing is only needed with threads > 1
+        self._close_searcher()
+        self.searcher = SMPSearcher(size_mb, threads, self.evaluator)
+        self.searcher.searcher.tablebase = self.tablebase  # Helpers search without the tables
+        self.searcher.searcher.profiler = self.profiler  # Only the main search process is profiled
+        self.tt = self.searcher.tt
+
+    def _close_searcher(self):
+        # Shut down helper search processes, if any
+        if self.threads > 1:
+            self.searcher.close()
+
+    def close(self):
+        # Release helper processes, the book and the tables
+        self._close_searcher()
+        if self.tablebase is not None:
+            self.tablebase.close()
+            self.tablebase = None
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+
+    def set_evaluator(self, evaluator):
+        # Evaluate with evaluator from now on (None for the hand-written default)
+        self.evaluator = evaluator
+        if self.threads > 1:
+            self._start_smp(self.tt.size_mb, self.threads)  # Helper processes hold their own copy
+        else:
+            self.searcher.evaluator = evaluator or DEFAULT_EVALUATOR
+
+    def evaluation_parameters(self):
+        # The evaluation weights as one flat list (see evaluation.PARAMETER_LAYOUT)
+        evaluator = self.evaluator or DEFAULT_EVALUATOR
+        if not isinstance(evaluator, Evaluator):
+            raise ValueError("the current evaluator has no tunable parameters")
+        return evaluator.parameters()
+
+    def set_evaluation_parameters(self, vector):
+        # Evaluate with the weights of a flat vector, e.g. the output of src/tuning/tuner.py
+        self.set_evaluator(Evaluator.from_parameters(vector))
+
+    def set_book(self, path):
+        # Play from a memory-mapped opening book (None to disable)
+        if self.book is not None:
+            self.book.close()
+        self.book = OpeningBook(path) if path else None
+
+    def set_tablebase(self, directory):
+        # Probe the endgame tables in directory while searching (None to disable)
+        if self.tablebase is not None:
+            self.tablebase.close()
+        self.tablebase = Tablebase(directory) if directory else None
+        searcher = self.searcher.searcher if self.threads > 1 else self.searcher
+        searcher.tablebase = self.tablebase
+
+    def set_profiling(self, enabled):
+        # Count and time the hot paths of the searches from now on (see profiling.py)
+        self.profiler = (self.profiler or Profiler()) if enabled else None
+        searcher = self.searcher.searcher if self.threads > 1 else self.searcher
+        searcher.profiler = self.profiler
+
+    def profile(self):
+        # Counters and phase times collected since profiling was enabled, or None when it is off
+        return self.profiler.snapshot() if self.profiler is not None else None
+
+    def book_move(self, position=None):
+        # A weighted random book move for the position (the game position by default), or None
+        if self.book is None:
+            return None
+        return self.book.choose(self.board if position is None else position)
+
+    def new_game(self):
+        # Reset the position and forget everything cached from the previous game
         self.board = self.initialize_board()
+        self.tt.clear()
 
     def initialize_board(self):
         # Set up the initial board state
-        return {}
+        return Chessboard()
+
+    def legal_moves(self):
+        # All legal moves for the side to move, encoded as ints (see movegen)
+        return generate_legal_moves(self.board)
 
-    def move_piece(self, start_pos, end_pos):
+    def move_piece(self, start_pos, end_pos, promotion="q"):
         # Validate and execute the move, update the board state
+        for move in generate_legal_moves(self.board):
+            if move & 63 != start_pos or (move >> 6) & 63 != end_pos:
+                continue
+            flag = move >> 12
+            if flag >= FLAG_PROMO_KNIGHT and PROMOTION_SYMBOLS[flag] != promotion:
+                continue
+            self.board.make(move)
+            return True
+        return False
+
+    def undo_move(self):
+        # Take back the last move, returning False if there is nothing to undo
+        if not self.board.history:
+            return False
+        self.board.unmake()
         return True
 
+    def search(self, position=None, limits=None, info_callback=None):
+        # Find the best move for a Chessboard or FEN (the current game position by default)
+        if position is None:
+            position = self.board
+        elif isinstance(position, str):
+            fen = position
+            position = Chessboard()
+            position.update_from_fen(fen)
+        return self.searcher.search(position, limits or SearchLimits(), info_callback)
+
+    def stop(self):
+        # Make a running search return its best move so far
+        self.searcher.stop()
+
     def get_board_state(self):
         # Return the current state of the board
         return self.board
 
+    def is_check(self):
+        return in_check(self.board)
+
     def is_checkmate(self):
         # Check for checkmate condition
-        return False
+        return in_check(self.board) and not generate_legal_moves(self.board)
+
+    def is_stalemate(self):
+        return not in_check(self.board) and not generate_legal_moves(self.board)
@@ -0,0 +1,218 @@
+"""Static evaluation: material, piece-square tables, mobility and bishop pair.
+
+Scores are in centipawns from the point of view of the side to move. Tables are written
+from white's side with rank 8 first, which matches Chessboard square indices directly;
+black pieces read them mirrored (``sq ^ 56``).
+
+Every weight can be read and set as one flat vector (Evaluator.parameters() and
+Evaluator.from_parameters(), laid out as PARAMETER_LAYOUT) for the tuner in src/tuning.
+"""
+
+from src.chess_engine.attacks import KNIGHT_ATTACKS, rook_attacks, bishop_attacks
+
+MATERIAL = [100, 320, 330, 500, 900, 0]  # P, N, B, R, Q, K
+
+PAWN_TABLE = [
+    0, 0, 0, 0, 0, 0, 0, 0,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    10, 10, 20, 30, 30, 20, 10, 10,
+    5, 5, 10, 25, 25, 10, 5, 5,
+    0, 0, 0, 20, 20, 0, 0, 0,
+    5, -5, -10, 0, 0, -10, -5, 5,
+    5, 10, 10, -20, -20, 10, 10, 5,
+    0, 0, 0, 0, 0, 0, 0, 0,
+]
+KNIGHT_TABLE = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20, 0, 0, 0, 0, -20, -40,
+    -30, 0, 10, 15, 15, 10, 0, -30,
+    -30, 5, 15, 20, 20, 15, 5, -30,
+    -30, 0, 15, 20, 20, 15, 0, -30,
+    -30, 5, 10, 15, 15, 10, 5, -30,
+    -40, -20, 0, 5, 5, 0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+]
+BISHOP_TABLE = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 10, 10, 5, 0, -10,
+    -10, 5, 5, 10, 10, 5, 5, -10,
+    -10, 0, 10, 10, 10, 10, 0, -10,
+    -10, 10, 10, 10, 10, 10, 10, -10,
+    -10, 5, 0, 0, 0, 0, 5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+]
+ROOK_TABLE = [
+    0, 0, 0, 0, 0, 0, 0, 0,
+    5, 10, 10, 10, 10, 10, 10, 5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    0, 0, 0, 5, 5, 0, 0, 0,
+]
+QUEEN_TABLE = [
+    -20, -10, -10, -5, -5, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 5, 5, 5, 0, -10,
+    -5, 0, 5, 5, 5, 5, 0, -5,
+    0, 0, 5, 5, 5, 5, 0, -5,
+    -10, 5, 5, 5, 5, 5, 0, -10,
+    -10, 0, 5, 0, 0, 0, 0, -10,
+    -20, -10, -10, -5, -5, -10, -10, -20,
+]
+KING_MIDDLEGAME_TABLE = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+    20, 20, 0, 0, 0, 0, 20, 20,
+    20, 30, 10, 0, 0, 10, 30, 20,
+]
+KING_ENDGAME_TABLE = [
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10, 0, 0, -10, -20, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -30, 0, 0, 0, 0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+]
+PIECE_SQUARE_TABLES = [PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_MIDDLEGAME_TABLE]
+
+MOBILITY = [0, 4, 3, 2, 1, 0]  # Per reachable square, by piece type
+BISHOP_PAIR = 30
+
+# Game phase: 24 with all minor and major pieces on the board, 0 in a pawn ending
+PHASE_WEIGHTS = [0, 1, 1, 2, 4, 0]
+MAX_PHASE = 24
+
+# Flat parameter vector: (name, length) blocks in order. The king has no material value and
+# pawns and kings no mobility weight, so those are left out
+PARAMETER_LAYOUT = [
+    ("material", 5), ("pawn_table", 64), ("knight_table", 64), ("bishop_table", 64), ("rook_table", 64),
+    ("queen_table", 64), ("king_table", 64), ("king_endgame_table", 64), ("mobility", 4), ("bishop_pair", 1),
+]
+PARAMETER_COUNT = sum(length for _, length in PARAMETER_LAYOUT)
+
+
+def parameter_offsets():
+    """Start index of each PARAMETER_LAYOUT block, by name."""
+    offsets, start = {}, 0
+    for name, length in PARAMETER_LAYOUT:
+        offsets[name] = start
+        start += length
+    return offsets
+
+
+class Evaluator:
+    def __init__(self, material=None, piece_square_tables=None, king_endgame_table=None,
+                 mobility=None, bishop_pair=None):
+        self.material = list(material or MATERIAL)
+        self.piece_square_tables = [list(table) for table in (piece_square_tables or PIECE_SQUARE_TABLES)]
+        self.king_endgame_table = list(king_endgame_table or KING_ENDGAME_TABLE)
+        self.mobility = list(mobility or MOBILITY)
+        self.bishop_pair = BISHOP_PAIR if bishop_pair is None else bishop_pair
+        self._build_tables()
+
+    def parameters(self):
+        """All weights as one flat list in PARAMETER_LAYOUT order."""
+        tables = [value for table in self.piece_square_tables for value in table]
+        return self.material[:5] + tables + self.king_endgame_table + self.mobility[1:5] + [self.bishop_pair]
+
+    @classmethod
+    def from_parameters(cls, vector):
+        """Evaluator with the weights of a flat vector (see parameters()), rounded to integers."""
+        values = [int(round(float(value))) for value in vector]
+        if len(values) != PARAMETER_COUNT:
+            raise ValueError(f"expected {PARAMETER_COUNT} parameters, got {len(values)}")
+        offsets = parameter_offsets()
+        tables = [values[offsets[name]:offsets[name] + 64] for name in (
+            "pawn_table", "knight_table", "bishop_table", "rook_table", "queen_table", "king_table")]
+        mobility = offsets["mobility"]
+        return cls(
+            material=values[:5] + [0],
+            piece_square_tables=tables,
+            king_endgame_table=values[offsets["king_endgame_table"]:offsets["king_endgame_table"] + 64],
+            mobility=[0] + values[mobility:mobility + 4] + [0],
+            bishop_pair=values[offsets["bishop_pair"]],
+        )
+
+    def _build_tables(self):
+        """Fold material into the piece-square tables, one signed table per piece (white positive)."""
+        self.tables = []
+        for piece in range(12):
+            piece_type, color = piece % 6, piece // 6
+            table = self.piece_square_tables[piece_type]
+            value = self.material[piece_type]
+            if color == 0:
+                self.tables.append([value + table[sq] for sq in range(64)])
+            else:
+                self.tables.append([-(value + table[sq ^ 56]) for sq in range(64)])
+        self.king_endgame = [
+            [self.king_endgame_table[sq] for sq in range(64)],
+            [-self.king_endgame_table[sq ^ 56] for sq in range(64)],
+        ]
+
+    def evaluate(self, board):
+        """Score the position in centipawns for the side to move."""
+        bbs = board.bitboards
+        occupied = board.occupied
+        tables = self.tables
+        mobility = self.mobility
+        score = 0
+        phase = 0
+
+        for piece in range(12):
+            bitboard = bbs[piece]
+            if not bitboard:
+                continue
+            piece_type = piece % 6
+            if piece_type == 5:
+                continue  # Kings are blended by phase below
+            table = tables[piece]
+            phase += PHASE_WEIGHTS[piece_type] * bitboard.bit_count()
+            own = board.occupancy[piece // 6]
+            sign = 1 if piece < 6 else -1
+            weight = mobility[piece_type]
+            while bitboard:
+                lsb = bitboard & -bitboard
+                bitboard ^= lsb
+                sq = lsb.bit_length() - 1
+                score += table[sq]
+                if weight:
+                    if piece_type == 1:
+                        attacks = KNIGHT_ATTACKS[sq]
+                    elif piece_type == 2:
+                        attacks = bishop_attacks(sq, occupied)
+                    elif piece_type == 3:
+                        attacks = rook_attacks(sq, occupied)
+                    else:
+                        attacks = rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+                    score += sign * weight * (attacks & ~own).bit_count()
+
+        if bbs[2] & (bbs[2] - 1):
+            score += self.bishop_pair
+        if bbs[8] & (bbs[8] - 1):
+            score -= self.bishop_pair
+
+        # Tapered king placement: shelter in the middlegame, centralisation in the endgame
+        phase = min(phase, MAX_PHASE)
+        white_king = bbs[5].bit_length() - 1
+        black_king = bbs[11].bit_length() - 1
+        middlegame = tables[5][white_king] + tables[11][black_king]
+        endgame = self.king_endgame[0][white_king] + self.king_endgame[1][black_king]
+        score += (middlegame * phase + endgame * (MAX_PHASE - phase)) // MAX_PHASE
+
+        return score if board.side == 0 else -score
+
+
+DEFAULT_EVALUATOR = Evaluator()
+
+
+def evaluate(board):
+    return DEFAULT_EVALUATOR.evaluate(board)
@@ -0,0 +1,361 @@
+"""PUCT Monte Carlo Tree Search guided by a policy/value network.
+
+Nodes live in parallel numpy arrays indexed by node id rather than in one Python object
+per node, and the children of a node occupy one contiguous id range, so selection scores
+all children of a node with a single vectorised PUCT expression.
+
+Simulations are run in waves: a wave descends the tree up to ``batch_size`` times,
+applying a virtual loss along each path so that later descents in the same wave spread
+out over different leaves. The collected leaves are evaluated with one batched call to
+the evaluator, then expanded and backed up while the virtual losses are removed. With
+``threads > 1`` several waves are in flight at once: selection and backup hold a lock on
+the tree, but model evaluation runs outside it, so the network is kept busy while other
+threads walk the tree.
+
+Values are stored from the point of view of the player who made the move leading to a
+node, so a parent always picks the child with the highest Q + U.
+"""
+
+import math
+import threading
+import time
+
+import numpy as np
+
+from src.chessboard.encoding import pack_board
+from src.chess_engine.evaluation import evaluate
+from src.chess_engine.movegen import generate_legal_moves, in_check
+
+POLICY_SIZE = 4096
+
+
+class StaticEvaluator:
+    """Fallback evaluator without a network: uniform policy and a squashed static evaluation."""
+
+    def __init__(self, scale=400.0):
+        self.scale = scale
+
+    def __call__(self, boards):
+        policies = np.zeros((len(boards), POLICY_SIZE), dtype=np.float32)
+        values = np.array([math.tanh(evaluate(board) / self.scale) for board in boards], dtype=np.float32)
+        return policies, values
+
+
+def model_evaluator(ai):
+    """Evaluator calling ChessAI.predict_batch once per wave."""
+    def evaluate_batch(boards):
+        policies, values = ai.predict_batch(np.array([pack_board(board) for board in boards], dtype=np.uint64))
+        return policies, values if values is not None else np.zeros(len(boards), dtype=np.float32)
+    return evaluate_batch
+
+
+def batcher_evaluator(batcher):
+    """Evaluator going through a shared InferenceBatcher, so several searches share forward passes."""
+    def evaluate_batch(boards):
+        futures = [batcher.submit(board) for board in boards]
+        results = [future.result() for future in futures]
+        policies = np.stack([policy for policy, _ in results])
+        values = np.array([value or 0.0 for _, value in results], dtype=np.float32)
+        return policies, values
+    return evaluate_batch
+
+
+class MCTS:
+    def __init__(self, ai=None, evaluator=None, c_puct=1.5, batch_size=16, threads=1,
+                 virtual_loss=1.0, capacity=1 << 16, dirichlet_alpha=0.3, noise_fraction=0.0, seed=None):
+        if evaluator is None:
+            evaluator = model_evaluator(ai) if ai is not None and ai.model is not None else StaticEvaluator()
+        self.evaluator = evaluator
+        self.c_puct = c_puct
+        self.batch_size = batch_size
+        self.threads = threads
+        self.virtual_loss = virtual_loss
+        self.dirichlet_alpha = dirichlet_alpha
+        self.noise_fraction = noise_fraction  # Root exploration noise for self-play, 0 to disable
+        self.rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pending = set()  # Leaves selected but not yet backed up, across all threads
+        self._allocate(capacity)
+        self.root_board = None
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.parent = np.full(capacity, -1, dtype=np.int32)
+        self.first_child = np.full(capacity, -1, dtype=np.int32)  # -1 while unexpanded
+        self.child_count = np.zeros(capacity, dtype=np.int32)
+        self.move = np.zeros(capacity, dtype=np.int32)
+        self.visits = np.zeros(capacity, dtype=np.float64)  # Includes pending virtual visits
+        self.value_sum = np.zeros(capacity, dtype=np.float64)
+        self.prior = np.zeros(capacity, dtype=np.float32)
+        self.terminal = np.zeros(capacity, dtype=np.int8)  # 1 for mate/stalemate/draw leaves
+        self.size = 0
+
+    def _grow(self, needed):
+        if self.size + needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while self.size + needed > capacity:
+            capacity *= 2
+        for name in ("parent", "first_child", "child_count", "move", "visits", "value_sum", "prior", "terminal"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            if name in ("parent", "first_child"):
+                new[:] = -1
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def _new_root(self):
+        self.size = 1
+        self.parent[0] = -1
+        self.first_child[0] = -1
+        self.child_count[0] = 0
+        self.visits[0] = 0
+        self.value_sum[0] = 0
+        self.terminal[0] = 0
+        self.root = 0
+        self._pending.clear()
+
+    # Tree reuse -----------------------------------------------------------------------
+
+    def set_position(self, board):
+        """Search from board, keeping the subtree if board is the current root after 1 or 2 moves."""
+        if self.root_board is not None:
+            history = board.history
+            for plies in (0, 1, 2):
+                if plies > len(history):
+                    break
+                before = board.key if plies == 0 else history[-plies][6]
+                if before == self.root_board.key and len(history) - plies == len(self.root_board.history):
+                    for record in history[len(history) - plies:]:
+                        self.advance(record[0])
+                    return
+        self.root_board = board.copy()
+        self._new_root()
+
+    def advance(self, move):
+        """Re-root the tree at the child reached by move (a new empty root if it was never expanded)."""
+        child = self._find_child(self.root, move)
+        self.root_board.make(move)
+        if child < 0:
+            self._new_root()
+            return
+        self.root = child
+        self.parent[child] = -1
+        if self.size > self.capacity // 2:
+            self._compact()
+
+    def _find_child(self, node, move):
+        first, count = self.first_child[node], self.child_count[node]
+        if first < 0:
+            return -1
+        matches = np.nonzero(self.move[first:first + count] == move)[0]
+        return int(first + matches[0]) if len(matches) else -1
+
+    def _compact(self):
+        """Copy the subtree under the root into fresh arrays, dropping nodes of discarded branches."""
+        order = [self.root]
+        index = 0
+        while index < len(order):
+            node = order[index]
+            first = self.first_child[node]
+            if first >= 0:
+                order.extend(range(first, first + self.child_count[node]))
+            index += 1
+        old_ids = np.array(order, dtype=np.int64)
+        mapping = np.full(self.size, -1, dtype=np.int64)
+        mapping[old_ids] = np.arange(len(old_ids))
+        arrays = {name: getattr(self, name)[old_ids].copy()
+                  for name in ("parent", "first_child", "child_count", "move", "visits", "value_sum", "prior", "terminal")}
+        self._allocate(max(self.capacity, 2 * len(old_ids)))
+        for name, values in arrays.items():
+            getattr(self, name)[:len(old_ids)] = values
+        live = slice(0, len(old_ids))
+        self.parent[live] = np.where(arrays["parent"] >= 0, mapping[np.maximum(arrays["parent"], 0)], -1)
+        self.first_child[live] = np.where(arrays["first_child"] >= 0, mapping[np.maximum(arrays["first_child"], 0)], -1)
+        self.size = len(old_ids)
+        self.root = 0
+
+    # Search ---------------------------------------------------------------------------
+
+    def stop(self):
+        self._stop.set()
+
+    def search(self, board=None, simulations=800, movetime=None):
+        """Run simulations (or until movetime ms pass) and return the most visited root move."""
+        if board is not None:
+            self.set_position(board)
+        if self.root_board is None:
+            raise ValueError("MCTS has no position; pass a board or call set_position() first")
+        if not generate_legal_moves(self.root_board):
+            return 0
+        self._stop.clear()
+        deadline = time.perf_counter() + movetime / 1000 if movetime else None
+        target = self.visits[self.root] + simulations if simulations else None
+
+        def keep_going():
+            if self._stop.is_set():
+                return False
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            return target is None or self.visits[self.root] < target
+
+        if self.threads > 1:
+            workers = [threading.Thread(target=self._worker, args=(keep_going,), daemon=True)
+                       for _ in range(self.threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        else:
+            self._worker(keep_going)
+        return self.best_move()
+
+    def _worker(self, keep_going):
+        while keep_going():
+            self._run_wave()
+
+    def _run_wave(self):
+        board = self.root_board.copy()
+        leaves = []  # (node, path, board snapshot, legal moves)
+        with self._lock:
+            for _ in range(self.batch_size):
+                leaf = self._select(board)
+                if leaf is None:
+                    break  # Collided with a leaf already being evaluated
+                leaves.append(leaf)
+        if not leaves:
+            time.sleep(0.0005)  # Let the thread owning the pending leaves finish
+            return
+
+        pending = [leaf for leaf in leaves if leaf[3] is not None]
+        if pending:
+            policies, values = self.evaluator([leaf[2] for leaf in pending])
+        else:
+            policies, values = None, None
+
+        with self._lock:
+            evaluated = 0
+            for node, path, _, moves, terminal_value in leaves:
+                if moves is None:
+                    value = terminal_value
+                else:
+                    value = float(values[evaluated])
+                    if self.first_child[node] < 0:
+                        self._expand(node, moves, policies[evaluated])
+                    evaluated += 1
+                self._backup(path, value)
+                self._pending.discard(node)
+
+    def _select(self, board):
+        """Descend from the root with virtual loss; returns (leaf, path, board, moves, terminal value).
+
+        Returns None without touching the tree when the descent ends on a leaf that is
+        already pending evaluation.
+        """
+        node = self.root
+        path = [node]
+        depth = 0
+        vloss = self.virtual_loss
+        while self.first_child[node] >= 0:
+            first, count = self.first_child[node], self.child_count[node]
+            children = slice(first, first + count)
+            visits = self.visits[children]
+            q = np.where(visits > 0, self.value_sum[children] / np.maximum(visits, 1), 0.0)
+            u = self.c_puct * self.prior[children] * math.sqrt(self.visits[node] + 1) / (1 + visits)
+            node = first + int(np.argmax(q + u))
+            board.make(int(self.move[node]))
+            path.append(node)
+            depth += 1
+        if node in self._pending:
+            for _ in range(depth):
+                board.unmake()
+            return None
+        for visited in path:
+            self.visits[visited] += vloss
+            self.value_sum[visited] -= vloss
+
+        leaf_board = board.copy()
+        for _ in range(depth):
+            board.unmake()
+
+        if self.terminal[node]:
+            return node, path, None, None, self._terminal_value(leaf_board)
+        if leaf_board.halfmove_clock >= 100 or leaf_board.is_repetition(3):
+            self.terminal[node] = 1
+            return node, path, None, None, 0.0
+        moves = generate_legal_moves(leaf_board)
+        if not moves:
+            self.terminal[node] = 1
+            return node, path, None, None, self._terminal_value(leaf_board)
+        self._pending.add(node)
+        return node, path, leaf_board, moves, 0.0
+
+    @staticmethod
+    def _terminal_value(board):
+        """Value for the side to move at a finished game: -1 when mated, 0 for every draw."""
+        if board.halfmove_clock >= 100 or board.is_repetition(3):
+            return 0.0
+        return -1.0 if in_check(board) else 0.0
+
+    def _expand(self, node, moves, policy):
+        count = len(moves)
+        self._grow(count)
+        first = self.size
+        children = slice(first, first + count)
+        move_array = np.array(moves, dtype=np.int32)
+        logits = np.asarray(policy, dtype=np.float64)[move_array & 4095]
+        priors = np.exp(logits - logits.max())
+        priors /= priors.sum()
+        if node == self.root and self.noise_fraction > 0:
+            noise = self.rng.dirichlet([self.dirichlet_alpha] * count)
+            priors = (1 - self.noise_fraction) * priors + self.noise_fraction * noise
+        self.parent[children] = node
+        self.first_child[children] = -1
+        self.child_count[children] = 0
+        self.move[children] = move_array
+        self.visits[children] = 0
+        self.value_sum[children] = 0
+        self.prior[children] = priors
+        self.terminal[children] = 0
+        self.first_child[node] = first
+        self.child_count[node] = count
+        self.size += count
+
+    def _backup(self, path, value):
+        """Remove the virtual loss along path and add one real visit with the leaf value.
+
+        value is from the point of view of the side to move at the leaf, so the leaf node
+        (valued for the player who moved into it) receives -value, its parent +value, and so on.
+        """
+        vloss = self.virtual_loss
+        sign = -1.0
+        for node in reversed(path):
+            self.visits[node] += 1 - vloss
+            self.value_sum[node] += vloss + sign * value
+            sign = -sign
+
+    # Results --------------------------------------------------------------------------
+
+    def root_visits(self):
+        """Visit count per root move, e.g. as a training target."""
+        first, count = self.first_child[self.root], self.child_count[self.root]
+        if first < 0:
+            return {}
+        return {int(self.move[child]): int(self.visits[child]) for child in range(first, first + count)}
+
+    def best_move(self):
+        first, count = self.first_child[self.root], self.child_count[self.root]
+        if first < 0:
+            moves = generate_legal_moves(self.root_board)
+            return moves[0] if moves else 0
+        return int(self.move[first + int(np.argmax(self.visits[first:first + count]))])
+
+    def stats(self):
+        return {
+            "nodes": self.size,
+            "capacity": self.capacity,
+            "root_visits": int(self.visits[self.root]),
+            "root_value": float(-self.value_sum[self.root] / self.visits[self.root]) if self.visits[self.root] else 0.0,
+        }
@@ -0,0 +1,344 @@
+"""Legal move generation on top of Chessboard's bitboards.
+
+Moves are plain ints: ``from | to << 6 | flag << 12``. The flag marks double pawn
+pushes, castling, en passant and promotions (the promoted piece type is
+``flag - 3``: 1 knight, 2 bishop, 3 rook, 4 queen). Captured pieces are not
+encoded; they are read from the board when the move is played.
+"""
+
+from src.chessboard.chessboard import (
+    WHITE, square_name, square_index,
+    CASTLE_WHITE_KINGSIDE, CASTLE_WHITE_QUEENSIDE, CASTLE_BLACK_KINGSIDE, CASTLE_BLACK_QUEENSIDE,
+    FLAG_NONE, FLAG_DOUBLE_PUSH, FLAG_CASTLE, FLAG_EN_PASSANT,
+    FLAG_PROMO_KNIGHT, FLAG_PROMO_BISHOP, FLAG_PROMO_ROOK, FLAG_PROMO_QUEEN,
+)
+from src.chess_engine.attacks import (
+    FULL_BOARD, ROWS, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, BETWEEN, LINE,
+    RANK_MASKS, RANK_TABLES, FILE_MASKS, FILE_TABLES, DIAG_MASKS, DIAG_TABLES, ANTI_MASKS, ANTI_TABLES,
+    rook_attacks, bishop_attacks,
+)
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+PROMOTION_FLAGS = (FLAG_PROMO_QUEEN, FLAG_PROMO_ROOK, FLAG_PROMO_BISHOP, FLAG_PROMO_KNIGHT)
+PROMOTION_SYMBOLS = {FLAG_PROMO_KNIGHT: "n", FLAG_PROMO_BISHOP: "b", FLAG_PROMO_ROOK: "r", FLAG_PROMO_QUEEN: "q"}
+
+
+def encode_move(start, end, flag=FLAG_NONE):
+    return start | (end << 6) | (flag << 12)
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return (move >> 6) & 63
+
+
+def move_flag(move):
+    return move >> 12
+
+
+def move_to_uci(move):
+    """Convert a move to UCI notation, e.g. 'e2e4' or 'e7e8q'."""
+    text = square_name(move & 63) + square_name((move >> 6) & 63)
+    flag = move >> 12
+    if flag >= FLAG_PROMO_KNIGHT:
+        text += PROMOTION_SYMBOLS[flag]
+    return text
+
+
+def parse_uci(board, text):
+    """Return the legal move matching a UCI string, or None if there is none."""
+    start, end = square_index(text[0:2]), square_index(text[2:4])
+    promotion = text[4:5].lower()
+    for move in generate_legal_moves(board):
+        if move & 63 == start and (move >> 6) & 63 == end:
+            flag = move >> 12
+            if flag < FLAG_PROMO_KNIGHT or PROMOTION_SYMBOLS[flag] == promotion:
+                return move
+    return None
+
+
+def is_square_attacked(board, sq, by_color, occupied=None):
+    """True if any piece of by_color attacks sq, using the given occupancy for sliders."""
+    if occupied is None:
+        occupied = board.occupied
+    bbs = board.bitboards
+    base = 6 * by_color
+    if KNIGHT_ATTACKS[sq] & bbs[base + KNIGHT] or KING_ATTACKS[sq] & bbs[base + KING]:
+        return True
+    if PAWN_ATTACKS[by_color ^ 1][sq] & bbs[base + PAWN]:
+        return True
+    queens = bbs[base + QUEEN]
+    if (RANK_TABLES[sq][occupied & RANK_MASKS[sq]] | FILE_TABLES[sq][occupied & FILE_MASKS[sq]]) & (bbs[base + ROOK] | queens):
+        return True
+    if (DIAG_TABLES[sq][occupied & DIAG_MASKS[sq]] | ANTI_TABLES[sq][occupied & ANTI_MASKS[sq]]) & (bbs[base + BISHOP] | queens):
+        return True
+    return False
+
+
+def attackers_to(board, sq, by_color, occupied):
+    """Bitboard of the pieces of by_color attacking sq."""
+    bbs = board.bitboards
+    base = 6 * by_color
+    queens = bbs[base + QUEEN]
+    return ((KNIGHT_ATTACKS[sq] & bbs[base + KNIGHT])
+            | (KING_ATTACKS[sq] & bbs[base + KING])
+            | (PAWN_ATTACKS[by_color ^ 1][sq] & bbs[base + PAWN])
+            | (rook_attacks(sq, occupied) & (bbs[base + ROOK] | queens))
+            | (bishop_attacks(sq, occupied) & (bbs[base + BISHOP] | queens)))
+
+
+def king_square(board, color):
+    return board.bitboards[6 * color + KING].bit_length() - 1
+
+
+def in_check(board):
+    """True if the side to move is in check."""
+    us = board.side
+    return is_square_attacked(board, king_square(board, us), us ^ 1)
+
+
+def generate_legal_moves(board, captures_only=False):
+    """Generate every legal move for the side to move.
+
+    Pins and checks are resolved up front: pinned pieces are restricted to the line
+    through their king, and in check every non-king move must capture the checker or
+    block the checking line. King moves, castling and en passant are verified against
+    the attack tables directly. With captures_only, only captures and promotions are
+    returned (for quiescence search).
+    """
+    us = board.side
+    them = us ^ 1
+    bbs = board.bitboards
+    own = board.occupancy[us]
+    enemy = board.occupancy[them]
+    occupied = board.occupied
+    base = 6 * us
+    ebase = 6 * them
+    moves = []
+
+    king_bb = bbs[base + KING]
+    ks = king_bb.bit_length() - 1
+    enemy_queens = bbs[ebase + QUEEN]
+    enemy_rooks = bbs[ebase + ROOK] | enemy_queens
+    enemy_bishops = bbs[ebase + BISHOP] | enemy_queens
+    checkers = attackers_to(board, ks, them, occupied)
+
+    # King moves, tested with the king lifted off the board so it cannot hide behind itself
+    king_targets = KING_ATTACKS[ks] & ~own & (enemy if captures_only else FULL_BOARD)
+    without_king = occupied ^ king_bb
+    while king_targets:
+        lsb = king_targets & -king_targets
+        king_targets ^= lsb
+        end = lsb.bit_length() - 1
+        if not is_square_attacked(board, end, them, without_king):
+            moves.append(ks | (end << 6))
+
+    if checkers & (checkers - 1):
+        return moves  # Double check: only the king can move
+
+    if checkers:
+        checker_sq = checkers.bit_length() - 1
+        target = checkers | BETWEEN[ks][checker_sq]
+    else:
+        target = FULL_BOARD
+    target &= ~own
+    piece_target = target & enemy if captures_only else target
+
+    # Pinned pieces: own pieces alone between the king and an enemy slider
+    pinned = 0
+    snipers = (rook_attacks(ks, enemy) & enemy_rooks) | (bishop_attacks(ks, enemy) & enemy_bishops)
+    while snipers:
+        lsb = snipers & -snipers
+        snipers ^= lsb
+        blockers = BETWEEN[ks][lsb.bit_length() - 1] & occupied
+        if blockers and not blockers & (blockers - 1) and blockers & own:
+            pinned |= blockers
+    king_lines = LINE[ks]
+
+    # Knights (a pinned knight can never move)
+    pieces = bbs[base + KNIGHT] & ~pinned
+    while pieces:
+        lsb = pieces & -pieces
+        pieces ^= lsb
+        start = lsb.bit_length() - 1
+        targets = KNIGHT_ATTACKS[start] & piece_target
+        while targets:
+            tlsb = targets & -targets
+            targets ^= tlsb
+            moves.append(start | ((tlsb.bit_length() - 1) << 6))
+
+    # Sliders
+    for piece_type in (BISHOP, ROOK, QUEEN):
+        pieces = bbs[base + piece_type]
+        while pieces:
+            lsb = pieces & -pieces
+            pieces ^= lsb
+            start = lsb.bit_length() - 1
+            if piece_type == BISHOP:
+                targets = DIAG_TABLES[start][occupied & DIAG_MASKS[start]] | ANTI_TABLES[start][occupied & ANTI_MASKS[start]]
+            elif piece_type == ROOK:
+                targets = RANK_TABLES[start][occupied & RANK_MASKS[start]] | FILE_TABLES[start][occupied & FILE_MASKS[start]]
+            else:
+                targets = (DIAG_TABLES[start][occupied & DIAG_MASKS[start]] | ANTI_TABLES[start][occupied & ANTI_MASKS[start]]
+                           | RANK_TABLES[start][occupied & RANK_MASKS[start]] | FILE_TABLES[start][occupied & FILE_MASKS[start]])
+            targets &= piece_target
+            if lsb & pinned:
+                targets &= king_lines[start]
+            while targets:
+                tlsb = targets & -targets
+                targets ^= tlsb
+                moves.append(start | ((tlsb.bit_length() - 1) << 6))
+
+    # Pawns
+    empty = ~occupied & FULL_BOARD
+    pawns = bbs[base + PAWN]
+    if us == WHITE:
+        promotion_row, double_row, forward = ROWS[0], ROWS[5], -8
+    else:
+        promotion_row, double_row, forward = ROWS[7], ROWS[2], 8
+    push_target = target if not captures_only else target & promotion_row
+    pawn_attacks = PAWN_ATTACKS[us]
+    while pawns:
+        lsb = pawns & -pawns
+        pawns ^= lsb
+        start = lsb.bit_length() - 1
+        one = (lsb >> 8 if us == WHITE else lsb << 8) & empty
+        two = (one >> 8 if us == WHITE else one << 8) & empty if one & double_row else 0
+        targets = ((one | two) & push_target) | (pawn_attacks[start] & enemy & target)
+        if lsb & pinned:
+            targets &= king_lines[start]
+        while targets:
+            tlsb = targets & -targets
+            targets ^= tlsb
+            end = tlsb.bit_length() - 1
+            if tlsb & promotion_row:
+                for flag in PROMOTION_FLAGS:
+                    moves.append(start | (end << 6) | (flag << 12))
+            elif end - start == 2 * forward:
+                moves.append(start | (end << 6) | (FLAG_DOUBLE_PUSH << 12))
+            else:
+                moves.append(start | (end << 6))
+
+    # En passant, verified by replaying the capture on the occupancy (catches rank pins too)
+    ep = board.ep_square
+    if ep >= 0:
+        captured_sq = ep - forward
+        candidates = PAWN_ATTACKS[them][ep] & bbs[base + PAWN]
+        while candidates:
+            lsb = candidates & -candidates
+            candidates ^= lsb
+            start = lsb.bit_length() - 1
+            after = (occupied ^ lsb ^ (1 << captured_sq)) | (1 << ep)
+            remaining_pawns = bbs[ebase + PAWN] & ~(1 << captured_sq)
+            if (KNIGHT_ATTACKS[ks] & bbs[ebase + KNIGHT]
+                    or PAWN_ATTACKS[us][ks] & remaining_pawns
+                    or rook_attacks(ks, after) & enemy_rooks
+                    or bishop_attacks(ks, after) & enemy_bishops):
+                continue
+            moves.append(start | (ep << 6) | (FLAG_EN_PASSANT << 12))
+
+    # Castling
+    if not checkers and not captures_only and board.castling:
+        rights = board.castling
+        if us == WHITE:
+            kingside, queenside = rights & CASTLE_WHITE_KINGSIDE, rights & CASTLE_WHITE_QUEENSIDE
+        else:
+            kingside, queenside = rights & CASTLE_BLACK_KINGSIDE, rights & CASTLE_BLACK_QUEENSIDE
+        if kingside and not occupied & ((1 << (ks + 1)) | (1 << (ks + 2))):
+            if not is_square_attacked(board, ks + 1, them) and not is_square_attacked(board, ks + 2, them):
+                moves.append(ks | ((ks + 2) << 6) | (FLAG_CASTLE << 12))
+        if queenside and not occupied & ((1 << (ks - 1)) | (1 << (ks - 2)) | (1 << (ks - 3))):
+            if not is_square_attacked(board, ks - 1, them) and not is_square_attacked(board, ks - 2, them):
+                moves.append(ks | ((ks - 2) << 6) | (FLAG_CASTLE << 12))
+
+    return moves
+
+
+SAN_PIECES = "PNBRQK"
+
+
+def move_to_san(board, move, legal_moves=None):
+    """Standard algebraic notation for a legal move, e.g. 'Nbd7', 'exd6', 'e8=Q+', 'O-O'."""
+    if legal_moves is None:
+        legal_moves = generate_legal_moves(board)
+    start, end, flag = move & 63, (move >> 6) & 63, move >> 12
+    piece_type = board.piece_at(start) % 6
+    if flag == FLAG_CASTLE:
+        san = "O-O" if end > start else "O-O-O"
+    else:
+        capture = bool(board.occupied & (1 << end)) or flag == FLAG_EN_PASSANT
+        if piece_type == PAWN:
+            san = (square_name(start)[0] + "x" if capture else "") + square_name(end)
+            if flag >= FLAG_PROMO_KNIGHT:
+                san += "=" + PROMOTION_SYMBOLS[flag].upper()
+        else:
+            # Disambiguate among other pieces of the same type that can reach the same square
+            rivals = [other & 63 for other in legal_moves
+                      if other != move and (other >> 6) & 63 == end and other & 63 != start
+                      and board.piece_at(other & 63) % 6 == piece_type]
+            prefix = ""
+            if rivals:
+                if all(rival % 8 != start % 8 for rival in rivals):
+                    prefix = square_name(start)[0]
+                elif all(rival // 8 != start // 8 for rival in rivals):
+                    prefix = square_name(start)[1]
+                else:
+                    prefix = square_name(start)
+            san = SAN_PIECES[piece_type] + prefix + ("x" if capture else "") + square_name(end)
+    board.make(move)
+    if in_check(board):
+        san += "#" if not generate_legal_moves(board) else "+"
+    board.unmake()
+    return san
+
+
+def parse_san(board, san, legal_moves=None):
+    """Return the legal move matching a SAN string, or None if there is none (or it is ambiguous)."""
+    if legal_moves is None:
+        legal_moves = generate_legal_moves(board)
+    text = san.rstrip("+#!?")
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        kingside = len(text) == 3
+        for move in legal_moves:
+            if move >> 12 == FLAG_CASTLE and (((move >> 6) & 63) > (move & 63)) == kingside:
+                return move
+        return None
+
+    promotion = ""
+    if "=" in text:
+        text, promotion = text.split("=", 1)
+        promotion = promotion[:1].lower()
+    elif len(text) > 2 and text[-1] in "QRBN" and text[0].islower():
+        text, promotion = text[:-1], text[-1].lower()  # Tolerate 'e8Q'
+    if len(text) < 2:
+        return None
+
+    piece_type = SAN_PIECES.index(text[0]) if text[0] in "NBRQK" else PAWN
+    try:
+        end = square_index(text[-2:])
+    except (ValueError, IndexError):
+        return None
+    hints = text[1 if piece_type != PAWN else 0:-2].replace("x", "")
+
+    match = None
+    for move in legal_moves:
+        if (move >> 6) & 63 != end:
+            continue
+        start = move & 63
+        if board.piece_at(start) % 6 != piece_type:
+            continue
+        flag = move >> 12
+        if promotion or flag >= FLAG_PROMO_KNIGHT:
+            if flag < FLAG_PROMO_KNIGHT or PROMOTION_SYMBOLS[flag] != promotion:
+                continue
+        name = square_name(start)
+        if any(hint not in name for hint in hints):
+            continue
+        if match is not None:
+            return None  # Ambiguous
+        match = move
+    return match
@@ -0,0 +1,90 @@
+"""Perft: count leaf nodes of the legal move tree to validate and benchmark move generation.
+
+Run as ``python -m src.chess_engine.perft [--depth N] [--fen FEN]``. Without a FEN the
+standard reference positions are searched and checked against their known node counts.
+"""
+
+import argparse
+import time
+
+from src.chessboard.chessboard import Chessboard, START_FEN
+from src.chess_engine.movegen import generate_legal_moves, move_to_uci
+
+# (name, FEN, node counts for depth 1, 2, ...) from the chessprogramming wiki
+REFERENCE_POSITIONS = [
+    ("startpos", START_FEN, [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+    ("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def perft(board, depth):
+    """Number of leaf nodes reachable from board in exactly depth plies."""
+    moves = generate_legal_moves(board)
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        board.make(move)
+        nodes += perft(board, depth - 1)
+        board.unmake()
+    return nodes
+
+
+def divide(board, depth):
+    """Per-root-move node counts, for locating move generation bugs against another engine."""
+    counts = {}
+    for move in generate_legal_moves(board):
+        board.make(move)
+        counts[move_to_uci(move)] = perft(board, depth - 1)
+        board.unmake()
+    return counts
+
+
+def run_perft(fen, depth):
+    """Run perft on a FEN and return (nodes, seconds)."""
+    board = Chessboard()
+    board.update_from_fen(fen)
+    start = time.perf_counter()
+    nodes = perft(board, depth)
+    return nodes, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move generation perft benchmark")
+    parser.add_argument("--depth", type=int, default=3, help="search depth (capped per reference position)")
+    parser.add_argument("--fen", help="run a single position instead of the reference set")
+    parser.add_argument("--divide", action="store_true", help="print node counts per root move")
+    args = parser.parse_args(argv)
+
+    if args.fen:
+        if args.divide:
+            board = Chessboard()
+            board.update_from_fen(args.fen)
+            for move, count in sorted(divide(board, args.depth).items()):
+                print(f"{move}: {count}")
+        nodes, seconds = run_perft(args.fen, args.depth)
+        print(f"depth {args.depth}: {nodes} nodes in {seconds:.3f}s ({nodes / max(seconds, 1e-9):,.0f} nps)")
+        return 0
+
+    total_nodes, total_seconds, failures = 0, 0.0, 0
+    for name, fen, expected in REFERENCE_POSITIONS:
+        depth = min(args.depth, len(expected))
+        nodes, seconds = run_perft(fen, depth)
+        status = "ok" if nodes == expected[depth - 1] else f"FAIL (expected {expected[depth - 1]})"
+        failures += nodes != expected[depth - 1]
+        total_nodes += nodes
+        total_seconds += seconds
+        print(f"{name:<10} depth {depth}: {nodes:>9} nodes {seconds:8.3f}s {nodes / max(seconds, 1e-9):>10,.0f} nps  {status}")
+    print(f"total: {total_nodes} nodes in {total_seconds:.3f}s ({total_nodes / max(total_seconds, 1e-9):,.0f} nps)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,86 @@
+"""Opt-in counters and phase timers for the engine and model hot paths.
+
+Nothing is measured unless a Profiler is attached (GameEngine.set_profiling(), or the
+profiler attribute of a Searcher or ChessAI). With none attached the hot paths run the
+same code as before: the search swaps timed wrappers in for its move generator,
+evaluator, transposition table and move ordering only for the duration of a profiled
+search. A profiler counts events (nodes, TT probes and hits, evaluations, ...) and
+accumulates wall time per phase; snapshot() can be read from another thread (the GUI)
+while a search runs, and profiled searches add it to their info dicts under "profile".
+
+Timing every call has a cost of its own (roughly a microsecond per timed call), so
+profiled searches run slower; compare phases with each other rather than with
+unprofiled runs.
+"""
+
+import collections
+import contextlib
+import time
+
+
+class Profiler:
+    def __init__(self):
+        self.counts = collections.Counter()  # Event and call counts by name
+        self.times = collections.Counter()  # Seconds by phase
+
+    def count(self, name, amount=1):
+        self.counts[name] += amount
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time a with-block as one call of phase name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] += time.perf_counter() - start
+            self.counts[name] += 1
+
+    def timed(self, name, function):
+        """Wrap function so every call is counted and timed as phase name."""
+        counts, times, clock = self.counts, self.times, time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                times[name] += clock() - start
+                counts[name] += 1
+        return wrapper
+
+    def reset(self):
+        self.counts.clear()
+        self.times.clear()
+
+    def snapshot(self):
+        """{"counts": {name: n}, "times": {phase: seconds}} at this moment.
+
+        Safe to call from another thread while the profiled code adds names; the hot paths
+        take no lock, so a copy interrupted by a new name is simply retried.
+        """
+        while True:
+            try:
+                return {"counts": dict(self.counts), "times": dict(self.times)}
+            except RuntimeError:  # Dictionary changed size during the copy
+                continue
+
+
+class Instrumented:
+    """Proxy for obj whose methods named in phases ({method: phase}) are timed by profiler."""
+
+    def __init__(self, obj, profiler, phases):
+        self._obj = obj
+        for method, phase in phases.items():
+            setattr(self, method, profiler.timed(phase, getattr(obj, method)))
+
+    def __getattr__(self, name):
+        return getattr(self._obj, name)
+
+
+def format_snapshot(snapshot):
+    """One-line summary of a snapshot: counts, then each phase as calls/milliseconds."""
+    counts, times = snapshot["counts"], snapshot["times"]
+    parts = [f"{name} {value}" for name, value in sorted(counts.items()) if name not in times]
+    parts += [f"{name} {counts.get(name, 0)}/{seconds * 1000:.1f}ms" for name, seconds in sorted(times.items())]
+    return " ".join(parts)
@@ -0,0 +1,520 @@
+"""Iterative-deepening principal-variation alpha-beta search.
+
+The search walks the tree in place with Chessboard.make()/unmake(), caches results in
+the transposition table and orders moves by hash move, MVV-LVA captures, killer moves
+and the history heuristic. Leaves are resolved with a captures-only quiescence search.
+Positions covered by the endgame tables (tablebase.py), when a Tablebase is attached, are
+scored exactly instead of searched, and a root position they cover is played from them.
+
+Every limit (depth, nodes, movetime, clock + increment) is turned into a hard deadline
+that is polled every few hundred nodes; when it passes, the search unwinds at once and
+returns the best move of the deepest completed iteration (or a better root move already
+proven in the interrupted one).
+"""
+
+import threading
+import time
+
+from src.chess_engine.evaluation import DEFAULT_EVALUATOR
+from src.chess_engine.movegen import (
+    generate_legal_moves, in_check, move_to_uci, FLAG_EN_PASSANT, FLAG_PROMO_KNIGHT,
+)
+from src.chess_engine.profiling import Instrumented
+from src.chess_engine.tablebase import DRAW, code_plies
+from src.chess_engine.transposition import TranspositionTable, BOUND_EXACT, BOUND_LOWER, BOUND_UPPER
+
+INFINITY = 32000
+MATE_SCORE = 30000
+MATE_BOUND = MATE_SCORE - 1000  # Scores beyond this are forced mates
+MAX_PLY = 128
+DEFAULT_DEPTH = 4  # Used when no limit at all is given
+CHECK_INTERVAL = 255  # Poll the clock and stop flag every 256 nodes
+
+# Victim values for MVV-LVA ordering, by piece type
+VICTIM_VALUES = [1, 3, 3, 5, 9, 0]
+
+# Lazy SMP helper n skips iteration depth d when ((d + PHASE[i]) // SIZE[i]) is odd, i = (n - 1) % 20,
+# so helpers spread over different depths instead of all repeating the main search
+HELPER_SKIP_SIZE = [1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 3, 3, 4, 4, 4, 4, 4, 4, 4, 4]
+HELPER_SKIP_PHASE = [0, 1, 0, 1, 2, 3, 0, 1, 2, 3, 4, 5, 0, 1, 2, 3, 4, 5, 6, 7]
+
+
+class SearchLimits:
+    def __init__(self, depth=None, nodes=None, movetime=None, wtime=None, btime=None,
+                 winc=0, binc=0, movestogo=None, infinite=False, move_overhead=30):
+        """Search limits; times are in milliseconds, as in the UCI 'go' command."""
+        self.depth = depth
+        self.nodes = nodes
+        self.movetime = movetime
+        self.wtime = wtime
+        self.btime = btime
+        self.winc = winc
+        self.binc = binc
+        self.movestogo = movestogo
+        self.infinite = infinite
+        self.move_overhead = move_overhead
+
+    def time_budget(self, side):
+        """Return (soft, hard) limits in seconds for the side to move, or (None, None) for no clock.
+
+        The soft limit decides whether another iteration is started; the hard limit aborts the
+        search mid-iteration and is never later than the time actually left on the clock.
+        """
+        if self.infinite:
+            return None, None
+        if self.movetime is not None:
+            budget = max(self.movetime - self.move_overhead, 1) / 1000
+            return budget, budget
+        remaining = self.wtime if side == 0 else self.btime
+        if remaining is None:
+            return None, None
+        increment = self.winc if side == 0 else self.binc
+        moves_to_go = self.movestogo or 30
+        usable = max(remaining - self.move_overhead, 1)
+        optimum = usable / moves_to_go + increment * 0.75
+        hard = min(optimum * 3, usable * 0.5)
+        soft = min(optimum * 0.6, hard)
+        return soft / 1000, hard / 1000
+
+
+class SearchResult:
+    def __init__(self, best_move=0, score=0, depth=0, nodes=0, pv=None, elapsed=0.0):
+        self.best_move = best_move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.pv = pv or []
+        self.elapsed = elapsed
+
+    @property
+    def best_move_uci(self):
+        return move_to_uci(self.best_move) if self.best_move else "0000"
+
+    @property
+    def nps(self):
+        return int(self.nodes / self.elapsed) if self.elapsed > 0 else 0
+
+    def __repr__(self):
+        return f"SearchResult({self.best_move_uci}, score={self.score}, depth={self.depth}, nodes={self.nodes})"
+
+
+class SearchAborted(Exception):
+    """Raised inside the tree when the deadline, node limit or stop request is hit."""
+
+
+def score_to_tt(score, ply):
+    # Mate scores are stored relative to the node, not the root
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def tablebase_score(code, ply):
+    # Exact mate score (or 0 for a draw) of a tablebase code found at ply
+    if code == DRAW:
+        return 0
+    plies = code_plies(code)
+    return MATE_SCORE - ply - plies if code & 1 else -MATE_SCORE + ply + plies
+
+
+class Searcher:
+    generate_moves = staticmethod(generate_legal_moves)  # Replaced by a timed wrapper while profiling
+
+    def __init__(self, tt=None, evaluator=None, stop_event=None, helper_id=0):
+        """helper_id > 0 makes this a Lazy SMP helper (see smp.py) with its own depth schedule and root order.
+
+        A stop_event passed in (e.g. a multiprocessing.Event shared with other processes) belongs to
+        the caller and is never cleared by search().
+        """
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.evaluator = evaluator or DEFAULT_EVALUATOR
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.owns_stop_event = stop_event is None
+        self.helper_id = helper_id
+        self.tablebase = None  # tablebase.Tablebase probed for positions with few pieces
+        self.profiler = None  # profiling.Profiler fed by every search while attached
+        self.nodes = 0
+        self.tbhits = 0
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        self.history = [[0] * 4096 for _ in range(2)]  # [side][from | to << 6]
+
+    def stop(self):
+        """Ask a running search to return as soon as possible (safe to call from another thread)."""
+        self.stop_event.set()
+
+    def search(self, board, limits=None, info_callback=None):
+        """Search board within limits and return a SearchResult.
+
+        The caller's board is not modified. info_callback, if given, receives a dict after
+        every completed iteration (depth, score, nodes, nps, time, pv, hashfull, tbhits, and
+        profile while a profiler is attached).
+        """
+        if self.profiler is None:
+            return self._search(board, limits, info_callback)
+        return self._profiled_search(board, limits, info_callback)
+
+    def _profiled_search(self, board, limits, info_callback):
+        """search() with the move generator, evaluator, table and move ordering timed."""
+        profiler, evaluator, tt = self.profiler, self.evaluator, self.tt
+        marks = {"nodes": 0, "tbhits": 0, "tt_probes": tt.probes, "tt_hits": tt.hits, "tt_stores": tt.stores}
+
+        def sync():
+            # Add the counter deltas since the last sync, so snapshots taken mid-search are current
+            for name, value in (("nodes", self.nodes), ("tbhits", self.tbhits), ("tt_probes", tt.probes),
+                                ("tt_hits", tt.hits), ("tt_stores", tt.stores)):
+                profiler.count(name, value - marks[name])
+                marks[name] = value
+
+        def report(info):
+            sync()
+            info_callback(dict(info, profile=profiler.snapshot()))
+
+        self.generate_moves = profiler.timed("movegen", generate_legal_moves)
+        self._order_moves = profiler.timed("ordering", self._order_moves)
+        self.evaluator = Instrumented(evaluator, profiler, {"evaluate": "eval"})
+        self.tt = Instrumented(tt, profiler, {"probe": "tt_probe", "store": "tt_store"})
+        try:
+            with profiler.phase("search"):
+                return self._search(board, limits, report if info_callback is not None else None)
+        finally:
+            del self.generate_moves, self._order_moves
+            self.evaluator, self.tt = evaluator, tt
+            sync()
+
+    def _search(self, board, limits, info_callback):
+        limits = limits or SearchLimits()
+        board = board.copy()
+        if self.owns_stop_event:
+            self.stop_event.clear()
+        self.nodes = 0
+        self.tbhits = 0
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        self.history = [[value >> 3 for value in side] for side in self.history]  # Age history between moves
+        self.tt.new_search()
+
+        self.start_time = time.perf_counter()
+        soft, hard = limits.time_budget(board.side)
+        self.deadline = self.start_time + hard if hard is not None else None
+        self.node_limit = limits.nodes
+        has_limit = limits.infinite or limits.depth or limits.nodes or hard is not None
+        max_depth = limits.depth or (MAX_PLY if has_limit else DEFAULT_DEPTH)
+
+        root_moves = self.generate_moves(board)
+        result = SearchResult()
+        if not root_moves:
+            return result
+        entry = self.tt.probe(board.key)
+        root_moves = self._order_moves(board, root_moves, entry[0] if entry else 0, 0)
+        if self.helper_id and len(root_moves) > 2:
+            # Helpers rotate the moves after the first one so they explore the root in a different order
+            shift = self.helper_id % (len(root_moves) - 1)
+            root_moves = root_moves[:1] + root_moves[1 + shift:] + root_moves[1:1 + shift]
+        result.best_move = root_moves[0]  # Always have a legal move to return
+        if self.tablebase is not None and not limits.infinite:
+            found = self.tablebase.best_move(board)
+            if found is not None:  # Perfect play from the tables, no search needed
+                result.best_move, code = found
+                result.score = tablebase_score(code, 0)
+                result.depth = 1
+                result.pv = [result.best_move]
+                result.elapsed = time.perf_counter() - self.start_time
+                self.tbhits = len(root_moves)
+                if info_callback is not None:
+                    info_callback({
+                        "depth": 1, "score": result.score, "nodes": 0, "nps": 0, "time": int(result.elapsed * 1000),
+                        "pv": [move_to_uci(result.best_move)], "hashfull": self.tt.hashfull(), "tbhits": self.tbhits,
+                    })
+                return result
+        if len(root_moves) == 1 and not limits.infinite and not limits.depth:
+            result.elapsed = time.perf_counter() - self.start_time
+            return result  # Forced move: do not spend the clock on it
+
+        root_length = len(board.history)
+        score = 0
+        for depth in range(1, max_depth + 1):
+            if self.helper_id and 1 < depth < max_depth and self._skip_depth(depth):
+                continue
+            try:
+                score, root_moves = self._search_root(board, depth, score, root_moves, result)
+            except SearchAborted:
+                self._unwind(board, root_length)
+                break
+            result.best_move = root_moves[0]
+            result.score = score
+            result.depth = depth
+            result.nodes = self.nodes
+            result.elapsed = time.perf_counter() - self.start_time
+            result.pv = self._principal_variation(board, depth)
+            if info_callback is not None:
+                info_callback({
+                    "depth": depth, "score": score, "nodes": self.nodes, "nps": result.nps,
+                    "time": int(result.elapsed * 1000), "pv": [move_to_uci(move) for move in result.pv],
+                    "hashfull": self.tt.hashfull(), "tbhits": self.tbhits,
+                })
+            if abs(score) >= MATE_BOUND and not limits.infinite and depth >= MATE_SCORE - abs(score):
+                break  # Found the shortest mate
+            if soft is not None and result.elapsed >= soft:
+                break
+            if self.stop_event.is_set():
+                break
+
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - self.start_time
+        return result
+
+    def _skip_depth(self, depth):
+        index = (self.helper_id - 1) % len(HELPER_SKIP_SIZE)
+        return (depth + HELPER_SKIP_PHASE[index]) // HELPER_SKIP_SIZE[index] % 2 == 1
+
+    def _check_limits(self):
+        if self.stop_event.is_set():
+            raise SearchAborted
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchAborted
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchAborted
+
+    @staticmethod
+    def _unwind(board, length):
+        """Restore the root position after an aborted search left moves on the board."""
+        while len(board.history) > length:
+            if board.history[-1][0]:
+                board.unmake()
+            else:
+                board.unmake_null()
+
+    def _search_root(self, board, depth, previous_score, root_moves, result):
+        """One iteration at the root with an aspiration window; returns (score, reordered moves)."""
+        if depth >= 4 and abs(previous_score) < MATE_BOUND:
+            window = 50
+            alpha, beta = previous_score - window, previous_score + window
+        else:
+            window = INFINITY
+            alpha, beta = -INFINITY, INFINITY
+
+        while True:
+            score, best_index = self._root_iteration(board, depth, alpha, beta, root_moves, result)
+            if score <= alpha and alpha > -INFINITY:
+                window *= 4
+                alpha = max(previous_score - window, -INFINITY)
+            elif score >= beta and beta < INFINITY:
+                window *= 4
+                beta = min(previous_score + window, INFINITY)
+            else:
+                break
+            if window > 1000:
+                alpha, beta = -INFINITY, INFINITY
+
+        best = root_moves[best_index]
+        return score, [best] + root_moves[:best_index] + root_moves[best_index + 1:]
+
+    def _root_iteration(self, board, depth, alpha, beta, root_moves, result):
+        best_score = -INFINITY
+        best_index = 0
+        original_alpha = alpha
+        for index, move in enumerate(root_moves):
+            board.make(move)
+            if index == 0:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, 1)
+            else:
+                score = -self._negamax(board, depth - 1, -alpha - 1, -alpha, 1)
+                if alpha < score < beta:
+                    score = -self._negamax(board, depth - 1, -beta, -alpha, 1)
+            board.unmake()
+            if score > best_score:
+                best_score, best_index = score, index
+                if score > alpha:
+                    alpha = score
+                    if depth > 1:
+                        result.best_move = move  # Proven better than the old best: usable if we abort now
+                    if alpha >= beta:
+                        break
+        bound = BOUND_LOWER if best_score >= beta else BOUND_EXACT if best_score > original_alpha else BOUND_UPPER
+        self.tt.store(board.key, root_moves[best_index], score_to_tt(best_score, 0), depth, bound)
+        return best_score, best_index
+
+    def _negamax(self, board, depth, alpha, beta, ply, allow_null=True):
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiescence(board, alpha, beta, ply)
+        self.nodes += 1
+        if not self.nodes & CHECK_INTERVAL:
+            self._check_limits()
+
+        if board.halfmove_clock >= 100 or board.is_repetition():
+            return 0
+
+        if self.tablebase is not None:
+            code = self.tablebase.probe_code(board)
+            if code is not None:
+                self.tbhits += 1
+                return tablebase_score(code, ply)
+
+        # Mate distance pruning: no line from here can beat a mate already found closer to the root
+        alpha = max(alpha, -MATE_SCORE + ply)
+        beta = min(beta, MATE_SCORE - ply - 1)
+        if alpha >= beta:
+            return alpha
+
+        is_pv = beta - alpha > 1
+        key = board.key
+        tt = self.tt
+        entry = tt.probe(key)
+        hash_move = 0
+        if entry is not None:
+            hash_move, tt_score, tt_depth, bound, _ = entry
+            if not is_pv and tt_depth >= depth:
+                tt_score = score_from_tt(tt_score, ply)
+                if (bound == BOUND_EXACT
+                        or (bound == BOUND_LOWER and tt_score >= beta)
+                        or (bound == BOUND_UPPER and tt_score <= alpha)):
+                    return tt_score
+
+        checked = in_check(board)
+        if checked:
+            depth += 1  # Check extension
+
+        # Null move pruning: if passing still fails high, a real move almost certainly does too
+        if allow_null and not is_pv and not checked and depth >= 3 and abs(beta) < MATE_BOUND:
+            bbs = board.bitboards
+            base = 6 * board.side
+            if bbs[base + 1] | bbs[base + 2] | bbs[base + 3] | bbs[base + 4]:
+                if self.evaluator.evaluate(board) >= beta:
+                    reduction = 3 if depth >= 6 else 2
+                    board.make_null()
+                    score = -self._negamax(board, depth - 1 - reduction, -beta, -beta + 1, ply + 1, False)
+                    board.unmake_null()
+                    if score >= beta:
+                        return beta
+
+        moves = self.generate_moves(board)
+        if not moves:
+            return -MATE_SCORE + ply if checked else 0
+
+        enemy = board.occupancy[board.side ^ 1]
+        best_score = -INFINITY
+        best_move = 0
+        original_alpha = alpha
+        for index, move in enumerate(self._order_moves(board, moves, hash_move, ply)):
+            flag = move >> 12
+            is_quiet = not enemy & (1 << ((move >> 6) & 63)) and flag != FLAG_EN_PASSANT and flag < FLAG_PROMO_KNIGHT
+            board.make(move)
+            if index == 0:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                # Late move reduction for quiet moves ordered late, verified at full depth if they improve alpha
+                reduction = 1 if depth >= 3 and index >= 4 and is_quiet and not checked else 0
+                score = -self._negamax(board, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+                if score > alpha and reduction:
+                    score = -self._negamax(board, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < score < beta:
+                    score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.unmake()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if is_quiet:
+                            killers = self.killers[ply]
+                            if killers[0] != move:
+                                killers[1] = killers[0]
+                                killers[0] = move
+                            self.history[board.side][move & 4095] += depth * depth
+                        break
+
+        bound = BOUND_LOWER if best_score >= beta else BOUND_EXACT if best_score > original_alpha else BOUND_UPPER
+        tt.store(key, best_move, score_to_tt(best_score, ply), depth, bound)
+        return best_score
+
+    def _quiescence(self, board, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & CHECK_INTERVAL:
+            self._check_limits()
+
+        if ply >= MAX_PLY:
+            return self.evaluator.evaluate(board)
+        if in_check(board):
+            moves = self.generate_moves(board)
+            if not moves:
+                return -MATE_SCORE + ply
+            best_score = -INFINITY
+        else:
+            best_score = self.evaluator.evaluate(board)  # Stand pat
+            if best_score >= beta:
+                return best_score
+            if best_score > alpha:
+                alpha = best_score
+            moves = self.generate_moves(board, captures_only=True)
+
+        for move in self._order_moves(board, moves, 0, ply):
+            board.make(move)
+            score = -self._quiescence(board, -beta, -alpha, ply + 1)
+            board.unmake()
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def _order_moves(self, board, moves, hash_move, ply):
+        """Sort moves: hash move, captures by MVV-LVA, promotions, killers, then history score."""
+        enemy = board.occupancy[board.side ^ 1]
+        killers = self.killers[ply] if ply <= MAX_PLY else (0, 0)
+        history = self.history[board.side]
+        scored = []
+        for move in moves:
+            if move == hash_move:
+                order = 10_000_000
+            else:
+                end = (move >> 6) & 63
+                flag = move >> 12
+                if enemy & (1 << end):
+                    victim = board.piece_at(end) % 6
+                    attacker = board.piece_at(move & 63) % 6
+                    order = 1_000_000 + VICTIM_VALUES[victim] * 100 - attacker
+                elif flag == FLAG_EN_PASSANT:
+                    order = 1_000_100
+                elif flag >= FLAG_PROMO_KNIGHT:
+                    order = 900_000 + flag
+                elif move == killers[0]:
+                    order = 800_000
+                elif move == killers[1]:
+                    order = 700_000
+                else:
+                    order = history[move & 4095]
+            scored.append((order, move))
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
+
+    def _principal_variation(self, board, depth):
+        """Follow hash moves from the root, checking each is legal, to recover the PV."""
+        pv = []
+        seen = set()
+        for _ in range(depth):
+            entry = self.tt.probe(board.key)
+            if entry is None or not entry[0] or board.key in seen:
+                break
+            move = entry[0]
+            if move not in self.generate_moves(board):
+                break
+            seen.add(board.key)
+            pv.append(move)
+            board.make(move)
+        for _ in pv:
+            board.unmake()
+        return pv
+
@@ -0,0 +1,139 @@
+"""Lazy SMP: several search processes sharing one transposition table.
+
+The table lives in a ``multiprocessing.shared_memory`` block that the main process and
+every helper process map as the buffer of their own TranspositionTable. Entries are
+verified with the ``key ^ data`` check (see transposition.py), so no locks are needed:
+a torn write from two processes just reads back as a miss.
+
+The main search runs in the calling process under the caller's limits. Helper processes
+search the same root with a shifted depth schedule and root move order (Searcher
+helper_id) until the main search finishes and sets the shared stop event; they mostly
+contribute by filling the shared table, which makes the main search reach its depths
+sooner. The combined result is the deepest completed search (the main one on ties),
+with node counts summed over all processes.
+"""
+
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+from src.chess_engine.search import Searcher, SearchLimits, SearchResult
+from src.chess_engine.transposition import TranspositionTable, AGE_MASK
+
+
+def _helper_main(shm_name, helper_id, commands, results, stop_event, node_counts, evaluator):
+    """Helper process: attach to the shared table and serve search commands until told to exit."""
+    shm = shared_memory.SharedMemory(name=shm_name)  # Spawned children share the parent's resource tracker
+    tt = TranspositionTable(buffer=shm.buf)
+    searcher = Searcher(tt, evaluator, stop_event=stop_event, helper_id=helper_id)
+
+    def publish(info):
+        node_counts[helper_id] = info["nodes"]
+
+    try:
+        while True:
+            command = commands.get()
+            if command is None:
+                break
+            board, limits, age = command
+            tt.age = (age - 1) & AGE_MASK  # search() advances it to the main process' age
+            result = searcher.search(board, limits, publish)
+            node_counts[helper_id] = result.nodes
+            results.put((helper_id, result.best_move, result.score, result.depth, result.nodes, result.pv))
+    finally:
+        tt.words.release()
+        shm.close()
+
+
+class SMPSearcher:
+    def __init__(self, size_mb=16, threads=2, evaluator=None):
+        """Main searcher plus threads - 1 helper processes over a shared size_mb table.
+
+        evaluator (None for the default) must be picklable; each helper gets its own copy.
+        """
+        self.threads = threads
+        self.shm = shared_memory.SharedMemory(create=True, size=TranspositionTable.bytes_for(size_mb))
+        self.tt = TranspositionTable(buffer=self.shm.buf)
+        self.tt.clear()
+        context = multiprocessing.get_context("spawn")  # Safe with threads (GUI, UCI input) in the parent
+        self.stop_event = context.Event()
+        self.node_counts = context.Array("q", threads, lock=False)
+        self.results = context.Queue()
+        self.searcher = Searcher(self.tt, evaluator)
+        self.commands = []
+        self.helpers = []
+        for helper_id in range(1, threads):
+            commands = context.Queue()
+            process = context.Process(
+                target=_helper_main, name=f"search-helper-{helper_id}", daemon=True,
+                args=(self.shm.name, helper_id, commands, self.results, self.stop_event, self.node_counts, evaluator))
+            process.start()
+            self.commands.append(commands)
+            self.helpers.append(process)
+
+    @property
+    def nodes(self):
+        return self.searcher.nodes + sum(self.node_counts[1:])
+
+    def stop(self):
+        self.searcher.stop()
+        self.stop_event.set()
+
+    def search(self, board, limits=None, info_callback=None):
+        """Search board on all processes; returns the combined SearchResult.
+
+        A helper process that has died (or dies during the search) is skipped, not waited for.
+        """
+        limits = limits or SearchLimits()
+        self.stop_event.clear()
+        for index in range(len(self.node_counts)):
+            self.node_counts[index] = 0
+        age = (self.tt.age + 1) & AGE_MASK  # The age the main search is about to use
+        # Helpers run until the main search is done (or to the same fixed depth)
+        helper_limits = SearchLimits(depth=limits.depth, infinite=True)
+        pending = set()  # Helpers (by helper_id) whose result is still to come
+        for helper_id, (commands, process) in enumerate(zip(self.commands, self.helpers), 1):
+            if process.is_alive():  # A helper that died (crash, out of memory) is left out
+                commands.put((board, helper_limits, age))
+                pending.add(helper_id)
+
+        def report(info):
+            if info_callback is not None:
+                nodes = self.searcher.nodes + sum(self.node_counts[1:])
+                elapsed = max(info["time"], 1) / 1000
+                info_callback(dict(info, nodes=nodes, nps=int(nodes / elapsed)))
+
+        start = time.perf_counter()
+        main = self.searcher.search(board, limits, report)
+        self.stop_event.set()
+        results = [main]
+        while pending:
+            try:
+                helper_id, move, score, depth, nodes, pv = self.results.get(timeout=0.1)
+            except queue.Empty:
+                pending = {helper_id for helper_id in pending if self.helpers[helper_id - 1].is_alive()}
+                continue
+            pending.discard(helper_id)
+            results.append(SearchResult(move, score, depth, nodes, pv))
+
+        best = main
+        for result in results[1:]:
+            if result.best_move and result.depth > best.depth:
+                best = result
+        return SearchResult(best.best_move, best.score, best.depth, sum(result.nodes for result in results),
+                            best.pv, time.perf_counter() - start)
+
+    def close(self):
+        """Stop the helper processes and release the shared table."""
+        self.stop_event.set()
+        for commands in self.commands:
+            commands.put(None)
+        for process in self.helpers:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        self.helpers, self.commands = [], []
+        self.tt.words.release()
+        self.shm.close()
+        self.shm.unlink()
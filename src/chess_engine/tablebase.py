@@ -0,0 +1,211 @@
+"""Endgame tablebases: exact win/draw/loss and distance to mate for small material sets.
+
+Tables are built by src/data/build_tablebase.py. There is one file per material set, named
+after it with the white (stronger) side first, e.g. ``KQvK.tb``, ``KRvKP.tb``. A file is a
+16-byte header followed by one byte per position:
+
+    index = side * 64**n + sq[0] * 64**(n-1) + ... + sq[n-1]
+
+where sq[] are the squares of the n pieces in canonical order (white king, white pieces
+in QRBNP order, black king, black pieces likewise). The byte is, for the side to move:
+
+    0          draw
+    odd b      win, mate in b plies
+    even b     loss, mated in b - 2 plies (2 = checkmated now)
+    255        illegal position (never looked up by the prober)
+
+Positions with castling rights or a legal en passant capture are not covered (the tables
+are generated without either). Black-stronger positions (KvKQ) are looked up in the white-stronger table
+with the board mirrored. Files are memory-mapped, so a probe reads one byte in place.
+"""
+
+import mmap
+import os
+
+from src.chessboard.chessboard import PIECE_SYMBOLS
+from src.chess_engine.movegen import generate_legal_moves, FLAG_EN_PASSANT
+
+MAGIC = b"CPTB\x01"
+HEADER_SIZE = 16
+DRAW = 0
+ILLEGAL = 255
+MAX_PLIES = 253  # Longest distance to mate a table can store
+
+# Canonical order of piece types within one side: K, Q, R, B, N, P (piece type = piece % 6)
+TYPE_ORDER = {5: 0, 4: 1, 3: 2, 2: 3, 1: 4, 0: 5}
+# Material with no mating material at all: always a draw, no table needed
+DEAD_DRAWS = {"KvK", "KBvK", "KNvK", "KvKB", "KvKN"}
+
+
+def canonical_order(pieces):
+    """Indices that sort a list of piece numbers (0-11) into table order."""
+    return sorted(range(len(pieces)), key=lambda index: (pieces[index] // 6, TYPE_ORDER[pieces[index] % 6]))
+
+
+def material_name(pieces):
+    """Table name of a list of piece numbers, e.g. [5, 4, 11] -> 'KQvK'."""
+    white = "".join(PIECE_SYMBOLS[piece] for piece in sorted(
+        (piece for piece in pieces if piece < 6), key=lambda piece: TYPE_ORDER[piece]))
+    black = "".join(PIECE_SYMBOLS[piece - 6] for piece in sorted(
+        (piece for piece in pieces if piece >= 6), key=lambda piece: TYPE_ORDER[piece % 6]))
+    return f"{white}v{black}"
+
+
+def parse_material(name):
+    """Piece numbers of a table name in canonical order, e.g. 'KRvKP' -> [5, 3, 11, 6]."""
+    white, black = name.upper().split("V")
+    pieces = [PIECE_SYMBOLS.index(symbol) for symbol in white] + [PIECE_SYMBOLS.index(symbol) + 6 for symbol in black]
+    if pieces.count(5) != 1 or pieces.count(11) != 1:
+        raise ValueError(f"material {name!r} needs exactly one king per side")
+    return [pieces[index] for index in canonical_order(pieces)]
+
+
+def mirrored_name(name):
+    """The same material with colours swapped, e.g. 'KRvKP' -> 'KPvKR'."""
+    white, black = name.split("v")
+    return f"{black}v{white}"
+
+
+def table_size(count):
+    return 2 * 64 ** count
+
+
+def position_index(squares, side):
+    """Table index of squares (canonical order) with side to move."""
+    index = side
+    for square in squares:
+        index = index * 64 + square
+    return index
+
+
+def child_value(code):
+    """Code of a position one ply before a position with the given code, as seen by its mover.
+
+    Used to pick moves: a move into a position lost in p plies wins in p + 1, and so on.
+    Returns None for illegal positions.
+    """
+    if code == ILLEGAL:
+        return None
+    if code == DRAW:
+        return DRAW
+    if code & 1:
+        return code + 3  # Opponent mates in b plies: we are mated in b + 1, stored as b + 1 + 2
+    return code - 1  # Opponent is mated in b - 2 plies: we mate in b - 1
+
+
+def code_rank(code):
+    """Sort key for codes from the mover's point of view: faster wins first, slower losses last."""
+    if code == DRAW:
+        return 0
+    if code & 1:
+        return 1000 - code
+    return code - 1000
+
+
+def code_wdl(code):
+    """1 for a win, 0 for a draw, -1 for a loss."""
+    return 0 if code == DRAW else 1 if code & 1 else -1
+
+
+def code_plies(code):
+    """Distance to mate in plies (0 for draws)."""
+    return 0 if code == DRAW else code if code & 1 else code - 2
+
+
+def board_material(board):
+    """(piece numbers, squares) of every piece on board."""
+    pieces, squares = [], []
+    for piece, bitboard in enumerate(board.bitboards):
+        while bitboard:
+            lsb = bitboard & -bitboard
+            pieces.append(piece)
+            squares.append(lsb.bit_length() - 1)
+            bitboard ^= lsb
+    return pieces, squares
+
+
+class Tablebase:
+    def __init__(self, directory):
+        """Open every table file (*.tb) in directory."""
+        self.directory = directory
+        self.paths = {}
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".tb"):
+                self.paths[filename[:-3]] = os.path.join(directory, filename)
+        self.tables = {}  # name -> (file, mmap), opened on first probe
+        self.max_pieces = max((len(name) - 1 for name in self.paths), default=0)
+        self.hits = 0
+
+    def __contains__(self, name):
+        return name in self.paths or name in DEAD_DRAWS
+
+    def _table(self, name):
+        table = self.tables.get(name)
+        if table is None:
+            handle = open(self.paths[name], "rb")
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            if data[:len(MAGIC)] != MAGIC:
+                data.close()
+                handle.close()
+                raise ValueError(f"{self.paths[name]} is not a tablebase file")
+            table = self.tables[name] = (handle, data)
+        return table[1]
+
+    def probe_code(self, board):
+        """Raw table code of board (see the module docstring), or None if no table covers it."""
+        if board.castling or bin(board.occupied).count("1") > self.max_pieces:
+            return None
+        if board.ep_square >= 0 and any(move >> 12 == FLAG_EN_PASSANT for move in generate_legal_moves(board)):
+            return None
+        pieces, squares = board_material(board)
+        name = material_name(pieces)
+        side = board.side
+        if name in DEAD_DRAWS:
+            return DRAW
+        if name not in self.paths:
+            name = mirrored_name(name)
+            if name not in self.paths:
+                return None
+            pieces = [(piece + 6) % 12 for piece in pieces]
+            squares = [square ^ 56 for square in squares]
+            side ^= 1
+        order = canonical_order(pieces)
+        code = self._table(name)[HEADER_SIZE + position_index([squares[index] for index in order], side)]
+        self.hits += 1
+        return None if code == ILLEGAL else code
+
+    def probe(self, board):
+        """(wdl, plies to mate) for the side to move, or None if no table covers the position."""
+        code = self.probe_code(board)
+        if code is None:
+            return None
+        return code_wdl(code), code_plies(code)
+
+    def best_move(self, board):
+        """(move, code) of the best move by the tables: the fastest mate, the longest defence or
+        any drawing move. None unless every legal move leads into a probeable position."""
+        if board.castling or bin(board.occupied).count("1") > self.max_pieces:
+            return None
+        best, best_code = None, None
+        for move in generate_legal_moves(board):
+            board.make(move)
+            code = self.probe_code(board)
+            board.unmake()
+            if code is None:
+                return None
+            value = child_value(code)
+            if best is None or code_rank(value) > code_rank(best_code):
+                best, best_code = move, value
+        return (best, best_code) if best is not None else None
+
+    def close(self):
+        for handle, data in self.tables.values():
+            data.close()
+            handle.close()
+        self.tables = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
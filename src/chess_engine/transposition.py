@@ -0,0 +1,164 @@
+"""Fixed-size transposition table for the search.
+
+The table is one preallocated buffer of 64-bit words viewed through a ``memoryview``,
+so its size is set once in MB and never grows. Each entry is two words:
+
+    word 0: key ^ data      word 1: data
+
+Packing the key as ``key ^ data`` means an entry only verifies (``w0 ^ w1 == key``) when
+both words were written together, which is what lets several processes share one
+table without locks; a torn write simply reads back as a miss. ``data`` packs:
+
+    bits  0-15  best move          bits 32-39  depth
+    bits 16-31  score (+32768)     bits 40-41  bound type
+    bits 48-63  static eval        bits 42-47  age (search generation)
+
+Entries are grouped in buckets of four. The first three slots are depth-preferred and
+the last one is always-replace; stale entries from earlier searches are evicted first.
+"""
+
+BOUND_UPPER = 1  # Score is at most the stored value (fail-low)
+BOUND_LOWER = 2  # Score is at least the stored value (fail-high)
+BOUND_EXACT = 3
+
+ENTRY_WORDS = 2
+BUCKET_ENTRIES = 4
+BUCKET_WORDS = ENTRY_WORDS * BUCKET_ENTRIES
+BUCKET_BYTES = BUCKET_WORDS * 8
+AGE_MASK = 0x3F
+MASK64 = (1 << 64) - 1
+
+
+def pack_entry(move, score, depth, bound, age, static_eval=0):
+    return (move
+            | ((score + 32768) & 0xFFFF) << 16
+            | (max(depth, 0) & 0xFF) << 32
+            | bound << 40
+            | age << 42
+            | ((static_eval + 32768) & 0xFFFF) << 48)
+
+
+def unpack_entry(data):
+    """Decode a data word into (move, score, depth, bound, static_eval)."""
+    return (data & 0xFFFF,
+            ((data >> 16) & 0xFFFF) - 32768,
+            (data >> 32) & 0xFF,
+            (data >> 40) & 3,
+            (data >> 48) - 32768)
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16, buffer=None):
+        """Allocate a table of size_mb megabytes, or wrap an existing buffer (e.g. shared memory)."""
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self._attach(buffer if buffer is not None else bytearray(self.bytes_for(size_mb)))
+
+    @staticmethod
+    def bytes_for(size_mb):
+        """Buffer size in bytes for a budget of size_mb megabytes (at least one bucket)."""
+        return max(1, int(size_mb * 1024 * 1024) // BUCKET_BYTES) * BUCKET_BYTES
+
+    def _attach(self, buffer):
+        self.buffer = buffer
+        self.words = memoryview(buffer).cast("Q")
+        self.bucket_count = len(self.words) // BUCKET_WORDS
+
+    @property
+    def size_mb(self):
+        return self.bucket_count * BUCKET_BYTES / (1024 * 1024)
+
+    def resize(self, size_mb):
+        self.words.release()
+        self._attach(bytearray(self.bytes_for(size_mb)))
+        self.age = 0
+
+    def clear(self):
+        self.words.cast("B")[:] = bytes(self.words.nbytes)
+        self.age = 0
+        self.reset_stats()
+
+    def new_search(self):
+        """Advance the age counter; entries written by earlier searches become replaceable first."""
+        self.age = (self.age + 1) & AGE_MASK
+
+    def reset_stats(self):
+        self.probes = self.hits = self.stores = 0
+
+    def _bucket(self, key):
+        # Multiply-shift maps the key uniformly onto any bucket count, not just powers of two
+        return ((key * self.bucket_count) >> 64) * BUCKET_WORDS
+
+    def probe(self, key):
+        """Return (move, score, depth, bound, static_eval) for key, or None on a miss."""
+        self.probes += 1
+        words = self.words
+        index = self._bucket(key)
+        for slot in range(index, index + BUCKET_WORDS, ENTRY_WORDS):
+            data = words[slot + 1]
+            if data and words[slot] ^ data == key:
+                self.hits += 1
+                return unpack_entry(data)
+        return None
+
+    def store(self, key, move, score, depth, bound, static_eval=0):
+        words = self.words
+        index = self._bucket(key)
+        age = self.age
+        self.stores += 1
+
+        # Same position already stored: refresh it unless the stored result is clearly deeper
+        for slot in range(index, index + BUCKET_WORDS, ENTRY_WORDS):
+            data = words[slot + 1]
+            if data and words[slot] ^ data == key:
+                if not move:
+                    move = data & 0xFFFF  # Keep the old best move if the new result has none
+                if bound != BOUND_EXACT and depth + 2 < (data >> 32) & 0xFF and (data >> 42) & AGE_MASK == age:
+                    return
+                replace = slot
+                break
+        else:
+            # Depth-preferred slots: take an empty one, else the stalest/shallowest if we are deeper
+            replace = -1
+            worst_value = 256
+            for slot in range(index, index + BUCKET_WORDS - ENTRY_WORDS, ENTRY_WORDS):
+                data = words[slot + 1]
+                if not data:
+                    replace = slot
+                    break
+                value = (data >> 32) & 0xFF if (data >> 42) & AGE_MASK == age else -1
+                if value < worst_value:
+                    worst_value, replace = value, slot
+            else:
+                if depth < worst_value:
+                    replace = index + BUCKET_WORDS - ENTRY_WORDS  # Always-replace slot
+
+        data = pack_entry(move, score, depth, bound, age, static_eval)
+        words[replace + 1] = data
+        words[replace] = (key ^ data) & MASK64
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def hashfull(self):
+        """Permille of the first 1000 entries written during the current search (UCI 'hashfull')."""
+        words = self.words
+        sample = min(1000, self.bucket_count * BUCKET_ENTRIES)
+        used = 0
+        for entry in range(sample):
+            data = words[entry * ENTRY_WORDS + 1]
+            if data and (data >> 42) & AGE_MASK == self.age:
+                used += 1
+        return used * 1000 // sample
+
+    def stats(self):
+        return {
+            "size_mb": self.size_mb,
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate(),
+            "stores": self.stores,
+            "hashfull": self.hashfull(),
+        }
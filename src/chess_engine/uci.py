@@ -0,0 +1,289 @@
+"""Universal Chess Interface front-end for GameEngine.
+
+    python chess_uci.py            (or python -m src.chess_engine.uci)
+
+Commands are read from stdin on the main thread while searches run on a background
+thread, so 'stop', 'ponderhit' and 'isready' are answered during a search. Nothing
+from the GUI (or PyQt5) is imported here; the model code is only imported once a
+ModelPath option is set.
+"""
+
+import sys
+import threading
+
+from src.chessboard.chessboard import Chessboard
+from src.chess_engine.engine import GameEngine
+from src.chess_engine.movegen import generate_legal_moves, move_to_uci, parse_uci
+from src.chess_engine.profiling import format_snapshot
+from src.chess_engine.search import SearchLimits, MATE_SCORE, MATE_BOUND
+
+ENGINE_NAME = "chess_project"
+ENGINE_AUTHOR = "leucescu"
+
+OPTIONS = (
+    "option name Hash type spin default 16 min 1 max 4096",
+    "option name Threads type spin default 1 min 1 max 256",
+    "option name Ponder type check default false",
+    "option name Move Overhead type spin default 30 min 0 max 5000",
+    "option name ModelPath type string default <empty>",
+    "option name Book type string default <empty>",
+    "option name TablebasePath type string default <empty>",
+    "option name EvalParams type string default <empty>",
+    "option name Profile type check default false",
+)
+
+# 'go' arguments followed by an integer value
+GO_INT_ARGUMENTS = ("depth", "nodes", "movetime", "wtime", "btime", "winc", "binc", "movestogo")
+
+
+def format_score(score):
+    """UCI score field: centipawns, or moves to mate for mate scores."""
+    if score >= MATE_BOUND:
+        return f"mate {(MATE_SCORE - score + 1) // 2}"
+    if score <= -MATE_BOUND:
+        return f"mate -{(MATE_SCORE + score) // 2}"
+    return f"cp {score}"
+
+
+def parse_go(tokens, move_overhead=30):
+    """Turn the arguments of a 'go' command into (SearchLimits, ponder flag)."""
+    values = {}
+    ponder = infinite = False
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token in GO_INT_ARGUMENTS and index + 1 < len(tokens):
+            values[token] = int(tokens[index + 1])
+            index += 1
+        elif token == "infinite":
+            infinite = True
+        elif token == "ponder":
+            ponder = True
+        index += 1
+    return SearchLimits(infinite=infinite, move_overhead=move_overhead, **values), ponder
+
+
+class UCIEngine:
+    def __init__(self, engine=None, output=None):
+        self.engine = engine or GameEngine()
+        self.output = output or sys.stdout
+        self.board = Chessboard()
+        self.ai = None  # ChessAI, created when ModelPath is set
+        self.move_overhead = 30
+        self.search_thread = None
+        self.stop_requested = False  # Set by stop/ponderhit until the next search starts
+        self.pondering = False
+        self.ponder_limits = None  # Real limits of a 'go ponder', searched under on 'ponderhit'
+        self.release = threading.Event()  # Lets an infinite/ponder search report its move
+        self._lock = threading.Lock()
+
+    def send(self, line):
+        with self._lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def handle(self, line):
+        """Process one command line; returns False on 'quit'.
+
+        Bad input (a malformed FEN, a non-numeric value, ...) is reported as an 'info string'
+        and the engine keeps running.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        try:
+            return self._handle(command, args)
+        except Exception as error:
+            self.send(f"info string error in '{line}': {type(error).__name__}: {error}")
+            if command == "go" and self.search_thread is None:
+                self.send("bestmove 0000")  # The GUI waits for an answer to every 'go'
+            return True
+
+    def _handle(self, command, args):
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            for option in OPTIONS:
+                self.send(option)
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.stop_search()
+            self.engine.new_game()
+            self.board = Chessboard()
+        elif command == "setoption":
+            self.set_option(args)
+        elif command == "position":
+            self.stop_search()
+            self.set_position(args)
+        elif command == "go":
+            self.go(args)
+        elif command == "stop":
+            self.stop_search()
+        elif command == "ponderhit":
+            self.ponderhit()
+        elif command == "d":
+            self.send(self.board.to_fen())
+        elif command == "quit":
+            self.stop_search()
+            self.engine.close()
+            return False
+        return True
+
+    def set_option(self, args):
+        # setoption name <name with spaces> [value <value>]
+        if "name" not in args:
+            return
+        if "value" in args:
+            split = args.index("value")
+            name, value = " ".join(args[args.index("name") + 1:split]), " ".join(args[split + 1:])
+        else:
+            name, value = " ".join(args[args.index("name") + 1:]), ""
+        name = name.lower()
+        if name == "hash":
+            self.engine.set_hash_size(max(1, int(value)))
+        elif name == "threads":
+            self.engine.set_threads(max(1, int(value)))
+        elif name == "move overhead":
+            self.move_overhead = max(0, int(value))
+        elif name == "book":
+            self.engine.set_book(value if value and value != "<empty>" else None)
+        elif name == "tablebasepath":
+            self.engine.set_tablebase(value if value and value != "<empty>" else None)
+        elif name == "profile":
+            self.engine.set_profiling(value.lower() == "true")
+        elif name == "evalparams":
+            if value and value != "<empty>":
+                from src.tuning.tuner import load_weights  # Weights file written by the tuner
+                self.engine.set_evaluation_parameters(load_weights(value))
+            else:
+                self.engine.set_evaluator(None)
+        elif name == "modelpath":
+            if value and value != "<empty>":
+                from models.models import ChessAI  # Imported on demand: pulls in the model stack
+                self.ai = ChessAI(value, engine=self.engine, warm_up=True)  # Loads while we wait for 'go'
+            else:
+                self.ai = None
+
+    def set_position(self, args):
+        # position (startpos | fen <fen fields>) [moves <uci moves>]
+        board = Chessboard()
+        moves = []
+        if "moves" in args:
+            split = args.index("moves")
+            args, moves = args[:split], args[split + 1:]
+        if args and args[0] == "fen":
+            fields = args[1:]
+            if len(fields) == 4:
+                fields += ["0", "1"]  # EPD-style FEN without the move clocks
+            board.update_from_fen(" ".join(fields))
+        for text in moves:
+            move = parse_uci(board, text)
+            if move is None:
+                self.send(f"info string illegal move {text}")
+                break
+            board.make(move)
+        self.board = board
+
+    def go(self, args):
+        self.stop_search()
+        limits, ponder = parse_go(args, self.move_overhead)
+        self.pondering = ponder
+        self.ponder_limits = limits if ponder else None
+        if ponder:
+            limits = SearchLimits(infinite=True, move_overhead=self.move_overhead)
+        self._start(limits)
+
+    def _start(self, limits):
+        self.stop_requested = False
+        self.release.clear()
+        if not limits.infinite:
+            self.release.set()
+        self.search_thread = threading.Thread(target=self._search, args=(self.board.copy(), limits), daemon=True)
+        self.search_thread.start()
+
+    def _search(self, board, limits):
+        try:
+            move, pv = self._find_move(board, limits)
+        except Exception as error:  # A GUI waits for bestmove whatever happens
+            self.send(f"info string error {type(error).__name__}: {error}")
+            move, pv = 0, []
+        # UCI forbids reporting a move during 'go infinite' or 'go ponder' before stop/ponderhit
+        self.release.wait()
+        if threading.current_thread() is not self.search_thread:
+            return  # A ponder search replaced on 'ponderhit'
+        if not move:
+            self.send("bestmove 0000")
+        elif len(pv) > 1 and pv[0] == move:
+            self.send(f"bestmove {move_to_uci(move)} ponder {move_to_uci(pv[1])}")
+        else:
+            self.send(f"bestmove {move_to_uci(move)}")
+
+    def _find_move(self, board, limits):
+        """(move, pv) from the book, the model or a search; move is 0 without legal moves."""
+        book_move = None if limits.infinite else self.engine.book_move(board)
+        if book_move:
+            return book_move, [book_move]
+        if self.ai is not None and self.ai.model is not None and not limits.infinite:
+            squares = self.ai.predict_move(board)
+            if squares is None:
+                return 0, []
+            start, end = squares
+            move = next(move for move in generate_legal_moves(board) if move & 63 == start and (move >> 6) & 63 == end)
+            return move, [move]
+        result = self.engine.search(board, limits, self._info)
+        return result.best_move, result.pv
+
+    def _info(self, info):
+        if self.stop_requested:
+            self.engine.stop()  # The stop came before the search cleared its stop flag
+        self.send(f"info depth {info['depth']} score {format_score(info['score'])} nodes {info['nodes']} "
+                  f"nps {info['nps']} time {info['time']} hashfull {info['hashfull']} tbhits {info['tbhits']} "
+                  f"pv {' '.join(info['pv'])}")
+        if "profile" in info:
+            self.send(f"info string profile {format_snapshot(info['profile'])}")
+
+    def ponderhit(self):
+        """The opponent played the expected move: search on under all the limits of the 'go ponder'.
+
+        The ponder search is stopped without a bestmove and a new one started under the real
+        limits (time, depth, nodes); what it found stays in the transposition table.
+        """
+        if not self.pondering:
+            return
+        self.pondering = False
+        if self.ponder_limits.infinite:
+            return  # 'go ponder infinite' keeps searching until 'stop'
+        ponder_thread, self.search_thread = self.search_thread, None
+        self.stop_requested = True
+        self.engine.stop()
+        self.release.set()
+        ponder_thread.join()
+        self._start(self.ponder_limits)
+
+    def stop_search(self):
+        """Stop a running search and wait for its bestmove line."""
+        if self.search_thread is not None:
+            self.stop_requested = True
+            self.engine.stop()
+            self.release.set()
+            self.search_thread.join()
+            self.search_thread = None
+        self.pondering = False
+
+    def loop(self, stream=None):
+        stream = stream or sys.stdin
+        for line in stream:
+            if not self.handle(line.strip()):
+                break
+
+
+def main(argv=None):
+    UCIEngine().loop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,82 +1,386 @@
-import numpy as np
+from src.chessboard.zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EP_FILE_KEYS, compute_key
+
+# Piece order shared by the bitboards, the tensor channels and the FEN symbols
+PIECE_SYMBOLS = "PNBRQKpnbrqk"
+PIECE_INDEX = {symbol: idx for idx, symbol in enumerate(PIECE_SYMBOLS)}
+BITBOARD_NAMES = [
+    "white_pawns", "white_knights", "white_bishops", "white_rooks", "white_queens", "white_kings",
+    "black_pawns", "black_knights", "black_bishops", "black_rooks", "black_queens", "black_kings",
+]
+
+WHITE, BLACK = 0, 1
+
+# Castling rights are stored as a 4-bit mask
+CASTLE_WHITE_KINGSIDE, CASTLE_WHITE_QUEENSIDE, CASTLE_BLACK_KINGSIDE, CASTLE_BLACK_QUEENSIDE = 1, 2, 4, 8
+CASTLING_SYMBOLS = "KQkq"
+FILES = "abcdefgh"
+
+# Moves are ints packing ``from | to << 6 | flag << 12``; promotions store the new piece type as flag - 3
+FLAG_NONE = 0
+FLAG_DOUBLE_PUSH = 1
+FLAG_CASTLE = 2
+FLAG_EN_PASSANT = 3
+FLAG_PROMO_KNIGHT = 4
+FLAG_PROMO_BISHOP = 5
+FLAG_PROMO_ROOK = 6
+FLAG_PROMO_QUEEN = 7
+PROMOTION_FLAG_BY_SYMBOL = {"n": FLAG_PROMO_KNIGHT, "b": FLAG_PROMO_BISHOP, "r": FLAG_PROMO_ROOK, "q": FLAG_PROMO_QUEEN}
+
+# Rights that survive a move touching each square (rook and king home squares clear rights)
+CASTLING_MASK = [0xF] * 64
+CASTLING_MASK[0] = 0xF & ~CASTLE_BLACK_QUEENSIDE
+CASTLING_MASK[4] = 0xF & ~(CASTLE_BLACK_KINGSIDE | CASTLE_BLACK_QUEENSIDE)
+CASTLING_MASK[7] = 0xF & ~CASTLE_BLACK_KINGSIDE
+CASTLING_MASK[56] = 0xF & ~CASTLE_WHITE_QUEENSIDE
+CASTLING_MASK[60] = 0xF & ~(CASTLE_WHITE_KINGSIDE | CASTLE_WHITE_QUEENSIDE)
+CASTLING_MASK[63] = 0xF & ~CASTLE_WHITE_KINGSIDE
+
+# King destination -> (rook from, rook to)
+CASTLING_ROOK_SQUARES = {62: (63, 61), 58: (56, 59), 6: (7, 5), 2: (0, 3)}
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+def parse_castling(rights):
+    """Castling-rights mask of a FEN castling field such as 'KQkq' or '-'."""
+    mask = 0
+    for bit, symbol in enumerate(CASTLING_SYMBOLS):
+        if symbol in rights:
+            mask |= 1 << bit
+    return mask
+
+
+def square_name(index):
+    """Algebraic name of a square index, e.g. 0 -> 'a8', 63 -> 'h1'."""
+    return FILES[index % 8] + str(8 - index // 8)
+
+
+def square_index(name):
+    """Square index of an algebraic square name, e.g. 'e4' -> 36."""
+    return (8 - int(name[1])) * 8 + FILES.index(name[0])
+
 
 class Chessboard:
-    def __init__(self, player_side):
-        """1D list representation of the chessboard."""
+    def __init__(self, player_side="white"):
+        """Bitboard representation of the chessboard.
+
+        Square indices follow FEN order: index 0 is a8, index 7 is h8 and index 63 is h1.
+        Bit ``1 << index`` of a bitboard is set when the square is occupied. The board is
+        always stored from white's point of view; ``player_side`` only records the
+        orientation a front-end should use when drawing it.
+        """
+        self.player_side = player_side
         self.init_board(player_side)
-        self.to_move = "white"
-        self.castling_rights = "KQkq"  # Both sides can castle kingside and queenside
-        self.en_passant = "-"  # No en passant target square initially
+        self.side = WHITE
+        self.castling = parse_castling("KQkq")  # Both sides can castle kingside and queenside
+        self.ep_square = -1  # No en passant target square initially
         self.halfmove_clock = 0  # Halfmove clock for the 50-move rule
         self.fullmove_number = 1  # Fullmove number starts at 1
+        self.history = []  # Undo records pushed by make()
+        self.key = self.compute_key()  # 64-bit Zobrist key, kept up to date by make()/unmake()
 
     def init_board(self, player_side):
-        board = [
-            'r', 'n', 'b', 'q', 'k', 'b', 'n', 'r',   # Rank 8
-            'p', 'p', 'p', 'p', 'p', 'p', 'p', 'p',   # Rank 7
-            '.', '.', '.', '.', '.', '.', '.', '.',   # Rank 6
-            '.', '.', '.', '.', '.', '.', '.', '.',   # Rank 5
-            '.', '.', '.', '.', '.', '.', '.', '.',   # Rank 4
-            '.', '.', '.', '.', '.', '.', '.', '.',   # Rank 3
-            'P', 'P', 'P', 'P', 'P', 'P', 'P', 'P',   # Rank 2
-            'R', 'N', 'B', 'Q', 'K', 'B', 'N', 'R'    # Rank 1
-        ]
-        if player_side == "white":
-            self.board = board
-        else:
-            self.board = board[::-1]
+        self.player_side = player_side
+        self._set_placement(START_FEN.split()[0])
+
+    def _set_placement(self, piece_placement):
+        """Rebuild all bitboards from the piece placement field of a FEN string."""
+        self.bitboards = [0] * 12  # One bitboard per piece, in PIECE_SYMBOLS order
+        index = 0
+        for char in piece_placement:
+            if char == "/":
+                continue
+            if char.isdigit():
+                index += int(char)  # Empty squares
+            else:
+                self.bitboards[PIECE_INDEX[char]] |= 1 << index
+                index += 1
+        self._update_occupancy()
+
+    def _update_occupancy(self):
+        """Recompute the per-colour and combined occupancy masks from the piece bitboards."""
+        bbs = self.bitboards
+        white = bbs[0] | bbs[1] | bbs[2] | bbs[3] | bbs[4] | bbs[5]
+        black = bbs[6] | bbs[7] | bbs[8] | bbs[9] | bbs[10] | bbs[11]
+        self.occupancy = [white, black]
+        self.occupied = white | black
+
+    @property
+    def to_move(self):
+        return "white" if self.side == WHITE else "black"
+
+    @to_move.setter
+    def to_move(self, color):
+        self.side = WHITE if color == "white" else BLACK
+        self.key = self.compute_key()
+
+    @property
+    def castling_rights(self):
+        rights = "".join(symbol for bit, symbol in enumerate(CASTLING_SYMBOLS) if self.castling & (1 << bit))
+        return rights or "-"
+
+    @castling_rights.setter
+    def castling_rights(self, rights):
+        self.castling = parse_castling(rights)
+        self.key = self.compute_key()
+
+    @property
+    def en_passant(self):
+        return square_name(self.ep_square) if self.ep_square >= 0 else "-"
+
+    @en_passant.setter
+    def en_passant(self, square):
+        self.ep_square = square_index(square) if square != "-" else -1
+        self.key = self.compute_key()
+
+    def compute_key(self):
+        """Recompute the Zobrist key from scratch (for loading positions and verifying the incremental key)."""
+        return compute_key(self.bitboards, self.side, self.castling, self.ep_square)
+
+    def is_repetition(self, count=2):
+        """True if the current position occurred count times in total, counting the current one.
+
+        Only positions since the last capture or pawn move can repeat, so the scan is bounded
+        by the halfmove clock and compares keys only.
+        """
+        key = self.key
+        seen = 1
+        history = self.history
+        # Undo records hold the key before each move; same side to move means every second record
+        for ply in range(2, min(self.halfmove_clock, len(history)) + 1, 2):
+            if history[-ply][6] == key:
+                seen += 1
+                if seen >= count:
+                    return True
+        return False
+
+    @property
+    def own_pieces(self):
+        """Occupancy mask of the side to move."""
+        return self.occupancy[self.side]
+
+    @property
+    def enemy_pieces(self):
+        """Occupancy mask of the side not to move."""
+        return self.occupancy[self.side ^ 1]
+
+    @property
+    def board(self):
+        """1D list view of the board, derived from the bitboards on demand."""
+        board = ["."] * 64
+        for piece, bitboard in enumerate(self.bitboards):
+            symbol = PIECE_SYMBOLS[piece]
+            while bitboard:
+                lsb = bitboard & -bitboard
+                board[lsb.bit_length() - 1] = symbol
+                bitboard ^= lsb
+        return board
 
     def print_board(self):
         """Print the current board state."""
+        board = self.board
         for rank in range(8):
-            print(self.board[rank * 8:(rank + 1) * 8])
+            print(board[rank * 8:(rank + 1) * 8])
 
-    def make_move(self, start_index, end_index):
+    def piece_at(self, index):
+        """Return the piece index (0-11) on the given square, or -1 if it is empty."""
+        bit = 1 << index
+        if not self.occupied & bit:
+            return -1
+        bbs = self.bitboards
+        first = 0 if self.occupancy[0] & bit else 6
+        for piece in range(first, first + 6):
+            if bbs[piece] & bit:
+                return piece
+        return -1
+
+    def make_move(self, start_index, end_index, promotion="q"):
         """Move piece from start_index to end_index."""
-        self.board[end_index] = self.board[start_index]
-        self.board[start_index] = "."
+        piece = self.piece_at(start_index)
+        if piece < 0:
+            return
+        flag = FLAG_NONE
+        piece_type = piece % 6
+        if piece_type == 0:
+            if abs(end_index - start_index) == 16:
+                flag = FLAG_DOUBLE_PUSH
+            elif end_index == self.ep_square and (end_index - start_index) % 8:
+                flag = FLAG_EN_PASSANT
+            elif end_index < 8 or end_index >= 56:
+                flag = PROMOTION_FLAG_BY_SYMBOL[promotion]
+        elif piece_type == 5 and abs(end_index - start_index) == 2:
+            flag = FLAG_CASTLE
+        self.make(start_index | (end_index << 6) | (flag << 12))
+
+    def make(self, move):
+        """Play an encoded move in place and push an undo record for unmake()."""
+        bbs = self.bitboards
+        occupancy = self.occupancy
+        us = self.side
+        them = us ^ 1
+        start = move & 63
+        end = (move >> 6) & 63
+        flag = move >> 12
+        start_bit = 1 << start
+        end_bit = 1 << end
+
+        piece = 6 * us
+        while not bbs[piece] & start_bit:
+            piece += 1
+        key = self.key
+        captured = -1
+        if occupancy[them] & end_bit:
+            captured = 6 * them
+            while not bbs[captured] & end_bit:
+                captured += 1
+            bbs[captured] ^= end_bit
+            occupancy[them] ^= end_bit
+            key ^= PIECE_KEYS[captured][end]
+
+        self.history.append((move, piece, captured, self.castling, self.ep_square, self.halfmove_clock, self.key))
+
+        bbs[piece] ^= start_bit | end_bit
+        occupancy[us] ^= start_bit | end_bit
+        piece_keys = PIECE_KEYS[piece]
+        key ^= piece_keys[start] ^ piece_keys[end]
+        if flag:
+            if flag == FLAG_EN_PASSANT:
+                captured_sq = end + 8 if us == WHITE else end - 8
+                bbs[6 * them] ^= 1 << captured_sq
+                occupancy[them] ^= 1 << captured_sq
+                key ^= PIECE_KEYS[6 * them][captured_sq]
+            elif flag == FLAG_CASTLE:
+                rook_from, rook_to = CASTLING_ROOK_SQUARES[end]
+                rook_bits = (1 << rook_from) | (1 << rook_to)
+                bbs[6 * us + 3] ^= rook_bits
+                occupancy[us] ^= rook_bits
+                key ^= PIECE_KEYS[6 * us + 3][rook_from] ^ PIECE_KEYS[6 * us + 3][rook_to]
+            elif flag >= FLAG_PROMO_KNIGHT:
+                promoted = 6 * us + flag - 3
+                bbs[piece] ^= end_bit
+                bbs[promoted] ^= end_bit
+                key ^= piece_keys[end] ^ PIECE_KEYS[promoted][end]
+        self.occupied = occupancy[0] | occupancy[1]
+
+        castling = self.castling
+        if castling:
+            new_castling = castling & CASTLING_MASK[start] & CASTLING_MASK[end]
+            if new_castling != castling:
+                key ^= CASTLING_KEYS[castling] ^ CASTLING_KEYS[new_castling]
+                self.castling = new_castling
+        if self.ep_square >= 0:
+            key ^= EP_FILE_KEYS[self.ep_square & 7]
+        if flag == FLAG_DOUBLE_PUSH:
+            self.ep_square = (start + end) >> 1
+            key ^= EP_FILE_KEYS[start & 7]
+        else:
+            self.ep_square = -1
+        self.key = key ^ SIDE_KEY
+        if piece == 6 * us or captured >= 0:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if us == BLACK:
+            self.fullmove_number += 1
+        self.side = them
+
+    def unmake(self):
+        """Take back the last move played with make() and return it."""
+        move, piece, captured, castling, ep_square, halfmove_clock, key = self.history.pop()
+        bbs = self.bitboards
+        occupancy = self.occupancy
+        them = self.side
+        us = them ^ 1
+        start = move & 63
+        end = (move >> 6) & 63
+        flag = move >> 12
+        start_bit = 1 << start
+        end_bit = 1 << end
+
+        if flag:
+            if flag == FLAG_EN_PASSANT:
+                captured_bit = end_bit << 8 if us == WHITE else end_bit >> 8
+                bbs[6 * them] ^= captured_bit
+                occupancy[them] ^= captured_bit
+            elif flag == FLAG_CASTLE:
+                rook_from, rook_to = CASTLING_ROOK_SQUARES[end]
+                rook_bits = (1 << rook_from) | (1 << rook_to)
+                bbs[6 * us + 3] ^= rook_bits
+                occupancy[us] ^= rook_bits
+            elif flag >= FLAG_PROMO_KNIGHT:
+                bbs[6 * us + flag - 3] ^= end_bit
+                bbs[piece] ^= end_bit
+        bbs[piece] ^= start_bit | end_bit
+        occupancy[us] ^= start_bit | end_bit
+        if captured >= 0:
+            bbs[captured] ^= end_bit
+            occupancy[them] ^= end_bit
+        self.occupied = occupancy[0] | occupancy[1]
+
+        self.castling = castling
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        self.key = key
+        if us == BLACK:
+            self.fullmove_number -= 1
+        self.side = us
+        return move
+
+    def make_null(self):
+        """Pass the turn without moving (null-move pruning); undo with unmake_null()."""
+        self.history.append((0, -1, -1, self.castling, self.ep_square, self.halfmove_clock, self.key))
+        key = self.key ^ SIDE_KEY
+        if self.ep_square >= 0:
+            key ^= EP_FILE_KEYS[self.ep_square & 7]
+            self.ep_square = -1
+        self.key = key
+        self.halfmove_clock = 0  # Repetitions must not be matched across a null move
+        self.side ^= 1
+
+    def unmake_null(self):
+        _, _, _, _, ep_square, halfmove_clock, key = self.history.pop()
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        self.key = key
+        self.side ^= 1
 
     def get_square(self, index):
         """Get the piece at the given index."""
-        return self.board[index]
+        piece = self.piece_at(index)
+        return PIECE_SYMBOLS[piece] if piece >= 0 else "."
+
+    def copy(self):
+        """Return an independent copy of the position."""
+        board = Chessboard.__new__(Chessboard)
+        board.__dict__.update(self.__dict__)
+        board.bitboards = self.bitboards[:]
+        board.occupancy = self.occupancy[:]
+        board.history = self.history[:]
+        return board
 
     def to_tensor(self):
         """Convert the board to an 8x8x12 tensor for neural networks."""
-        tensor = np.zeros((12, 8, 8))
-        piece_map = {"P": 0, "N": 1, "B": 2, "R": 3, "Q": 4, "K": 5, 
-                     "p": 6, "n": 7, "b": 8, "r": 9, "q": 10, "k": 11}
-        
-        for idx, piece in enumerate(self.board):
-            if piece != ".":
-                row, col = divmod(idx, 8)  # Convert 1D index to row, col
-                channel = piece_map[piece]
-                tensor[channel, row, col] = 1
-        
-        return tensor
+        import numpy as np  # Deferred: only tensor users pay for importing NumPy
+        # Each bitboard unpacks to 64 bits in square order, which is already row-major (rank 8 first)
+        raw = np.array(self.bitboards, dtype="<u8").view(np.uint8)
+        bits = np.unpackbits(raw, bitorder="little")
+        return bits.reshape(12, 8, 8).astype(np.float64)
 
     def to_bitboards(self):
         """Convert the board to bitboards (for MCTS or genetic algorithms)."""
-        bitboards = {"white_pawns": 0, "black_pawns": 0, "white_rooks": 0, "black_rooks": 0}
-        for idx, piece in enumerate(self.board):
-            bit = 1 << idx  # Convert index to a bitmask
-            if piece == "P":
-                bitboards["white_pawns"] |= bit
-            elif piece == "p":
-                bitboards["black_pawns"] |= bit
-            elif piece == "R":
-                bitboards["white_rooks"] |= bit
-            elif piece == "r":
-                bitboards["black_rooks"] |= bit
+        bitboards = dict(zip(BITBOARD_NAMES, self.bitboards))
+        bitboards["white_pieces"], bitboards["black_pieces"] = self.occupancy
+        bitboards["occupied"] = self.occupied
         return bitboards
-    
+
     def to_fen(self):
         """Convert the board state to a FEN string."""
+        board = self.board
         fen_rows = []
         for rank in range(8):
             empty_squares = 0
             row_str = ""
             for file in range(8):
-                piece = self.board[rank * 8 + file]
+                piece = board[rank * 8 + file]
                 if piece == ".":
                     empty_squares += 1
                 else:
@@ -87,28 +391,36 @@ class Chessboard:
             if empty_squares > 0:
                 row_str += str(empty_squares)
             fen_rows.append(row_str)
-        
+
         piece_placement = "/".join(fen_rows)
         active_color = "w" if self.to_move == "white" else "b"
         return f"{piece_placement} {active_color} {self.castling_rights} {self.en_passant} {self.halfmove_clock} {self.fullmove_number}"
-    
+
     def update_from_fen(self, fen):
         """Update the board from a FEN string."""
         fen_parts = fen.split()
         piece_placement, active_color, castling_rights, en_passant, halfmove_clock, fullmove_number = fen_parts
 
         # Update board pieces
-        self.board = []
-        for rank in piece_placement.split("/"):
-            for char in rank:
-                if char.isdigit():
-                    self.board.extend(["."] * int(char))  # Empty squares
-                else:
-                    self.board.append(char)
+        self._set_placement(piece_placement)
 
         # Update turn, castling rights, en passant, and clocks
-        self.to_move = "white" if active_color == "w" else "black"
-        self.castling_rights = castling_rights
-        self.en_passant = en_passant
+        self.side = WHITE if active_color == "w" else BLACK
+        self.castling = parse_castling(castling_rights)
+        self.ep_square = square_index(en_passant) if en_passant != "-" else -1
+        self.halfmove_clock = int(halfmove_clock)
+        self.fullmove_number = int(fullmove_number)
+        self.history = []
+        self.key = self.compute_key()
+
+    def set_position(self, bitboards, side, castling, ep_square, halfmove_clock=0, fullmove_number=1):
+        """Load a position from its twelve piece bitboards and state fields (see encoding.py)."""
+        self.bitboards = [int(bitboard) for bitboard in bitboards]
+        self._update_occupancy()
+        self.side = int(side)
+        self.castling = int(castling)
+        self.ep_square = int(ep_square)
         self.halfmove_clock = int(halfmove_clock)
         self.fullmove_number = int(fullmove_number)
+        self.history = []
+        self.key = self.compute_key()
@@ -0,0 +1,229 @@
+"""Vectorized position encodings for batches of boards.
+
+Two array formats hold many positions at once:
+
+- packed: an (N, 13) uint64 array of the twelve piece bitboards plus one state word
+  (see pack_state). Cheap to build from a Chessboard and to turn into network input.
+- compact: an (N,) COMPACT_DTYPE array of 32-byte records, for storing positions in bulk
+  (FEN strings take 60+ bytes and are slow to parse):
+
+      occupied  u64       occupancy mask, bit i = square i (0 = a8)
+      pieces    16 bytes  one 4-bit piece number (0-11, PIECE_SYMBOLS order) per occupied
+                          square in ascending square order, low nibble first
+      state     u8        side to move | castling mask << 1
+      ep        u8        en passant square + 1 (0 for none)
+      halfmove  u8        halfmove clock (capped at 255)
+      fullmove  u16       fullmove number
+      reserved  3 bytes   zero
+
+pack_compact/unpack_compact convert between the two without per-square Python loops, and
+compact_keys computes the Zobrist keys (equal to Chessboard.key) of a compact batch.
+"""
+
+import numpy as np
+
+from src.chessboard.chessboard import Chessboard
+from src.chessboard.zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EP_FILE_KEYS
+
+PIECE_PLANES = 12
+# Optional planes appended after the twelve piece planes when extra_planes=True
+EXTRA_PLANE_NAMES = ["white_to_move", "castle_K", "castle_Q", "castle_k", "castle_q", "en_passant"]
+STATE_COLUMN = 12  # Packed positions: twelve bitboards plus one state word
+MAX_PIECES = 32  # Pieces a compact record can hold
+
+COMPACT_DTYPE = np.dtype([
+    ("occupied", "<u8"), ("pieces", "u1", (MAX_PIECES // 2,)), ("state", "u1"), ("ep", "u1"),
+    ("halfmove", "u1"), ("fullmove", "<u2"), ("reserved", "u1", (3,)),
+])  # 32 bytes, unaligned
+
+_PIECE_KEYS = np.array(PIECE_KEYS, dtype=np.uint64)  # [piece][square]
+_CASTLING_KEYS = np.array(CASTLING_KEYS, dtype=np.uint64)
+_EP_FILE_KEYS = np.array(EP_FILE_KEYS, dtype=np.uint64)
+
+
+def pack_state(side, castling, ep_square):
+    """State word of a packed position: side to move, castling mask and en passant square (+1)."""
+    return side | (castling << 1) | ((ep_square + 1) << 5)
+
+
+def pack_board(board):
+    """One packed position (13 uint64 words) for a Chessboard."""
+    return board.bitboards + [pack_state(board.side, board.castling, board.ep_square)]
+
+
+def to_packed(positions):
+    """Convert Chessboards, FEN strings, a compact array or an existing packed array to an
+    (N, 13) uint64 array.
+
+    An (N, 12) array of bare bitboards is accepted too and treated as white to move with no
+    castling rights or en passant square.
+    """
+    if isinstance(positions, np.ndarray) and positions.dtype == COMPACT_DTYPE:
+        return unpack_compact(positions)
+    if isinstance(positions, np.ndarray):
+        if positions.ndim != 2 or positions.shape[1] not in (PIECE_PLANES, PIECE_PLANES + 1):
+            raise ValueError(f"expected an (N, 12) or (N, 13) array of positions, got shape {positions.shape}")
+        if positions.shape[1] == PIECE_PLANES + 1:
+            return positions.astype(np.uint64, copy=False)
+        packed = np.zeros((len(positions), PIECE_PLANES + 1), dtype=np.uint64)
+        packed[:, :PIECE_PLANES] = positions
+        packed[:, STATE_COLUMN] = pack_state(0, 0, -1)
+        return packed
+
+    rows = []
+    scratch = None
+    for position in positions:
+        if isinstance(position, str):
+            if scratch is None:
+                scratch = Chessboard()
+            scratch.update_from_fen(position)
+            position = scratch
+        rows.append(pack_board(position))
+    return np.array(rows, dtype=np.uint64).reshape(len(rows), PIECE_PLANES + 1)
+
+
+def _square_bits(words):
+    """(N, 64) uint8 array of the bits of N uint64 words, square 0 first."""
+    raw = np.ascontiguousarray(words, dtype="<u8").view(np.uint8).reshape(len(words), 8)
+    return np.unpackbits(raw, axis=-1, bitorder="little")
+
+
+def _bits_to_words(bits):
+    """Inverse of _square_bits for an (..., 64) array of bits."""
+    return np.packbits(bits, axis=-1, bitorder="little").view("<u8")[..., 0]
+
+
+def _clocks(positions):
+    """(halfmove, fullmove) lists of Chessboards or FEN strings."""
+    halfmove, fullmove = [], []
+    for position in positions:
+        if isinstance(position, str):
+            fields = position.split()
+            halfmove.append(int(fields[4]) if len(fields) > 4 else 0)
+            fullmove.append(int(fields[5]) if len(fields) > 5 else 1)
+        else:
+            halfmove.append(position.halfmove_clock)
+            fullmove.append(position.fullmove_number)
+    return halfmove, fullmove
+
+
+def pack_compact(positions, halfmove=0, fullmove=1):
+    """Convert anything to_packed accepts to an (N,) COMPACT_DTYPE array.
+
+    Chessboards and FEN strings keep their clocks; for arrays, halfmove and fullmove (scalars
+    or length-N sequences) fill them in. Raises ValueError for positions with more than 32 pieces.
+    """
+    if not isinstance(positions, np.ndarray):
+        positions = list(positions)
+        halfmove, fullmove = _clocks(positions)
+    elif positions.dtype == COMPACT_DTYPE:
+        return positions
+    packed = to_packed(positions)
+    count = len(packed)
+    bits = _square_bits(packed[:, :PIECE_PLANES].reshape(-1)).reshape(count, PIECE_PLANES, 64)
+    occupied = bits.any(axis=1)
+    if count and occupied.sum(axis=1).max() > MAX_PIECES:
+        raise ValueError(f"a compact position holds at most {MAX_PIECES} pieces")
+    # Slot of each occupied square = number of occupied squares before it
+    rows, squares = np.nonzero(occupied)
+    slots = np.zeros((count, MAX_PIECES), dtype=np.uint8)
+    slots[rows, np.cumsum(occupied, axis=1, dtype=np.int64)[rows, squares] - 1] = bits[rows, :, squares].argmax(axis=1)
+
+    compact = np.zeros(count, dtype=COMPACT_DTYPE)
+    compact["occupied"] = _bits_to_words(occupied.astype(np.uint8))
+    compact["pieces"] = slots[:, 0::2] | (slots[:, 1::2] << 4)
+    state = packed[:, STATE_COLUMN]
+    compact["state"] = state & np.uint64(31)
+    compact["ep"] = state >> np.uint64(5)
+    compact["halfmove"] = np.minimum(halfmove, 255)
+    compact["fullmove"] = fullmove
+    return compact
+
+
+def _compact_squares(compact):
+    """(rows, slots, squares, pieces) of every piece of a compact array."""
+    occupied = _square_bits(compact["occupied"])
+    nibbles = np.empty((len(compact), MAX_PIECES), dtype=np.uint8)
+    nibbles[:, 0::2] = compact["pieces"] & 15
+    nibbles[:, 1::2] = compact["pieces"] >> 4
+    rows, squares = np.nonzero(occupied)
+    slots = np.cumsum(occupied, axis=1, dtype=np.int64)[rows, squares] - 1
+    return rows, slots, squares, nibbles[rows, slots]
+
+
+def unpack_compact(compact):
+    """(N, 13) packed uint64 array of a compact array (the clocks are dropped)."""
+    count = len(compact)
+    rows, _, squares, pieces = _compact_squares(compact)
+    bits = np.zeros((count, PIECE_PLANES, 64), dtype=np.uint8)
+    bits[rows, pieces, squares] = 1
+    packed = np.empty((count, PIECE_PLANES + 1), dtype=np.uint64)
+    packed[:, :PIECE_PLANES] = _bits_to_words(bits)
+    packed[:, STATE_COLUMN] = compact["state"].astype(np.uint64) | (compact["ep"].astype(np.uint64) << np.uint64(5))
+    return packed
+
+
+def compact_keys(compact):
+    """Zobrist keys (as Chessboard.key) of a compact array: (N,) uint64."""
+    rows, slots, squares, pieces = _compact_squares(compact)
+    piece_keys = np.zeros((len(compact), MAX_PIECES), dtype=np.uint64)
+    piece_keys[rows, slots] = _PIECE_KEYS[pieces, squares]
+    keys = np.bitwise_xor.reduce(piece_keys, axis=1)
+    state = compact["state"]
+    keys[(state & 1) == 1] ^= np.uint64(SIDE_KEY)
+    keys ^= _CASTLING_KEYS[state >> 1]
+    has_ep = compact["ep"] > 0
+    keys[has_ep] ^= _EP_FILE_KEYS[(compact["ep"][has_ep] - 1) & 7]
+    return keys
+
+
+def compact_board(record, board=None):
+    """Load one compact record into board (a new Chessboard by default) and return it."""
+    board = board if board is not None else Chessboard()
+    packed = unpack_compact(np.asarray(record, dtype=COMPACT_DTYPE).reshape(1))[0]
+    state = int(record["state"])
+    board.set_position(packed[:PIECE_PLANES], state & 1, state >> 1, int(record["ep"]) - 1,
+                       int(record["halfmove"]), int(record["fullmove"]))
+    return board
+
+
+def plane_count(extra_planes=False):
+    return PIECE_PLANES + (len(EXTRA_PLANE_NAMES) if extra_planes else 0)
+
+
+def encode_batch(positions, dtype=np.float32, extra_planes=False, out=None):
+    """Encode N positions into one (N, planes, 8, 8) array without any per-square Python loop.
+
+    positions may be Chessboards, FEN strings, a packed uint64 array or a compact array
+    (see to_packed).
+    Planes 0-11 follow Chessboard.to_tensor(); with extra_planes, six more planes give
+    the side to move, the four castling rights and the en passant square. Pass a
+    preallocated out array (e.g. a slice of a training buffer) to avoid allocating.
+    """
+    packed = to_packed(positions)
+    count = len(packed)
+    planes = plane_count(extra_planes)
+    if out is None:
+        out = np.empty((count, planes, 8, 8), dtype=dtype)
+    elif out.shape != (count, planes, 8, 8):
+        raise ValueError(f"out has shape {out.shape}, expected {(count, planes, 8, 8)}")
+
+    # Little-endian bytes unpacked LSB first give the 64 squares in index order (a8 first)
+    raw = np.ascontiguousarray(packed[:, :PIECE_PLANES], dtype="<u8").view(np.uint8)
+    bits = np.unpackbits(raw.reshape(count, PIECE_PLANES, 8), axis=-1, bitorder="little")
+    out[:, :PIECE_PLANES] = bits.reshape(count, PIECE_PLANES, 8, 8)
+
+    if extra_planes:
+        state = packed[:, STATE_COLUMN]
+        side = (state & np.uint64(1)).astype(np.uint8)
+        out[:, PIECE_PLANES] = (1 - side)[:, None, None]
+        for bit in range(4):
+            rights = ((state >> np.uint64(1 + bit)) & np.uint64(1)).astype(np.uint8)
+            out[:, PIECE_PLANES + 1 + bit] = rights[:, None, None]
+        ep_plane = out[:, PIECE_PLANES + 5]
+        ep_plane[...] = 0
+        ep_square = (state >> np.uint64(5)).astype(np.int64) - 1
+        has_ep = np.nonzero(ep_square >= 0)[0]
+        ep_plane[has_ep, ep_square[has_ep] // 8, ep_square[has_ep] % 8] = 1
+
+    return out
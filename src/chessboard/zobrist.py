@@ -0,0 +1,27 @@
+import random
+
+# Fixed seed so keys are stable across processes and runs (books, caches and datasets store them)
+_rng = random.Random(0x5EED_C4E55)
+
+PIECE_KEYS = [[_rng.getrandbits(64) for _ in range(64)] for _ in range(12)]  # [piece][square]
+SIDE_KEY = _rng.getrandbits(64)  # Mixed in when black is to move
+CASTLING_KEYS = [_rng.getrandbits(64) for _ in range(16)]  # One key per castling-rights mask
+EP_FILE_KEYS = [_rng.getrandbits(64) for _ in range(8)]  # En passant file, when an ep square is set
+CASTLING_KEYS[0] = 0  # No rights contributes nothing, so a bare position hashes to its pieces only
+
+
+def compute_key(bitboards, side, castling, ep_square):
+    """Full Zobrist key recompute, used when loading a position and to verify the incremental key."""
+    key = 0
+    for piece, bitboard in enumerate(bitboards):
+        piece_keys = PIECE_KEYS[piece]
+        while bitboard:
+            lsb = bitboard & -bitboard
+            key ^= piece_keys[lsb.bit_length() - 1]
+            bitboard ^= lsb
+    if side:
+        key ^= SIDE_KEY
+    key ^= CASTLING_KEYS[castling]
+    if ep_square >= 0:
+        key ^= EP_FILE_KEYS[ep_square & 7]
+    return key
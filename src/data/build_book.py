@@ -0,0 +1,108 @@
+"""Build an opening book (see src/chess_engine/book.py) from PGN collections.
+
+    python -m src.data.build_book games.pgn [more.pgn ...] --out book.bin --plies 20 --workers 8
+
+Each input file is split into byte ranges as in prepare.py. Worker processes replay the
+first --plies moves of every game in their range and count, per (position key, move),
+how well the move scored for the side that played it (2 for a win, 1 for a draw, 0 for a
+loss, as Polyglot builders do). The parent merges the partial counts with NumPy, drops
+moves seen fewer than --min-games times, scales weights into 16 bits and writes the
+entries sorted by key.
+"""
+
+import argparse
+import collections
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from src.chessboard.chessboard import WHITE
+from src.data.pgn import iter_games
+from src.data.prepare import split_ranges
+
+BOOK_DTYPE = np.dtype([("key", ">u8"), ("move", ">u2"), ("weight", ">u2"), ("learn", ">u4")])
+
+
+def count_range(task):
+    """Count (key, move) scores and games for the games of one byte range; returns arrays."""
+    path, start, end, plies = task
+    scores = collections.Counter()
+    games = collections.Counter()
+    with open(path, "rb") as handle:
+        for game in iter_games(handle, start, end):
+            result = game.result
+            if result is None:
+                continue
+            for ply, (board, move) in enumerate(game.replay()):
+                if ply >= plies:
+                    break
+                entry = (board.key, move)
+                scores[entry] += 1 + (result if board.side == WHITE else -result)
+                games[entry] += 1
+    count = len(games)
+    keys = np.fromiter((key for key, _ in games), dtype=np.uint64, count=count)
+    moves = np.fromiter((move for _, move in games), dtype=np.uint16, count=count)
+    return (keys, moves, np.fromiter((scores[entry] for entry in games), dtype=np.int64, count=count),
+            np.fromiter(games.values(), dtype=np.int64, count=count))
+
+
+def merge_counts(parts):
+    """Sum the per-range arrays over identical (key, move) pairs; returns sorted arrays."""
+    keys = np.concatenate([part[0] for part in parts])
+    moves = np.concatenate([part[1] for part in parts])
+    scores = np.concatenate([part[2] for part in parts])
+    games = np.concatenate([part[3] for part in parts])
+    if not len(keys):
+        return keys, moves, scores, games
+    order = np.lexsort((moves, keys))
+    keys, moves, scores, games = keys[order], moves[order], scores[order], games[order]
+    starts = np.concatenate([[0], np.nonzero((keys[1:] != keys[:-1]) | (moves[1:] != moves[:-1]))[0] + 1])
+    return keys[starts], moves[starts], np.add.reduceat(scores, starts), np.add.reduceat(games, starts)
+
+
+def write_book(path, keys, moves, weights):
+    """Write entries (already sorted by key, move) in the book file format."""
+    entries = np.zeros(len(keys), dtype=BOOK_DTYPE)
+    entries["key"], entries["move"], entries["weight"] = keys, moves, weights
+    with open(path, "wb") as handle:
+        entries.tofile(handle)
+
+
+def build_book(pgn_paths, out_path, plies=20, workers=None, min_games=1):
+    workers = workers or os.cpu_count() or 1
+    tasks = [(path, start, end, plies) for path in pgn_paths for start, end in split_ranges(path, workers)]
+    if workers == 1 or len(tasks) == 1:
+        parts = [count_range(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            parts = pool.map(count_range, tasks, chunksize=1)
+
+    keys, moves, scores, games = merge_counts(parts)
+    keep = (games >= min_games) & (scores > 0)
+    keys, moves, scores = keys[keep], moves[keep], scores[keep]
+    # Scale into 16 bits, keeping every kept move at weight >= 1
+    peak = int(scores.max()) if len(scores) else 1
+    weights = np.maximum(scores * 65535 // max(peak, 65535), 1) if peak > 65535 else scores
+    write_book(out_path, keys, moves, weights)
+    return len(keys)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a memory-mappable opening book from PGN files")
+    parser.add_argument("pgn", nargs="+", help="input PGN files")
+    parser.add_argument("--out", required=True, help="output book file")
+    parser.add_argument("--plies", type=int, default=20, help="book depth in plies")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--min-games", type=int, default=1, help="drop moves played in fewer games")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    entries = build_book(args.pgn, args.out, args.plies, args.workers, args.min_games)
+    print(f"{entries} book entries written to {args.out} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,458 @@
+"""Generate endgame tables (see src/chess_engine/tablebase.py) by retrograde analysis.
+
+    python -m src.data.build_tablebase KQvK KRvK KPvK KBNvK --out tables --workers 4
+    python -m src.data.build_tablebase --all 4 --out tables
+
+Every table the requested ones fall into by a capture or promotion is built first, and
+tables that do not depend on each other are built in parallel worker processes.
+
+A table is built as NumPy arrays with one axis per piece (shape (64,) * n per side to move),
+so each piece move pattern ("knight jump up-left", "rook three squares right") is applied
+to every position at once: the target squares are a gather along that piece's axis and
+blocking pieces a broadcast lookup in a (from, square) table. One such pass counts the
+quiet legal moves of every position and resolves captures and promotions, whose results
+come from the smaller tables already built. Then positions are resolved ply by ply: the
+positions lost at ply p make their predecessors (found by un-moving each piece, again
+vectorized over the whole batch) won at p + 1; each won position takes one move off its
+predecessors' counts, and a predecessor left with no move that avoids losing is lost.
+Whatever is unresolved at the end is a draw. Castling and en passant are not modelled.
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from src.chess_engine.tablebase import (
+    DRAW, HEADER_SIZE, ILLEGAL, MAGIC, MAX_PLIES,
+    canonical_order, material_name, mirrored_name, parse_material, table_size,
+)
+
+NO_MOVE = -32000  # static rank of positions without captures or promotions
+MOVE, PUSH, CAPTURE = 0, 1, 2  # Pattern kinds: move or capture, pawn push, pawn capture
+KING_STEPS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+KNIGHT_STEPS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+PROMOTION_TYPES = (4, 3, 2, 1)  # Q, R, B, N
+PIECE_VALUES = [1, 3, 3, 5, 9, 0]  # By piece type; orients table names stronger side first
+
+ALL_3 = ["KQvK", "KRvK", "KBvK", "KNvK", "KPvK"]
+ALL_4 = [
+    "KQQvK", "KQRvK", "KQBvK", "KQNvK", "KQPvK", "KRRvK", "KRBvK", "KRNvK", "KRPvK", "KBBvK", "KBNvK",
+    "KBPvK", "KNNvK", "KNPvK", "KPPvK", "KQvKQ", "KQvKR", "KQvKB", "KQvKN", "KQvKP", "KRvKR", "KRvKB",
+    "KRvKN", "KRvKP", "KBvKB", "KBvKN", "KBvKP", "KNvKN", "KNvKP", "KPvKP",
+]
+
+
+def _leaper_patterns(steps):
+    patterns = []
+    for d_row, d_col in steps:
+        targets = np.full(64, -1, dtype=np.int64)
+        for square in range(64):
+            row, col = divmod(square, 8)
+            if 0 <= row + d_row < 8 and 0 <= col + d_col < 8:
+                targets[square] = (row + d_row) * 8 + col + d_col
+        patterns.append((targets, None, MOVE))
+    return patterns
+
+
+def _slider_patterns(directions):
+    patterns = []
+    for d_row, d_col in directions:
+        for distance in range(1, 8):
+            targets = np.full(64, -1, dtype=np.int64)
+            between = np.zeros((64, 64), dtype=bool)
+            for square in range(64):
+                row, col = divmod(square, 8)
+                if 0 <= row + d_row * distance < 8 and 0 <= col + d_col * distance < 8:
+                    targets[square] = (row + d_row * distance) * 8 + col + d_col * distance
+                    for step in range(1, distance):
+                        between[square, (row + d_row * step) * 8 + col + d_col * step] = True
+            if (targets >= 0).any():
+                patterns.append((targets, between if distance > 1 else None, MOVE))
+    return patterns
+
+
+def _pawn_patterns(color, reverse=False):
+    """Pushes and captures of a pawn of color, or with reverse the pushes played backwards."""
+    forward = -8 if color == 0 else 8
+    start_row = 6 if color == 0 else 1
+    if reverse:
+        forward, start_row = -forward, start_row + 2 * (-1 if color == 0 else 1)
+    push = np.full(64, -1, dtype=np.int64)
+    double = np.full(64, -1, dtype=np.int64)
+    double_between = np.zeros((64, 64), dtype=bool)
+    for square in range(8, 56):
+        push[square] = square + forward
+        if square // 8 == start_row:
+            double[square] = square + 2 * forward
+            double_between[square, square + forward] = True
+    patterns = [(push, None, PUSH), (double, double_between, PUSH)]
+    if reverse:
+        return patterns
+    for d_col in (-1, 1):
+        targets = np.full(64, -1, dtype=np.int64)
+        for square in range(8, 56):
+            if 0 <= square % 8 + d_col < 8:
+                targets[square] = square + forward + d_col
+        patterns.append((targets, None, CAPTURE))
+    return patterns
+
+
+def piece_patterns(piece, reverse=False):
+    """Move patterns (targets[64], between[64, 64] or None, kind) of a piece number."""
+    kind = piece % 6
+    if kind == 0:
+        return _pawn_patterns(piece // 6, reverse)
+    if kind == 1:
+        return _leaper_patterns(KNIGHT_STEPS)
+    if kind == 5:
+        return _leaper_patterns(KING_STEPS)
+    directions = {2: BISHOP_DIRECTIONS, 3: ROOK_DIRECTIONS, 4: ROOK_DIRECTIONS + BISHOP_DIRECTIONS}[kind]
+    return _slider_patterns(directions)
+
+
+def table_name(name):
+    """Orientation of a material name that is stored on disk: stronger side (by material) as white."""
+    white, black = name.split("v")
+    white_value = sum(PIECE_VALUES["PNBRQK".index(symbol)] for symbol in white)
+    black_value = sum(PIECE_VALUES["PNBRQK".index(symbol)] for symbol in black)
+    if (len(black), black_value, black) > (len(white), white_value, white):
+        return mirrored_name(name)
+    return name
+
+
+def dependencies(name):
+    """Table names a capture or promotion can lead to from material name."""
+    pieces = parse_material(name)
+    found = set()
+    for index, piece in enumerate(pieces):
+        if piece % 6 != 5:
+            found.add(table_name(material_name(pieces[:index] + pieces[index + 1:])))
+        if piece % 6 == 0:
+            for kind in PROMOTION_TYPES:
+                promoted = pieces[:index] + [piece + kind] + pieces[index + 1:]
+                found.add(table_name(material_name(promoted)))
+                # Promotion with capture
+                for other, victim in enumerate(pieces):
+                    if victim // 6 != piece // 6 and victim % 6 != 5:
+                        found.add(table_name(material_name([p for k, p in enumerate(promoted) if k != other])))
+    return found
+
+
+def read_table(path):
+    return np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER_SIZE)
+
+
+def write_table(path, codes):
+    with open(path, "wb") as handle:
+        handle.write(MAGIC.ljust(HEADER_SIZE, b"\0"))
+        codes.tofile(handle)
+
+
+def _parent_codes(codes):
+    """Vectorized tablebase.child_value: codes of child positions as seen by the side that moved."""
+    codes = codes.astype(np.int16)
+    return np.where(codes == DRAW, DRAW, np.where(codes & 1, codes + 3, codes - 1))
+
+
+def _ranks(codes):
+    """Vectorized tablebase.code_rank."""
+    return np.where(codes == DRAW, 0, np.where(codes & 1, 1000 - codes, codes - 1000)).astype(np.int16)
+
+
+class TableBuilder:
+    def __init__(self, name, tables):
+        """Builder for material name; tables maps each dependency's name to its flat code array."""
+        self.name = name
+        self.pieces = parse_material(name)
+        self.tables = tables
+        count = self.count = len(self.pieces)
+        self.shape = (64,) * count
+        self.squares = [np.arange(64).reshape([64 if axis == index else 1 for axis in range(count)])
+                        for index in range(count)]
+        self.patterns = [piece_patterns(piece) for piece in self.pieces]
+        self.reverse_patterns = [piece_patterns(piece, reverse=True) for piece in self.pieces]
+
+    def _blocked(self, index, between, squares):
+        """Where a pattern of piece index is blocked by another piece (squares: per-piece arrays)."""
+        blocked = np.False_
+        if between is not None:
+            for other in range(self.count):
+                if other != index:
+                    blocked = blocked | between[squares[index], squares[other]]
+        return blocked
+
+    def _illegal_and_attacks(self):
+        squares = self.squares
+        base = np.zeros(self.shape, dtype=bool)
+        for first in range(self.count):
+            for second in range(first + 1, self.count):
+                base |= squares[first] == squares[second]
+            if self.pieces[first] % 6 == 0:
+                base |= (squares[first] < 8) | (squares[first] >= 56)
+        attacks = []
+        for side in (0, 1):
+            king = self.pieces.index(11 if side == 0 else 5)  # The enemy king
+            attack = np.zeros(self.shape, dtype=bool)
+            for index, piece in enumerate(self.pieces):
+                if piece // 6 != side:
+                    continue
+                for targets, between, kind in self.patterns[index]:
+                    if kind == PUSH:
+                        continue
+                    hit = targets[squares[index]] == squares[king]
+                    attack |= hit & ~self._blocked(index, between, squares)
+            attacks.append(attack)
+        return [base | attacks[0], base | attacks[1]], attacks
+
+    def _probe(self, pieces, columns, side):
+        """Codes of positions given as a piece list and one square array per piece."""
+        name = material_name(pieces)
+        if name not in self.tables:
+            name = mirrored_name(name)
+            pieces = [(piece + 6) % 12 for piece in pieces]
+            columns = [column ^ 56 for column in columns]
+            side ^= 1
+        index = np.full(len(columns[0]), side, dtype=np.int64)
+        for position in canonical_order(pieces):
+            index = index * 64 + columns[position]
+        return self.tables[name][index]
+
+    def _scan_moves(self, side, illegal, counts, static):
+        """Count quiet moves into counts[side], best capture/promotion result into static[side]."""
+        squares = self.squares
+        legal = ~illegal[side]
+        for index, piece in enumerate(self.pieces):
+            if piece // 6 != side:
+                continue
+            pawn = piece % 6 == 0
+            for targets, between, kind in self.patterns[index]:
+                valid = targets >= 0
+                promotes = pawn & ((targets < 8) | (targets >= 56)) & valid
+                target = targets[squares[index]]
+                reachable = legal & valid[squares[index]] & ~self._blocked(index, between, squares)
+                if kind != CAPTURE:
+                    quiet = valid & ~promotes
+                    child_illegal = np.take(illegal[side ^ 1], np.where(quiet, targets, 0), axis=index)
+                    counts[side] += reachable & quiet[squares[index]] & ~child_illegal
+                    if promotes.any():
+                        empty = True
+                        for other in range(self.count):
+                            if other != index:
+                                empty = empty & (target != squares[other])
+                        self._resolve(side, index, None, np.nonzero(reachable & promotes[squares[index]] & empty),
+                                      targets, static, True)
+                if kind == PUSH:
+                    continue
+                for victim, enemy in enumerate(self.pieces):
+                    if enemy // 6 == side or enemy % 6 == 5:
+                        continue
+                    captures = reachable & (target == squares[victim])
+                    for promote in ((False, True) if promotes.any() else (False,)):
+                        mask = promotes[squares[index]] if promote else ~promotes[squares[index]]
+                        self._resolve(side, index, victim, np.nonzero(captures & mask), targets, static, promote)
+
+    def _resolve(self, side, index, victim, coords, targets, static, promote=False):
+        """Fold captures/promotions of piece index (from positions coords) into static[side]."""
+        if not len(coords[0]):
+            return
+        columns = list(coords)
+        columns[index] = targets[coords[index]]
+        piece = self.pieces[index]
+        kinds = [piece + kind for kind in PROMOTION_TYPES] if promote else [piece]
+        flat = np.ravel_multi_index(coords, self.shape)
+        ranks_view = static[side].reshape(-1)
+        best = ranks_view[flat]
+        for new_piece in kinds:
+            pieces = list(self.pieces)
+            pieces[index] = new_piece
+            child_columns = columns
+            if victim is not None:
+                pieces = pieces[:victim] + pieces[victim + 1:]
+                child_columns = columns[:victim] + columns[victim + 1:]
+            codes = self._probe(pieces, child_columns, side ^ 1)
+            ranks = np.where(codes == ILLEGAL, NO_MOVE, _ranks(_parent_codes(codes)))
+            best = np.maximum(best, ranks)
+        ranks_view[flat] = best
+
+    def _predecessors(self, side, flat, resolved):
+        """Unresolved legal positions (side ^ 1 to move) with a quiet move into each of flat (side to move).
+
+        Returns one entry per (predecessor, move), so a position can appear more than once.
+        """
+        mover = side ^ 1
+        coords = np.unravel_index(flat, self.shape)
+        found = []
+        for index, piece in enumerate(self.pieces):
+            if piece // 6 != mover:
+                continue
+            for origins, between, _ in self.reverse_patterns[index]:
+                origin = origins[coords[index]]
+                keep = origin >= 0
+                if between is not None:
+                    for other in range(self.count):
+                        if other != index:
+                            keep &= ~between[coords[index], coords[other]]
+                predecessors = (flat + (origin - coords[index]) * 64 ** (self.count - 1 - index))[keep]
+                found.append(predecessors[~resolved[mover][predecessors]])  # Illegal positions count as resolved
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+    def build(self):
+        """Return the flat code array (side-major) of the table."""
+        illegal, attacks = self._illegal_and_attacks()
+        counts = [np.zeros(self.shape, dtype=np.uint8), np.zeros(self.shape, dtype=np.uint8)]
+        static = [np.full(self.shape, NO_MOVE, dtype=np.int16), np.full(self.shape, NO_MOVE, dtype=np.int16)]
+        for side in (0, 1):
+            self._scan_moves(side, illegal, counts, static)
+        illegal = [mask.reshape(-1) for mask in illegal]
+        counts = [count.reshape(-1) for count in counts]
+        static = [ranks.reshape(-1) for ranks in static]
+
+        codes = [np.zeros(mask.shape, dtype=np.uint8) for mask in illegal]
+        resolved = [mask.copy() for mask in illegal]
+        loss_due = []
+        for side in (0, 1):
+            codes[side][illegal[side]] = ILLEGAL
+            in_check = attacks[side ^ 1].reshape(-1)
+            stuck = ~illegal[side] & (counts[side] == 0)
+            due = np.full(counts[side].shape, -1, dtype=np.int16)
+            due[stuck & (static[side] == NO_MOVE) & in_check] = 0  # Checkmate
+            resolved[side] |= stuck & (static[side] == NO_MOVE) & ~in_check  # Stalemate
+            resolved[side] |= stuck & (static[side] == 0)  # Only captures into a draw
+            lost = stuck & (static[side] < 0) & (static[side] > NO_MOVE)
+            due[lost] = static[side][lost] + 998  # Only captures that lose: lost as slowly as the best of them
+            loss_due.append(due)
+
+        pending_wins = [np.zeros(mask.shape, dtype=bool) for mask in illegal]  # Won at the next (odd) ply
+        pending = False
+        ply = 0
+        while True:
+            if ply > MAX_PLIES:
+                raise ValueError(f"{self.name}: distance to mate exceeds {MAX_PLIES} plies")
+            new = []
+            for side in (0, 1):
+                if ply & 1:
+                    positions = np.nonzero(~resolved[side] & (pending_wins[side] | (static[side] == 1000 - ply)))[0]
+                    codes[side][positions] = ply
+                    pending_wins[side][:] = False
+                    pending = False
+                else:
+                    positions = np.nonzero(~resolved[side] & (loss_due[side] == ply))[0]
+                    codes[side][positions] = ply + 2
+                resolved[side][positions] = True
+                new.append(positions)
+            for side in (0, 1):
+                if not len(new[side]):
+                    continue
+                mover = side ^ 1
+                predecessors = self._predecessors(side, new[side], resolved)
+                if not ply & 1:
+                    pending_wins[mover][predecessors] = True
+                    pending = pending or len(predecessors) > 0
+                    continue
+                np.subtract.at(counts[mover], predecessors, 1)
+                lost = predecessors[counts[mover][predecessors] == 0]
+                lost = lost[static[mover][lost] < 0]  # Repeats write the same value
+                escape = static[mover][lost]
+                loss_due[mover][lost] = np.where(escape == NO_MOVE, ply + 1, np.maximum(ply + 1, escape + 998))
+            ply += 1
+            if not len(new[0]) and not len(new[1]) and not pending:
+                waiting = any((loss_due[side] >= ply).any() or
+                              (~resolved[side] & (static[side] > 0) & (1000 - static[side] >= ply)).any()
+                              for side in (0, 1))
+                if not waiting:
+                    break
+        return np.concatenate(codes)
+
+
+def generate_table(task):
+    """Worker: build one table from the already built ones in out_dir and write it there."""
+    name, out_dir = task
+    start = time.perf_counter()
+    tables = {}
+    for dependency in dependencies(name):
+        path = os.path.join(out_dir, dependency + ".tb")
+        if os.path.exists(path):
+            tables[dependency] = read_table(path)
+    codes = TableBuilder(name, tables).build()
+    assert len(codes) == table_size(len(parse_material(name)))
+    write_table(os.path.join(out_dir, name + ".tb"), codes)
+    return name, summary(codes), time.perf_counter() - start
+
+
+def summary(codes):
+    legal = codes[codes != ILLEGAL]
+    wins = legal[(legal & 1) == 1]
+    return {"positions": int(len(legal)), "wins": int(len(wins)),
+            "draws": int((legal == DRAW).sum()), "losses": int(len(legal) - len(wins) - (legal == DRAW).sum()),
+            "longest_mate": int(wins.max()) if len(wins) else 0}
+
+
+def build_order(names, out_dir):
+    """Levels of table names to build (each level only needs the earlier ones), skipping existing files."""
+    needed = {}
+
+    def visit(name):
+        name = table_name(name)
+        if name in needed:
+            return
+        needed[name] = dependencies(name)
+        for dependency in needed[name]:
+            visit(dependency)
+
+    for name in names:
+        visit(name)
+    levels, done = [], set()
+    while len(done) < len(needed):
+        level = sorted(name for name in needed if name not in done and needed[name] <= done)
+        levels.append(level)
+        done.update(level)
+    return [[name for name in level if not os.path.exists(os.path.join(out_dir, name + ".tb"))]
+            for level in levels]
+
+
+def build_tablebases(names, out_dir, workers=None):
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    built = []
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        for level in build_order(names, out_dir):
+            tasks = [(name, out_dir) for name in level]
+            results = pool.imap_unordered(generate_table, tasks) if pool else map(generate_table, tasks)
+            for name, stats, elapsed in results:
+                print(f"{name}: {stats['positions']} positions, {stats['wins']} wins, {stats['draws']} draws, "
+                      f"{stats['losses']} losses, longest mate {stats['longest_mate']} plies ({elapsed:.1f}s)")
+                built.append(name)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return built
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate endgame tablebases by retrograde analysis")
+    parser.add_argument("materials", nargs="*", help="material sets such as KQvK, KRvKP")
+    parser.add_argument("--all", type=int, choices=(3, 4), help="every set with up to this many pieces")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    names = list(args.materials)
+    if args.all:
+        names += ALL_3 + (ALL_4 if args.all == 4 else [])
+    if not names:
+        parser.error("no material sets given")
+    start = time.perf_counter()
+    built = build_tablebases(names, args.out, args.workers)
+    print(f"{len(built)} tables written to {args.out} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
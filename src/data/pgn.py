@@ -0,0 +1,108 @@
+"""Streaming PGN reader.
+
+Games are read one at a time from a binary file handle, so memory use does not depend on
+the size of the archive. A reader can be restricted to a byte range: it starts at the
+first game whose tag section begins at or after ``start`` and stops before the first game
+beginning at or after ``end``. Ranges that tile the file therefore split its games
+between workers without overlap or gaps. When a range starts mid-file the reader
+resynchronises on the next ``[Event`` tag, which the PGN standard puts first in every game.
+"""
+
+import re
+
+from src.chessboard.chessboard import Chessboard
+from src.chess_engine.movegen import generate_legal_moves, parse_san
+
+RESULTS = {"1-0": 1, "0-1": -1, "1/2-1/2": 0}  # From white's point of view
+_TAG = re.compile(rb'^\[(\w+)\s+"(.*)"\]\s*$')
+_COMMENT = re.compile(r"\{[^}]*\}|;[^\n]*")
+_MOVE_NUMBER = re.compile(r"^\d+\.+")
+
+
+class PGNGame:
+    def __init__(self, offset, headers, movetext):
+        self.offset = offset  # Byte offset of the game in its file, a stable game id
+        self.headers = headers
+        self.movetext = movetext
+
+    @property
+    def result(self):
+        """+1, 0 or -1 from white's point of view, or None for unfinished games."""
+        return RESULTS.get(self.headers.get("Result", "*"))
+
+    def san_moves(self):
+        """The main-line moves in SAN, with comments, variations, NAGs and move numbers removed."""
+        text = _COMMENT.sub(" ", self.movetext)
+        # Drop (possibly nested) variations
+        depth = 0
+        kept = []
+        for char in text:
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth = max(depth - 1, 0)
+            elif not depth:
+                kept.append(char)
+        moves = []
+        for token in "".join(kept).split():
+            token = _MOVE_NUMBER.sub("", token)
+            if not token or token.startswith("$") or token in RESULTS or token == "*":
+                continue
+            moves.append(token)
+        return moves
+
+    def replay(self):
+        """Yield (board, move) for every main-line move, with board set to the position before it.
+
+        The same Chessboard is reused and advanced in place; copy it if you need to keep it.
+        Replay stops quietly at the first illegal or unparsable move.
+        """
+        board = Chessboard()
+        fen = self.headers.get("FEN")
+        if fen and self.headers.get("SetUp", "1") == "1":
+            board.update_from_fen(fen)
+        for san in self.san_moves():
+            move = parse_san(board, san, generate_legal_moves(board))
+            if move is None:
+                return
+            yield board, move
+            board.make(move)
+
+
+def iter_games(handle, start=0, end=None):
+    """Yield PGNGame objects from a binary file handle, restricted to games starting in [start, end)."""
+    if start > 0:
+        # We may have landed mid-line: back up one byte and finish that line, so a game
+        # starting exactly at ``start`` is still seen
+        handle.seek(start - 1)
+        offset = start - 1 + len(handle.readline())
+    else:
+        handle.seek(0)
+        offset = 0
+
+    headers = {}
+    movetext = []
+    game_offset = None
+    in_movetext = False
+    for line in iter(handle.readline, b""):
+        line_offset = offset
+        offset += len(line)
+        stripped = line.strip()
+        if stripped.startswith(b"[") and _TAG.match(stripped):
+            if game_offset is None and start > 0 and not stripped.startswith(b"[Event "):
+                continue  # Rest of a tag section that began before our range
+            if in_movetext or game_offset is None:
+                # A new tag section begins a new game
+                if game_offset is not None and in_movetext:
+                    yield PGNGame(game_offset, headers, " ".join(movetext))
+                if end is not None and line_offset >= end:
+                    return
+                headers, movetext, in_movetext = {}, [], False
+                game_offset = line_offset
+            name, value = _TAG.match(stripped).groups()
+            headers[name.decode("latin-1")] = value.decode("utf-8", "replace")
+        elif game_offset is not None and stripped:
+            in_movetext = True
+            movetext.append(stripped.decode("utf-8", "replace"))
+    if game_offset is not None and (headers or movetext):
+        yield PGNGame(game_offset, headers, " ".join(movetext))
@@ -0,0 +1,314 @@
+"""Memory-mapped position index: how often each position occurred and how those games ended.
+
+    python -m src.data.position_index games.pgn [more.pgn ...] --out positions.idx --workers 8
+
+An index file is a 16-byte header (MAGIC, then the record count as u64) followed by two
+sections of the same length, both sorted by key:
+
+    keys      u64 per position            Zobrist key (Chessboard.key)
+    entries   ENTRY_DTYPE per position    compact position (encoding.COMPACT_DTYPE, clocks
+                                          zeroed), games it occurred in (counted once per
+                                          game, before a move was played) and how many of
+                                          them white won, drew and lost
+
+The keys are contiguous, so a lookup is a binary search over the mapped key section that
+touches a few pages; bulk lookups search a whole batch at once. A key found with a
+different stored position (a 64-bit collision) counts as a miss.
+
+The PGN build is parallel like the other pipelines (see prepare.py). Workers replay the games
+of their byte range, and every --flush-size positions they aggregate what they collected
+(sorted by key, summed with reduceat) and write it split into key-range buckets (the top
+bits of the key). Each bucket is then merged on its own and the buckets are appended in key
+order, so memory stays bounded by the flush size and one bucket, not by the archive.
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from src.chessboard.encoding import COMPACT_DTYPE, STATE_COLUMN, compact_keys, pack_compact, pack_state
+from src.chess_engine.movegen import generate_legal_moves
+from src.data.pgn import iter_games
+from src.data.prepare import split_ranges
+
+MAGIC = b"CPIX\x01"
+HEADER_SIZE = 16
+STATS_FIELDS = ("games", "white", "draws", "black")
+STATS_DTYPE = np.dtype([(field, "<u4") for field in STATS_FIELDS])
+ENTRY_DTYPE = np.dtype([("position", COMPACT_DTYPE)] + [(field, "<u4") for field in STATS_FIELDS])  # 48 bytes
+
+
+def _bare(compact):
+    """Copy of a compact array with the clocks zeroed, as positions are stored in the index."""
+    compact = np.array(compact, dtype=COMPACT_DTYPE)
+    compact["halfmove"] = compact["fullmove"] = 0
+    return compact
+
+
+def aggregate(positions, results):
+    """(keys, entries) of a batch of positions and game results for white (+1/0/-1), one
+    entry per distinct position, sorted by key."""
+    compact = _bare(pack_compact(positions))
+    results = np.asarray(results)
+    keys = compact_keys(compact)
+    order = np.argsort(keys, kind="stable")
+    keys, compact, results = keys[order], compact[order], results[order]
+    if not len(keys):
+        return keys, np.zeros(0, dtype=ENTRY_DTYPE)
+    starts = np.concatenate([[0], np.nonzero(keys[1:] != keys[:-1])[0] + 1])
+    entries = np.zeros(len(starts), dtype=ENTRY_DTYPE)
+    entries["position"] = compact[starts]
+    entries["games"] = np.diff(np.append(starts, len(keys)))
+    for field, result in (("white", 1), ("draws", 0), ("black", -1)):
+        entries[field] = np.add.reduceat((results == result).astype(np.uint32), starts)
+    return keys[starts], entries
+
+
+def merge_entries(parts):
+    """Sum (keys, entries) parts over identical keys; returns sorted (keys, entries)."""
+    keys = np.concatenate([part[0] for part in parts])
+    entries = np.concatenate([part[1] for part in parts])
+    if not len(keys):
+        return keys, entries
+    order = np.argsort(keys, kind="stable")
+    keys, entries = keys[order], entries[order]
+    starts = np.concatenate([[0], np.nonzero(keys[1:] != keys[:-1])[0] + 1])
+    merged = entries[starts]
+    for field in STATS_FIELDS:
+        merged[field] = np.add.reduceat(entries[field].astype(np.uint64), starts)
+    return keys[starts], merged
+
+
+def unique_positions(positions):
+    """Indices of the first occurrence of every distinct position (clocks ignored), in order.
+
+    For deduplicating a dataset in memory; PositionIndex.contains() checks against an index.
+    """
+    _, first = np.unique(compact_keys(pack_compact(positions)), return_index=True)
+    return np.sort(first)
+
+
+def _write_header(handle, count):
+    handle.write(MAGIC.ljust(8, b"\0") + int(count).to_bytes(8, "little"))
+
+
+def write_index(path, keys, entries):
+    """Write (keys, entries) sorted by key (as returned by aggregate) as an index file."""
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as handle:
+        _write_header(handle, len(keys))
+        np.asarray(keys, dtype="<u8").tofile(handle)
+        np.asarray(entries, dtype=ENTRY_DTYPE).tofile(handle)
+    os.replace(temporary, path)
+
+
+def index_positions(path, positions, results):
+    """Bulk-build an index file from in-memory positions and results for white; returns its size."""
+    keys, entries = aggregate(positions, results)
+    write_index(path, keys, entries)
+    return len(keys)
+
+
+def _flush(packed, results, count, scratch, tag, bucket_bits):
+    """Aggregate the first count collected positions and write one part file per bucket."""
+    keys, entries = aggregate(packed[:count], results[:count])
+    bounds = np.searchsorted(keys, np.arange(1 << bucket_bits, dtype=np.uint64) << np.uint64(64 - bucket_bits))
+    bounds = np.append(bounds, len(keys))
+    parts = []
+    for bucket in range(1 << bucket_bits):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        if start < end:
+            path = os.path.join(scratch, f"{bucket:04x}.{tag}.npz")
+            np.savez(path, keys=keys[start:end], entries=entries[start:end])
+            parts.append((bucket, path))
+    return parts
+
+
+def collect_range(task):
+    """Collect the positions of the games of one byte range into bucket part files; returns a report."""
+    number, path, start, end, scratch, options = task
+    flush_size, bucket_bits = options["flush_size"], options["bucket_bits"]
+    packed = np.zeros((flush_size, STATE_COLUMN + 1), dtype=np.uint64)
+    results = np.zeros(flush_size, dtype=np.int8)
+    count = games = flushes = 0
+    parts = []
+    with open(path, "rb") as handle:
+        for game in iter_games(handle, start, end):
+            result = game.result
+            if result is None:
+                continue
+            seen = set()  # Count a position once per game even if it repeats
+            for ply, (board, _) in enumerate(game.replay()):
+                if ply < options["skip_plies"] or board.key in seen:
+                    continue
+                seen.add(board.key)
+                row = packed[count]
+                row[:STATE_COLUMN] = board.bitboards
+                row[STATE_COLUMN] = pack_state(board.side, board.castling, board.ep_square)
+                results[count] = result
+                count += 1
+                if count == flush_size:
+                    parts += _flush(packed, results, count, scratch, f"{number}-{flushes}", bucket_bits)
+                    count, flushes = 0, flushes + 1
+            games += 1
+    if count:
+        parts += _flush(packed, results, count, scratch, f"{number}-{flushes}", bucket_bits)
+    return {"games": games, "parts": parts}
+
+
+def merge_bucket(task):
+    """Merge the part files of one bucket into <scratch>/<bucket>.keys.npy and .entries.npy."""
+    bucket, paths, scratch, min_games = task
+    parts = []
+    for path in paths:
+        with np.load(path) as data:
+            parts.append((data["keys"], data["entries"]))
+        os.remove(path)
+    keys, entries = merge_entries(parts)
+    keep = entries["games"] >= min_games
+    np.save(os.path.join(scratch, f"{bucket:04x}.keys.npy"), keys[keep])
+    np.save(os.path.join(scratch, f"{bucket:04x}.entries.npy"), entries[keep])
+    return int(keep.sum())
+
+
+def build_index(pgn_paths, out_path, workers=None, skip_plies=0, min_games=1, bucket_bits=8,
+                flush_size=1 << 20):
+    """Index every position of the games in pgn_paths; returns (positions, games)."""
+    workers = workers or os.cpu_count() or 1
+    scratch = tempfile.mkdtemp(prefix="position-index-", dir=os.path.dirname(os.path.abspath(out_path)))
+    options = {"skip_plies": skip_plies, "bucket_bits": bucket_bits, "flush_size": flush_size}
+    tasks = [(number, path, start, end, scratch, options) for number, (path, start, end) in enumerate(
+        (path, start, end) for path in pgn_paths for start, end in split_ranges(path, workers))]
+    pool = multiprocessing.Pool(workers) if workers > 1 and len(tasks) > 1 else None
+    try:
+        reports = pool.map(collect_range, tasks, chunksize=1) if pool else [collect_range(task) for task in tasks]
+        paths = {}
+        for report in reports:
+            for bucket, path in report["parts"]:
+                paths.setdefault(bucket, []).append(path)
+        buckets = sorted(paths)
+        merge_tasks = [(bucket, paths[bucket], scratch, min_games) for bucket in buckets]
+        counts = pool.map(merge_bucket, merge_tasks, chunksize=1) if pool else [merge_bucket(task) for task in merge_tasks]
+
+        # Stream the merged buckets out in key order: all keys first, then all entries
+        temporary = out_path + ".tmp"
+        with open(temporary, "wb") as handle:
+            _write_header(handle, sum(counts))
+            for section in ("keys", "entries"):
+                for bucket in buckets:
+                    np.load(os.path.join(scratch, f"{bucket:04x}.{section}.npy"), mmap_mode="r").tofile(handle)
+        os.replace(temporary, out_path)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        shutil.rmtree(scratch, ignore_errors=True)
+    return sum(counts), sum(report["games"] for report in reports)
+
+
+class PositionIndex:
+    def __init__(self, path):
+        """Map an index file written by build_index or write_index."""
+        self.path = path
+        with open(path, "rb") as handle:
+            header = handle.read(HEADER_SIZE)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a position index file")
+        self.count = int.from_bytes(header[8:16], "little")
+        if self.count:
+            self.keys = np.memmap(path, dtype="<u8", mode="r", offset=HEADER_SIZE, shape=(self.count,))
+            self.entries = np.memmap(path, dtype=ENTRY_DTYPE, mode="r", offset=HEADER_SIZE + 8 * self.count,
+                                     shape=(self.count,))
+        else:  # np.memmap cannot map zero bytes
+            self.keys = np.zeros(0, dtype="<u8")
+            self.entries = np.zeros(0, dtype=ENTRY_DTYPE)
+
+    def __len__(self):
+        return self.count
+
+    def find(self, keys):
+        """Record index of each key, -1 where absent."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        indices = np.searchsorted(self.keys, keys)
+        found = indices < self.count
+        found[found] = self.keys[indices[found]] == keys[found]
+        return np.where(found, indices, -1)
+
+    def indices(self, positions):
+        """Record index of each position (anything encoding.to_packed accepts), -1 where absent."""
+        compact = pack_compact(positions)
+        indices = self.find(compact_keys(compact))
+        hits = np.nonzero(indices >= 0)[0]
+        collided = self.entries["position"][indices[hits]] != _bare(compact[hits])
+        indices[hits[collided]] = -1
+        return indices
+
+    def contains(self, positions):
+        return self.indices(positions) >= 0
+
+    def lookup(self, positions):
+        """STATS_DTYPE array (games, white, draws, black) per position, zero where absent."""
+        indices = self.indices(positions)
+        hits = indices >= 0
+        stats = np.zeros(len(indices), dtype=STATS_DTYPE)
+        found = self.entries[indices[hits]]
+        for field in STATS_FIELDS:
+            stats[field][hits] = found[field]
+        return stats
+
+    def stats(self, board):
+        """{games, white, draws, black} for one board, or None if it is not indexed."""
+        stats = self.lookup([board])[0]
+        return {field: int(stats[field]) for field in STATS_FIELDS} if stats["games"] else None
+
+    def explore(self, board):
+        """[(move, stats)] for the legal moves of board leading to indexed positions, most played first."""
+        moves = generate_legal_moves(board)
+        packed = np.zeros((len(moves), STATE_COLUMN + 1), dtype=np.uint64)
+        for row, move in zip(packed, moves):
+            board.make(move)
+            row[:STATE_COLUMN] = board.bitboards
+            row[STATE_COLUMN] = pack_state(board.side, board.castling, board.ep_square)
+            board.unmake()
+        stats = self.lookup(packed)
+        found = [(move, {field: int(row[field]) for field in STATS_FIELDS})
+                 for move, row in zip(moves, stats) if row["games"]]
+        return sorted(found, key=lambda item: -item[1]["games"])
+
+    def close(self):
+        self.keys = np.zeros(0, dtype="<u8")
+        self.entries = np.zeros(0, dtype=ENTRY_DTYPE)
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a memory-mapped position index from PGN files")
+    parser.add_argument("pgn", nargs="+", help="input PGN files")
+    parser.add_argument("--out", required=True, help="output index file")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--skip-plies", type=int, default=0, help="ignore the opening plies of every game")
+    parser.add_argument("--min-games", type=int, default=1, help="drop positions seen in fewer games")
+    parser.add_argument("--bucket-bits", type=int, default=8, help="split the merge into 2**N key ranges")
+    parser.add_argument("--flush-size", type=int, default=1 << 20, help="positions a worker collects before flushing")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    positions, games = build_index(args.pgn, args.out, args.workers, args.skip_plies, args.min_games,
+                                   args.bucket_bits, args.flush_size)
+    print(f"{positions} positions from {games} games written to {args.out} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,107 @@
+"""Command-line PGN to training-shard pipeline.
+
+    python -m src.data.prepare games.pgn [more.pgn ...] --out data/shards --workers 8
+
+Each input file is split into byte ranges, one per worker process. Every worker streams
+the games starting in its range (see pgn.iter_games), replays them on a Chessboard and
+writes fixed-size shards (see shards.ShardWriter), so memory stays bounded by the shard
+size no matter how large the archive is.
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+from src.chessboard.chessboard import WHITE
+from src.data.pgn import iter_games
+from src.data.shards import ShardWriter, write_manifest
+
+
+def _rating(headers, name):
+    try:
+        return min(int(headers.get(name, 0)), 65535)
+    except ValueError:
+        return 0
+
+
+def process_range(task):
+    """Convert the games of one byte range into shards; returns a report dict."""
+    path, start, end, out_dir, prefix, options = task
+    writer = ShardWriter(out_dir, prefix, options["shard_size"], options["extra_planes"])
+    games = positions = 0
+    with open(path, "rb") as handle:
+        for game in iter_games(handle, start, end):
+            result = game.result
+            if result is None:
+                continue
+            white_elo = _rating(game.headers, "WhiteElo")
+            black_elo = _rating(game.headers, "BlackElo")
+            if min(white_elo, black_elo) < options["min_elo"]:
+                continue
+            for ply, (board, move) in enumerate(game.replay()):
+                if ply < options["skip_plies"]:
+                    continue
+                writer.add(board, move, result if board.side == WHITE else -result,
+                           game.offset, ply, white_elo, black_elo)
+                positions += 1
+            games += 1
+    return {"path": path, "start": start, "end": end, "games": games, "positions": positions,
+            "shards": writer.close()}
+
+
+def split_ranges(path, parts):
+    """Split a file into parts contiguous byte ranges."""
+    size = os.path.getsize(path)
+    parts = max(1, min(parts, size // 4096 or 1))  # Tiny files are not worth splitting
+    bounds = [size * index // parts for index in range(parts + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def prepare(pgn_paths, out_dir, workers=None, shard_size=65536, extra_planes=False, min_elo=0, skip_plies=0):
+    workers = workers or os.cpu_count() or 1
+    options = {"shard_size": shard_size, "extra_planes": extra_planes, "min_elo": min_elo, "skip_plies": skip_plies}
+    tasks = []
+    for path in pgn_paths:
+        for start, end in split_ranges(path, workers):
+            tasks.append((path, start, end, out_dir, f"part{len(tasks):04d}", options))
+    os.makedirs(out_dir, exist_ok=True)
+
+    if workers == 1 or len(tasks) == 1:
+        reports = [process_range(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            reports = pool.map(process_range, tasks, chunksize=1)
+
+    shards = [shard for report in reports for shard in report["shards"]]
+    write_manifest(out_dir, shards, sources=list(pgn_paths), extra_planes=extra_planes,
+                   games=sum(report["games"] for report in reports),
+                   positions=sum(report["positions"] for report in reports))
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert PGN archives into memory-mapped training shards")
+    parser.add_argument("pgn", nargs="+", help="input PGN files")
+    parser.add_argument("--out", required=True, help="output directory for shards and manifest.json")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--shard-size", type=int, default=65536, help="positions per shard")
+    parser.add_argument("--extra-planes", action="store_true", help="add side/castling/en passant planes")
+    parser.add_argument("--min-elo", type=int, default=0, help="skip games where either player is rated lower")
+    parser.add_argument("--skip-plies", type=int, default=0, help="skip the first N plies of every game")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    reports = prepare(args.pgn, args.out, args.workers, args.shard_size, args.extra_planes,
+                      args.min_elo, args.skip_plies)
+    seconds = time.perf_counter() - start
+    games = sum(report["games"] for report in reports)
+    positions = sum(report["positions"] for report in reports)
+    shards = sum(len(report["shards"]) for report in reports)
+    print(f"{games} games, {positions} positions, {shards} shards in {seconds:.1f}s "
+          f"({positions / max(seconds, 1e-9):,.0f} positions/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
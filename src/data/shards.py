@@ -0,0 +1,127 @@
+"""Fixed-size training shards stored as memory-mappable ``.npy`` files.
+
+A shard ``<name>`` is four arrays with the same length:
+
+    <name>.positions.npy  uint8 (N, planes, 8, 8)  encoded with encoding.encode_batch
+    <name>.moves.npy      uint16 (N,)              move played (see movegen for the encoding)
+    <name>.results.npy    int8 (N,)                game result for the side to move (+1/0/-1)
+    <name>.meta.npy       META_DTYPE (N,)          game id (byte offset), ply and ratings
+
+``manifest.json`` in the output directory lists every shard and its length. Readers open
+shards with ``mmap_mode="r"`` so nothing is loaded into RAM until it is indexed.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from src.chessboard.encoding import encode_batch, plane_count, pack_state, STATE_COLUMN
+
+META_DTYPE = np.dtype([("game", "<i8"), ("ply", "<u2"), ("white_elo", "<u2"), ("black_elo", "<u2")])
+SHARD_FIELDS = ("positions", "moves", "results", "meta")
+MANIFEST = "manifest.json"
+
+
+def shard_path(directory, name, field):
+    return os.path.join(directory, f"{name}.{field}.npy")
+
+
+def _write_npy(path, array):
+    """Write an array through a memory map so large shards are streamed to disk."""
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=array.dtype, shape=array.shape)
+    out[...] = array
+    out.flush()
+    del out
+
+
+class ShardWriter:
+    def __init__(self, directory, prefix, shard_size=65536, extra_planes=False):
+        """Buffer at most shard_size positions in memory, writing a shard whenever it fills."""
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.extra_planes = extra_planes
+        self.packed = np.zeros((shard_size, STATE_COLUMN + 1), dtype=np.uint64)
+        self.moves = np.zeros(shard_size, dtype=np.uint16)
+        self.results = np.zeros(shard_size, dtype=np.int8)
+        self.meta = np.zeros(shard_size, dtype=META_DTYPE)
+        self.count = 0
+        self.shards = []
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, board, move, result, game, ply, white_elo=0, black_elo=0):
+        index = self.count
+        row = self.packed[index]
+        row[:STATE_COLUMN] = board.bitboards
+        row[STATE_COLUMN] = pack_state(board.side, board.castling, board.ep_square)
+        self.moves[index] = move
+        self.results[index] = result
+        self.meta[index] = (game, ply, white_elo, black_elo)
+        self.count += 1
+        if self.count == self.shard_size:
+            self.flush()
+
+    def flush(self):
+        count = self.count
+        if not count:
+            return
+        name = f"{self.prefix}-{len(self.shards):05d}"
+        positions = np.lib.format.open_memmap(
+            shard_path(self.directory, name, "positions"), mode="w+", dtype=np.uint8,
+            shape=(count, plane_count(self.extra_planes), 8, 8))
+        encode_batch(self.packed[:count], dtype=np.uint8, extra_planes=self.extra_planes, out=positions)
+        positions.flush()
+        del positions
+        _write_npy(shard_path(self.directory, name, "moves"), self.moves[:count])
+        _write_npy(shard_path(self.directory, name, "results"), self.results[:count])
+        _write_npy(shard_path(self.directory, name, "meta"), self.meta[:count])
+        self.shards.append({"name": name, "length": count})
+        self.count = 0
+
+    def close(self):
+        self.flush()
+        return self.shards
+
+
+def write_manifest(directory, shards, **info):
+    with open(os.path.join(directory, MANIFEST), "w") as handle:
+        json.dump(dict(info, shards=shards), handle, indent=2)
+
+
+def open_shard(directory, name):
+    """Memory-map one shard; returns a dict of read-only arrays keyed by field."""
+    return {field: np.load(shard_path(directory, name, field), mmap_mode="r") for field in SHARD_FIELDS}
+
+
+class ShardDataset:
+    def __init__(self, directory):
+        """All shards listed in directory's manifest, addressed as one memory-mapped dataset."""
+        with open(os.path.join(directory, MANIFEST)) as handle:
+            self.manifest = json.load(handle)
+        self.shards = [open_shard(directory, shard["name"]) for shard in self.manifest["shards"]]
+        self.offsets = np.cumsum([0] + [shard["length"] for shard in self.manifest["shards"]])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def get_batch(self, indices):
+        """Gather rows by global index into in-memory arrays (positions, moves, results, meta)."""
+        indices = np.asarray(indices)
+        shard_ids = np.searchsorted(self.offsets, indices, side="right") - 1
+        batch = {field: [] for field in SHARD_FIELDS}
+        order = []
+        for shard_id in np.unique(shard_ids):
+            selected = np.nonzero(shard_ids == shard_id)[0]
+            local = indices[selected] - self.offsets[shard_id]
+            for field in SHARD_FIELDS:
+                batch[field].append(self.shards[shard_id][field][local])
+            order.append(selected)
+        # Restore the requested order
+        inverse = np.argsort(np.concatenate(order)) if order else np.zeros(0, dtype=np.int64)
+        return {field: np.concatenate(parts)[inverse] for field, parts in batch.items()}
+
+    def iter_batches(self, batch_size, shuffle=True, seed=None):
+        order = np.random.default_rng(seed).permutation(len(self)) if shuffle else np.arange(len(self))
+        for start in range(0, len(order), batch_size):
+            yield self.get_batch(order[start:start + batch_size])
@@ -1,15 +1,25 @@
 from PyQt5.QtWidgets import QWidget, QLabel, QPushButton, QGridLayout, QVBoxLayout, QSizePolicy
 from PyQt5.QtGui import QPixmap, QColor, QPainter, QBrush, QPen
 from PyQt5.QtCore import Qt
-from src.chessboard.chessboard import Chessboard
+from src.chessboard.chessboard import Chessboard, WHITE, BLACK
+from src.chess_engine.movegen import generate_legal_moves, in_check, move_to_uci, PROMOTION_SYMBOLS, FLAG_PROMO_KNIGHT
+from src.chess_engine.profiling import format_snapshot
+from src.gui.engine_worker import EngineWorker
 
 
 class ChessGUI(QWidget):
-    def __init__(self, return_to_menu_callback, player_side, parent=None):
+    def __init__(self, return_to_menu_callback, player_side, parent=None, ponder=False, profile=False):
         super().__init__(parent)
         self.return_to_menu_callback = return_to_menu_callback
         self.player_side = player_side
+        self.player_color = WHITE if player_side == 'white' else BLACK
         self.chessboard = Chessboard(self.player_side)
+        self.ponder = ponder  # Keep the engine searching on the player's time
+        # The engine plays the other side on a background thread so the window stays responsive
+        self.engine_worker = EngineWorker(profile=profile)  # profile: show engine counters and timings
+        self.engine_worker.best_move.connect(self.on_engine_move)
+        self.engine_worker.progress.connect(self.on_engine_progress)
+        self.engine_worker.failed.connect(self.on_engine_failed)
         self.selected_piece = None  # To store the selected piece's position
         self.selected_piece_label = None  # To store the label for the selected piece
         # Create a mapping of FEN characters to piece image filenames
@@ -17,6 +27,12 @@ class ChessGUI(QWidget):
             'P': 'Chess_plt60.png', 'N': 'Chess_nlt60.png', 'B': 'Chess_blt60.png', 'R': 'Chess_rlt60.png', 'Q': 'Chess_qlt60.png', 'K': 'Chess_klt60.png',
             'p': 'Chess_pdt60.png', 'n': 'Chess_ndt60.png', 'b': 'Chess_bdt60.png', 'r': 'Chess_rdt60.png', 'q': 'Chess_qdt60.png', 'k': 'Chess_kdt60.png'
         }
+        self.positions = {}  # (row, col) -> image filename of the piece currently displayed there
+        self.source_pixmaps = {}  # Image filename -> QPixmap decoded from disk, loaded once
+        self.scaled_pixmaps = {}  # (image filename, highlighted) -> QPixmap scaled to cache_size
+        self.cache_size = None
+        self.label_size = None
+        self.highlighted = None  # (row, col) of the highlighted piece, if any
         self.initUI()
 
     def initUI(self):
@@ -39,6 +55,11 @@ class ChessGUI(QWidget):
         # Add the grid layout widget to the main layout
         main_layout.addWidget(self.grid_layout_widget, alignment=Qt.AlignCenter)
 
+        # Engine status line (best move, depth, speed)
+        self.status_label = QLabel()
+        self.status_label.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(self.status_label)
+
         # Add the return to menu button
         return_button = QPushButton('Return to Main Menu')
         return_button.clicked.connect(self.return_to_menu_callback)
@@ -56,6 +77,10 @@ class ChessGUI(QWidget):
         # Initialize the chessboard with labels and pieces
         self.initialize_board()
 
+        # The engine opens the game when the player has the black pieces
+        if self.chessboard.side != self.player_color:
+            self.start_engine()
+
     def initialize_board(self):
         """Initializes the chessboard with alternating colors and FEN-based pieces."""
         self.labels = {}  # Dictionary to store the labels for each square
@@ -111,28 +136,67 @@ class ChessGUI(QWidget):
                 self.grid_layout.addWidget(label, row + 1, col + 1)
                 self.labels[(row, col)] = label
 
-        # Load the initial board position using FEN from Chessboard
-        self.load_fen(self.chessboard.to_fen())
+        # Show the initial position of the Chessboard
+        self.sync_board()
+
+    def square_size(self):
+        """Current edge length of one square in pixels."""
+        return max(1, min(self.grid_layout_widget.width(), self.grid_layout_widget.height() - 40) // 8)  # Adjust for labels
+
+    def piece_pixmap(self, image, highlighted=False):
+        """Scaled (optionally highlighted) pixmap for a piece image, cached until the square size changes."""
+        size = self.square_size()
+        if size != self.cache_size:
+            self.scaled_pixmaps = {}
+            self.cache_size = size
+        key = (image, highlighted)
+        pixmap = self.scaled_pixmaps.get(key)
+        if pixmap is None:
+            source = self.source_pixmaps.get(image)
+            if source is None:
+                source = self.source_pixmaps[image] = QPixmap(f'src/gui/chess_pieces/{image}')
+            pixmap = source.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            if highlighted:
+                pixmap = self.highlight_pixmap(pixmap)
+            self.scaled_pixmaps[key] = pixmap
+        return pixmap
+
+    def highlight_pixmap(self, pixmap):
+        """Tint the opaque part of a piece image with semi-transparent yellow."""
+        highlighted_pixmap = QPixmap(pixmap.size())
+        highlighted_pixmap.fill(Qt.transparent)
+
+        painter = QPainter(highlighted_pixmap)
+        painter.drawPixmap(0, 0, pixmap)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceAtop)
+        painter.setBrush(QBrush(QColor(255, 255, 0, 127)))  # Semi-transparent yellow highlight
+        painter.setPen(QPen(Qt.NoPen))
+        painter.drawRect(highlighted_pixmap.rect())
+        painter.end()
+        return highlighted_pixmap
+
+    def draw_square(self, row, col):
+        """Redraw the piece on one square from self.positions."""
+        label = self.labels[(row, col)]
+        image = self.positions.get((row, col))
+        if image is None:
+            label.clear()
+        else:
+            label.setPixmap(self.piece_pixmap(image, self.highlighted == (row, col)))
 
     def resizeEvent(self, event):
         """Handle the window resize event to dynamically adjust the size of the chessboard and pieces."""
-        grid_widget_width = self.grid_layout_widget.width()
-        grid_widget_height = self.grid_layout_widget.height()
-        new_size = min(grid_widget_width, grid_widget_height - 40) // 8  # Adjust for labels
-
-        for row in range(8):
-            for col in range(8):
-                item = self.grid_layout.itemAtPosition(row + 1, col + 1)
-                if item is not None:
-                    label = item.widget()
-                    label.setFixedSize(new_size, new_size)
-
-                    # Resize the pixmap if there is a piece on this square
-                    if (row, col) in self.positions:
-                        pixmap = QPixmap(f'src/gui/chess_pieces/{self.positions[(row, col)]}')
-                        label.setPixmap(pixmap.scaled(new_size, new_size, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-
         super().resizeEvent(event)
+        new_size = self.square_size()
+        if new_size == self.label_size:
+            return
+
+        self.label_size = new_size
+        for label in self.labels.values():
+            label.setFixedSize(new_size, new_size)
+        # Rescale every piece once per size (the cache is rebuilt on the first lookup)
+        for row, col in self.positions:
+            self.draw_square(row, col)
 
     def mousePressEvent(self, event):
         """Handle the mouse click event to highlight the clicked piece or move it."""
@@ -147,6 +211,10 @@ class ChessGUI(QWidget):
         x = (event.x() - self.grid_layout_widget.x() - x_offset) // new_size
         y = (event.y() - self.grid_layout_widget.y() - y_offset) // new_size
 
+        # Ignore clicks while the engine is to move
+        if self.chessboard.side != self.player_color:
+            return
+
         # Check if the click is within the valid chessboard area
         if 0 <= x < 8 and 0 <= y < 8:
             clicked_square = (y, x)
@@ -185,89 +253,101 @@ class ChessGUI(QWidget):
         end_row, end_col = end_square
 
         # Convert (row, col) into 1D index for your Chessboard class
-        start_index = start_row * 8 + start_col
-        end_index = end_row * 8 + end_col
+        start_index = self.square_index(start_row, start_col)
+        end_index = self.square_index(end_row, end_col)
+
+        # Only legal moves are played (promotions default to a queen)
+        for move in generate_legal_moves(self.chessboard):
+            if move & 63 == start_index and (move >> 6) & 63 == end_index:
+                if move >> 12 >= FLAG_PROMO_KNIGHT and PROMOTION_SYMBOLS[move >> 12] != 'q':
+                    continue
+                break
+        else:
+            return False
+
+        self.engine_worker.cancel()  # Stop pondering, the position has changed
+        self.chessboard.make(move)
+
+        # After the move is made, redraw the squares that changed
+        self.sync_board()
+        if not self.game_over():
+            self.start_engine()
+        return True
+
+    def start_engine(self):
+        """Let the background engine think about the current position."""
+        self.status_label.setText('Engine thinking...')
+        self.engine_worker.think(self.chessboard)
+
+    def on_engine_move(self, move):
+        """Play the move found by the background engine."""
+        if self.chessboard.side == self.player_color:
+            return
+        self.chessboard.make(move)
+        self.sync_board()
+        if not self.game_over():
+            self.status_label.setText(f'Engine played {move_to_uci(move)}')
+            if self.ponder:
+                self.engine_worker.ponder(self.chessboard)
+
+    def on_engine_progress(self, info):
+        """Show search progress streamed from the engine thread."""
+        label = 'Pondering' if info['ponder'] else 'Thinking'
+        best = info['pv'][0] if info['pv'] else '-'
+        text = f"{label}: depth {info['depth']}  best {best}  score {info['score']}  {info['nps']:,} nps"
+        if 'profile' in info:
+            text += '\n' + format_snapshot(info['profile'])
+        self.status_label.setText(text)
+
+    def on_engine_failed(self, message):
+        """Show an engine error; when the engine was to move the game cannot go on."""
+        if self.chessboard.side == self.player_color:
+            self.status_label.setText(f'Engine error while pondering: {message}')
+        else:
+            self.status_label.setText(f'Engine error: {message}\nGame over, return to the main menu')
+
+    def game_over(self):
+        """Show the result and return True when the side to move has no legal moves."""
+        if generate_legal_moves(self.chessboard):
+            return False
+        self.status_label.setText('Checkmate' if in_check(self.chessboard) else 'Stalemate')
+        return True
 
-        # Call the Chessboard class to make the move
-        self.chessboard.make_move(start_index, end_index)
+    def shutdown(self):
+        """Stop the engine thread; call before the widget is discarded."""
+        self.engine_worker.shutdown()
 
-        # After the move is made, update the GUI
-        self.load_fen(self.chessboard.to_fen())
+    def square_index(self, row, col):
+        """Convert a displayed (row, col) into a Chessboard index (a8 = 0), honouring the board orientation."""
+        index = row * 8 + col
+        return index if self.player_side == 'white' else 63 - index
 
     def apply_highlight(self, row, col):
         """Apply a highlight effect directly to the piece."""
-        pixmap = QPixmap(f'src/gui/chess_pieces/{self.positions[(row, col)]}')
-        highlighted_pixmap = QPixmap(pixmap.size())
-        highlighted_pixmap.fill(Qt.transparent)
-
-        painter = QPainter(highlighted_pixmap)
-        painter.drawPixmap(0, 0, pixmap)
-        painter.setCompositionMode(QPainter.CompositionMode_SourceAtop)
-        painter.setBrush(QBrush(QColor(255, 255, 0, 127)))  # Semi-transparent yellow highlight
-        painter.setPen(QPen(Qt.NoPen))
-        painter.drawRect(highlighted_pixmap.rect())
-        painter.end()
-
-        self.labels[(row, col)].setPixmap(highlighted_pixmap)
+        self.highlighted = (row, col)
+        self.draw_square(row, col)
 
     def reset_highlight(self, row, col):
-        """Resets the highlight of a piece by reloading and redrawing the original image."""
-        if (row, col) in self.positions:  # Check if there is a piece at this location
-            pixmap = QPixmap(f'src/gui/chess_pieces/{self.positions[(row, col)]}')
-            new_size = min(self.grid_layout_widget.width(), self.grid_layout_widget.height() - 40) // 8
-            self.labels[(row, col)].setPixmap(pixmap.scaled(new_size, new_size, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        else:
-            # If no piece is there, clear the label
-            self.labels[(row, col)].clear()
-
-    def load_fen(self, fen):
-        """Load the board pieces from a FEN string and update the GUI."""
-        # Split the FEN string into its components
-        fen_rows = fen.split(" ")[0].split("/")  # Extract only the piece placement part of FEN
-        
-        # Clear existing pieces
-        self.positions = {}
-
-        # Iterate over each rank in the FEN string
-        for row, fen_row in enumerate(fen_rows):
-            col = 0  # Reset column for each row
-            for char in fen_row:
-                if char.isdigit():
-                    # Empty squares (represented by numbers)
-                    col += int(char)
-                else:
-                    # Place piece on the board
-                    self.positions[(row, col)] = self.fen_to_image[char]
-                    col += 1  # Move to the next column
-
-        # Refresh the board display
-        self.update_board_display()
-
-
-    def update_board_display(self):
-        """Update the board display based on the self.positions dictionary."""
-        new_size = min(self.grid_layout_widget.width(), self.grid_layout_widget.height() - 40) // 8  # Consistent piece size calculation
-
+        """Resets the highlight of a piece by redrawing the cached original image."""
+        if self.highlighted == (row, col):
+            self.highlighted = None
+        self.draw_square(row, col)
+
+    def sync_board(self):
+        """Diff self.chessboard against the displayed pieces and redraw only the squares that changed."""
+        board = self.chessboard.board
+        positions = {}
         for row in range(8):
             for col in range(8):
-                label = self.labels[(row, col)]
-
-                # Set the background color of the square
-                if self.player_side == 'white':
-                    c = 0
-                else:
-                    c = 1
-
-                if (row + col + c) % 2 == 0:
-                    label.setStyleSheet(f"background-color: {self.light_color.name()};")
-                else:
-                    label.setStyleSheet(f"background-color: {self.dark_color.name()};")
-
-                # Check if there is a piece at the current position
-                if (row, col) in self.positions:
-                    pixmap = QPixmap(f'src/gui/chess_pieces/{self.positions[(row, col)]}')
-                    # Scale the pixmap to fit the current square size
-                    label.setPixmap(pixmap.scaled(new_size, new_size, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-                else:
-                    label.clear()  # Clear the label if there's no piece
-
+                symbol = board[self.square_index(row, col)]
+                if symbol != '.':
+                    positions[(row, col)] = self.fen_to_image[symbol]
+        self.set_positions(positions)
+
+    def set_positions(self, positions):
+        """Replace the displayed pieces, redrawing only squares whose piece differs."""
+        changed = [square for square in set(self.positions) | set(positions)
+                   if self.positions.get(square) != positions.get(square)]
+        self.positions = positions
+        for row, col in changed:
+            self.draw_square(row, col)
@@ -0,0 +1,106 @@
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+from src.chess_engine.engine import GameEngine
+from src.chess_engine.movegen import generate_legal_moves
+from src.chess_engine.search import SearchLimits
+
+
+class EngineWorker(QObject):
+    """Runs engine searches and model predictions on a background QThread.
+
+    The GUI calls think()/ponder() and listens to the signals; all heavy work happens in
+    the worker thread so the window keeps repainting. stop() makes a running search return
+    its best move so far, cancel() also discards that move (e.g. when the user leaves the
+    game). Every request carries a generation number and results from older requests are
+    dropped, so a late answer can never be played into a newer position; a search that
+    reports progress for an older generation is stopped. failed is emitted with the error
+    message when a search or prediction raises.
+    """
+
+    progress = pyqtSignal(dict)  # Search info: depth, score, nodes, nps, time, pv (UCI strings), profile
+    best_move = pyqtSignal(int)  # Encoded move (see movegen) for the position passed to think()
+    failed = pyqtSignal(str)
+    _requested = pyqtSignal(object, object, bool, int)
+
+    def __init__(self, engine=None, ai=None, limits=None, profile=False):
+        super().__init__()
+        self.engine = engine or GameEngine()
+        if profile:
+            self.engine.set_profiling(True)  # Counters and phase times, see profile()
+        self.ai = ai  # ChessAI; used instead of search when it has a trained model
+        self.limits = limits or SearchLimits(movetime=1000)
+        self.generation = 0
+        self.thinking = False
+        self.pondering = False
+        self.thread = QThread()
+        self.moveToThread(self.thread)
+        self._requested.connect(self._run)
+        self.thread.start()
+
+    def think(self, board, limits=None):
+        """Search a snapshot of board in the background; best_move is emitted when done."""
+        self.cancel()
+        self.thinking, self.pondering = True, False
+        self._requested.emit(board.copy(), limits or self.limits, False, self.generation)
+
+    def ponder(self, board):
+        """Search board on the opponent's time until cancelled, filling the transposition table.
+
+        No best_move is emitted; the next think() reuses the hash entries found here.
+        """
+        self.cancel()
+        self.thinking, self.pondering = True, True
+        self._requested.emit(board.copy(), SearchLimits(infinite=True), True, self.generation)
+
+    def profile(self):
+        """Counters and phase times of the engine so far (None unless profiling); safe to call while it thinks."""
+        return self.engine.profile()
+
+    def stop(self):
+        """Finish the current search now and emit its best move so far."""
+        self.engine.stop()
+
+    def cancel(self):
+        """Abort the current search and drop its result."""
+        self.generation += 1
+        if self.thinking:
+            self.engine.stop()
+        self.thinking = self.pondering = False
+
+    def shutdown(self):
+        """Cancel any work and stop the worker thread (call before discarding the worker)."""
+        self.cancel()
+        self.thread.quit()
+        self.thread.wait()
+        self.engine.close()
+
+    @pyqtSlot(object, object, bool, int)
+    def _run(self, board, limits, ponder, generation):
+        if generation != self.generation:
+            return  # Superseded while queued
+        try:
+            book_move = None if ponder else self.engine.book_move(board)
+            if book_move:
+                move = book_move
+            elif not ponder and self.ai is not None and self.ai.model is not None:
+                moves = generate_legal_moves(board)
+                start, end = self.ai.predict_move(board)
+                move = next(move for move in moves if move & 63 == start and (move >> 6) & 63 == end)
+            else:
+                move = self.engine.search(board, limits, lambda info: self._report(info, generation)).best_move
+        except Exception as error:
+            if generation == self.generation:
+                self.thinking = False
+                self.failed.emit(str(error))
+            return
+        if generation == self.generation:
+            self.thinking = False
+            if not ponder:
+                self.best_move.emit(move)
+
+    def _report(self, info, generation):
+        if generation != self.generation:
+            # Cancelled, possibly before the search started and cleared its stop flag: stop it now
+            self.engine.stop()
+            return
+        self.progress.emit(dict(info, ponder=self.pondering))
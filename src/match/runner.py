@@ -0,0 +1,344 @@
+"""Concurrent engine-versus-engine matches over UCI.
+
+    python -m src.match.runner --engine name=new cmd="python chess_uci.py" \
+        --engine name=base cmd="python chess_uci.py" option.Hash=32 \
+        --openings openings.epd --games 200 --tc 10+0.1 --concurrency 8 --pgn out.pgn
+
+Every opening is played twice with colours reversed. --concurrency worker coroutines
+each own one process per engine and play games from a shared queue, so many games run
+at once while each engine process is reused between games. The runner keeps the clocks
+itself: the wall time an engine takes for a move is charged to its clock and a flag
+fall loses, as does an engine that fails to start or stops answering (it is restarted
+for the next game). Games can be adjudicated as lost when both engines agree one side
+is clearly winning, or as drawn when both report a score near zero for a long time.
+Finished games are appended to the PGN and JSON-lines result files straight away,
+and a summary line (score, Elo +/- error, SPRT state) is printed after every game.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import textwrap
+import time
+
+from src.chessboard.chessboard import Chessboard, START_FEN, WHITE
+from src.chess_engine.movegen import generate_legal_moves, in_check, move_to_san, parse_uci
+from src.match.stats import SPRT, elo_estimate
+from src.match.uci_client import EngineConfig, EngineError, UCIClient
+
+RESULT_STRINGS = {1: "1-0", 0: "1/2-1/2", -1: "0-1"}
+
+
+class Adjudication:
+    def __init__(self, resign_score=None, resign_moves=3, draw_score=None, draw_moves=8, draw_after=40):
+        """Thresholds in centipawns; None disables that rule.
+
+        Resign: the last resign_moves scores of both engines say the same side is ahead by
+        at least resign_score. Draw: after move draw_after, the last draw_moves scores of both
+        engines are within draw_score of zero.
+        """
+        self.resign_score = resign_score
+        self.resign_moves = resign_moves
+        self.draw_score = draw_score
+        self.draw_moves = draw_moves
+        self.draw_after = draw_after
+
+    def check(self, scores, fullmove):
+        """scores holds (side, score from white's view) per ply; returns a result or None."""
+        if self.resign_score is not None and len(scores) >= 2 * self.resign_moves:
+            recent = [score for _, score in scores[-2 * self.resign_moves:]]
+            if None not in recent:
+                if all(score >= self.resign_score for score in recent):
+                    return 1
+                if all(score <= -self.resign_score for score in recent):
+                    return -1
+        if self.draw_score is not None and fullmove > self.draw_after and len(scores) >= 2 * self.draw_moves:
+            recent = [score for _, score in scores[-2 * self.draw_moves:]]
+            if None not in recent and all(abs(score) <= self.draw_score for score in recent):
+                return 0
+        return None
+
+
+def load_openings(path):
+    """Starting FENs from an EPD or FEN file (one position per line, '#' comments allowed)."""
+    openings = []
+    with open(path) as handle:
+        for line in handle:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            fields = line.split()
+            if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+                openings.append(" ".join(fields[:6]))
+            else:
+                openings.append(" ".join(fields[:4]) + " 0 1")  # EPD: clocks are not stored
+    return openings
+
+
+def parse_time_control(text):
+    """'40+0.4' -> (40000, 400) milliseconds of base time and increment."""
+    base, _, increment = text.partition("+")
+    return int(float(base) * 1000), int(float(increment or 0) * 1000)
+
+
+def insufficient_material(board):
+    """Bare kings, or a single minor piece against a bare king."""
+    bbs = board.bitboards
+    if bbs[0] or bbs[6] or bbs[3] or bbs[9] or bbs[4] or bbs[10]:
+        return False  # Pawns, rooks or queens
+    minors = sum(bin(bbs[piece]).count("1") for piece in (1, 2, 7, 8))
+    return minors <= 1
+
+
+class GameRecord:
+    def __init__(self, round_number, opening, white, black):
+        self.round = round_number
+        self.opening = opening
+        self.white = white
+        self.black = black
+        self.sans = []
+        self.result = None  # +1 / 0 / -1 from white's point of view
+        self.termination = ""
+
+    def to_pgn(self, event, time_control):
+        headers = [
+            ("Event", event), ("Site", "local"), ("Date", datetime.date.today().strftime("%Y.%m.%d")),
+            ("Round", str(self.round)), ("White", self.white), ("Black", self.black),
+            ("Result", RESULT_STRINGS[self.result]), ("TimeControl", time_control),
+            ("Termination", self.termination),
+        ]
+        if self.opening != START_FEN:
+            headers += [("SetUp", "1"), ("FEN", self.opening)]
+        board = Chessboard()
+        board.update_from_fen(self.opening)
+        tokens = []
+        number, side = board.fullmove_number, board.side
+        for index, san in enumerate(self.sans):
+            if side == WHITE:
+                tokens.append(f"{number}.")
+            elif index == 0:
+                tokens.append(f"{number}...")
+            tokens.append(san)
+            if side != WHITE:
+                number += 1
+            side ^= 1
+        tokens.append(RESULT_STRINGS[self.result])
+        lines = [f'[{name} "{value}"]' for name, value in headers]
+        return "\n".join(lines) + "\n\n" + textwrap.fill(" ".join(tokens), 79) + "\n\n"
+
+
+async def play_game(engines, record, time_control, adjudication, max_plies=600, overhead_ms=1000):
+    """Play one game; engines is (white client, black client). Fills in record and returns it."""
+    board = Chessboard()
+    board.update_from_fen(record.opening)
+    base, increment = time_control
+    clocks = [base, base]
+    increments = (increment, increment)
+    moves = []
+    scores = []
+    for side, engine in enumerate(engines):
+        try:
+            await engine.new_game()
+        except EngineError as error:
+            await engine.kill()  # The worker restarts it before the next game
+            record.result = -1 if side == WHITE else 1
+            record.termination = f"{engine.name} failed: {error}"
+            return record
+
+    while True:
+        legal = generate_legal_moves(board)
+        if not legal:
+            record.result = (-1 if board.side == WHITE else 1) if in_check(board) else 0
+            record.termination = "checkmate" if record.result else "stalemate"
+            break
+        if board.halfmove_clock >= 100 or board.is_repetition(3) or insufficient_material(board):
+            record.result, record.termination = 0, "draw by rule"
+            break
+        if len(moves) >= max_plies:
+            record.result, record.termination = 0, "adjudication: move limit"
+            break
+
+        side = board.side
+        engine = engines[side]
+        position = f"fen {record.opening}" + (" moves " + " ".join(moves) if moves else "")
+        started = time.perf_counter()
+        try:
+            text, score = await engine.go(position, clocks, increments, (clocks[side] + overhead_ms) / 1000)
+        except EngineError as error:
+            await engine.kill()  # The worker restarts it before the next game
+            record.result = -1 if side == WHITE else 1
+            record.termination = f"{engine.name} failed: {error}"
+            break
+        clocks[side] -= (time.perf_counter() - started) * 1000
+        if clocks[side] < 0:
+            record.result = -1 if side == WHITE else 1
+            record.termination = "time forfeit"
+            break
+        clocks[side] += increments[side]
+
+        move = parse_uci(board, text) if len(text) >= 4 else None
+        if move is None:
+            record.result = -1 if side == WHITE else 1
+            record.termination = f"illegal move {text} by {engine.name}"
+            break
+        record.sans.append(move_to_san(board, move, legal))
+        moves.append(text)
+        board.make(move)
+
+        scores.append((side, None if score is None else (score if side == WHITE else -score)))
+        result = adjudication.check(scores, board.fullmove_number)
+        if result is not None:
+            record.result = result
+            record.termination = "adjudication"
+            break
+    return record
+
+
+async def start_engines(engines):
+    """(Re)start the engines that are not running; returns {side: error message} for those that fail."""
+    failed = {}
+    for side, engine in enumerate(engines):
+        if engine.process is not None and engine.process.returncode is None:
+            continue
+        try:
+            await engine.start()
+        except EngineError as error:
+            await engine.kill()  # Do not leave a half-started process behind
+            failed[side] = f"{engine.name} failed to start: {error}"
+    return failed
+
+
+class Match:
+    def __init__(self, first, second, openings, games, time_control="10+0.1", concurrency=None,
+                 adjudication=None, sprt=None, pgn_path=None, results_path=None, event="Engine match"):
+        self.configs = (first, second)
+        self.openings = openings or [START_FEN]
+        self.games = games
+        self.time_control_text = time_control
+        self.time_control = parse_time_control(time_control)
+        self.concurrency = concurrency or os.cpu_count() or 1
+        self.adjudication = adjudication or Adjudication()
+        self.sprt = sprt
+        self.pgn_path = pgn_path
+        self.results_path = results_path
+        self.event = event
+        self.wins = self.draws = self.losses = 0  # From the first engine's point of view
+        self.finished = 0
+        self.stopped = False
+
+    def schedule(self):
+        """(round, opening, first engine plays white) for every game, colours alternating per opening."""
+        for index in range(self.games):
+            yield index + 1, self.openings[(index // 2) % len(self.openings)], index % 2 == 0
+
+    async def worker(self, queue):
+        clients = [UCIClient(config) for config in self.configs]
+        try:
+            while not self.stopped:
+                try:
+                    round_number, opening, first_white = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                white, black = clients if first_white else clients[::-1]
+                record = GameRecord(round_number, opening, white.name, black.name)
+                # Start the engines, or replace one that crashed in the last game
+                failed = await start_engines((white, black))
+                if len(failed) == 2:
+                    print(f"round {round_number} skipped: {'; '.join(failed.values())}", flush=True)
+                    continue
+                if failed:
+                    side, record.termination = failed.popitem()  # Forfeited by the engine that failed
+                    record.result = -1 if side == WHITE else 1
+                else:
+                    await play_game((white, black), record, self.time_control, self.adjudication)
+                self.record(record, first_white)
+        finally:
+            for client in clients:
+                await client.quit()
+
+    def record(self, record, first_white):
+        result = record.result if first_white else -record.result
+        if result > 0:
+            self.wins += 1
+        elif result < 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+        self.finished += 1
+        if self.pgn_path:
+            with open(self.pgn_path, "a") as handle:
+                handle.write(record.to_pgn(self.event, self.time_control_text))
+        if self.results_path:
+            with open(self.results_path, "a") as handle:
+                handle.write(json.dumps({
+                    "round": record.round, "white": record.white, "black": record.black,
+                    "result": RESULT_STRINGS[record.result], "termination": record.termination,
+                    "plies": len(record.sans), "opening": record.opening,
+                }) + "\n")
+        print(self.summary(), flush=True)
+        if self.sprt is not None and self.sprt.status(self.wins, self.draws, self.losses) != "continue":
+            self.stopped = True  # Let running games finish, start no new ones
+
+    def summary(self):
+        elo, error = elo_estimate(self.wins, self.draws, self.losses)
+        line = (f"{self.finished}/{self.games} {self.configs[0].name} vs {self.configs[1].name}: "
+                f"+{self.wins} ={self.draws} -{self.losses}  Elo {elo:+.1f} +/- {error:.1f}")
+        if self.sprt is not None:
+            llr = self.sprt.llr(self.wins, self.draws, self.losses)
+            line += (f"  SPRT[{self.sprt.elo0:g}, {self.sprt.elo1:g}] LLR {llr:.2f} "
+                     f"({self.sprt.lower:.2f}, {self.sprt.upper:.2f}) {self.sprt.status(self.wins, self.draws, self.losses)}")
+        return line
+
+    async def run(self):
+        queue = asyncio.Queue()
+        for game in self.schedule():
+            queue.put_nowait(game)
+        workers = min(self.concurrency, self.games)
+        await asyncio.gather(*(self.worker(queue) for _ in range(workers)))
+        return self.wins, self.draws, self.losses
+
+
+def parse_engine(tokens):
+    """name=X cmd=Y [option.Name=value ...] -> EngineConfig."""
+    fields = dict(token.split("=", 1) for token in tokens)
+    options = {key[len("option."):]: value for key, value in fields.items() if key.startswith("option.")}
+    return EngineConfig(fields.get("name", fields["cmd"]), fields["cmd"], options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play a concurrent match between two UCI engines")
+    parser.add_argument("--engine", nargs="+", action="append", required=True,
+                        help='name=NAME cmd="COMMAND" [option.Name=value ...] (give exactly two)')
+    parser.add_argument("--openings", help="EPD/FEN file of start positions (default: the initial position)")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--tc", default="10+0.1", help="seconds+increment per side")
+    parser.add_argument("--concurrency", type=int, default=None, help="games in parallel (default: all cores)")
+    parser.add_argument("--pgn", help="append finished games to this PGN file")
+    parser.add_argument("--results", help="append one JSON line per finished game to this file")
+    parser.add_argument("--resign", type=int, nargs=2, metavar=("SCORE", "MOVES"), help="resign adjudication")
+    parser.add_argument("--draw", type=int, nargs=3, metavar=("SCORE", "MOVES", "AFTER"), help="draw adjudication")
+    parser.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"), help="stop when the SPRT decides")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    args = parser.parse_args(argv)
+    if len(args.engine) != 2:
+        parser.error("exactly two --engine entries are required")
+
+    adjudication = Adjudication()
+    if args.resign:
+        adjudication.resign_score, adjudication.resign_moves = args.resign
+    if args.draw:
+        adjudication.draw_score, adjudication.draw_moves, adjudication.draw_after = args.draw
+    match = Match(parse_engine(args.engine[0]), parse_engine(args.engine[1]),
+                  load_openings(args.openings) if args.openings else None, args.games, args.tc,
+                  args.concurrency, adjudication,
+                  SPRT(args.sprt[0], args.sprt[1], args.alpha, args.beta) if args.sprt else None,
+                  args.pgn, args.results)
+    asyncio.run(match.run())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
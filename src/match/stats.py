@@ -0,0 +1,66 @@
+"""Match statistics: Elo difference with error bars and a sequential probability ratio test.
+
+Results are counted from the first engine's point of view as wins, draws and losses.
+The SPRT uses the normal approximation of the trinomial log-likelihood ratio (as used by
+common engine-testing frameworks): it is cheap to update after every game and stops as
+soon as either hypothesis (elo0 or elo1) is accepted.
+"""
+
+import math
+
+Z_95 = 1.959964  # Two-sided 95% quantile of the normal distribution
+
+
+def expected_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def score_stats(wins, draws, losses):
+    """(games, mean score, per-game variance of the score)."""
+    games = wins + draws + losses
+    if not games:
+        return 0, 0.5, 0.0
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    return games, score, variance
+
+
+def elo_estimate(wins, draws, losses):
+    """(elo, error) where elo +/- error is a 95% confidence interval."""
+    games, score, variance = score_stats(wins, draws, losses)
+    if not games:
+        return 0.0, 0.0
+    margin = Z_95 * math.sqrt(variance / games)
+    low, high = score_to_elo(score - margin), score_to_elo(score + margin)
+    return score_to_elo(score), (high - low) / 2
+
+
+class SPRT:
+    def __init__(self, elo0=0.0, elo1=5.0, alpha=0.05, beta=0.05):
+        """Test H0: elo = elo0 against H1: elo = elo1 with the given error rates."""
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+
+    def llr(self, wins, draws, losses):
+        """Log-likelihood ratio of H1 over H0 for the results so far."""
+        games, score, variance = score_stats(wins, draws, losses)
+        if not games or variance == 0:
+            return 0.0
+        s0, s1 = expected_score(self.elo0), expected_score(self.elo1)
+        return (s1 - s0) * (2 * score - s0 - s1) / (2 * variance / games)
+
+    def status(self, wins, draws, losses):
+        """'H1' (elo1 accepted), 'H0' (elo0 accepted) or 'continue'."""
+        llr = self.llr(wins, draws, losses)
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return "continue"
@@ -0,0 +1,113 @@
+"""Asynchronous driver for a UCI engine running as a subprocess."""
+
+import asyncio
+import shlex
+
+
+class EngineError(Exception):
+    """The engine crashed, stopped answering or broke the protocol."""
+
+
+class EngineConfig:
+    def __init__(self, name, command, options=None):
+        """An engine to launch: command is a string or argv list, options are UCI setoption values."""
+        self.name = name
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.options = options or {}
+
+
+class UCIClient:
+    def __init__(self, config):
+        self.config = config
+        self.name = config.name
+        self.process = None
+
+    async def start(self, timeout=10.0):
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.config.command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL)
+        except OSError as error:  # Missing or non-executable command
+            raise EngineError(f"{self.name} could not be launched: {error}") from None
+        self.send("uci")
+        await self.read_until(lambda line: line == "uciok", timeout)
+        for name, value in self.config.options.items():
+            self.send(f"setoption name {name} value {value}")
+        await self.ready(timeout)
+
+    def send(self, line):
+        if self.process is None or self.process.returncode is not None:
+            raise EngineError(f"{self.name} is not running")
+        self.process.stdin.write((line + "\n").encode())
+
+    async def read_line(self, timeout):
+        try:
+            raw = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        except asyncio.TimeoutError:
+            raise EngineError(f"{self.name} did not answer within {timeout:.1f}s") from None
+        if not raw:
+            raise EngineError(f"{self.name} exited unexpectedly")
+        return raw.decode(errors="replace").strip()
+
+    async def read_until(self, predicate, timeout):
+        """Read lines until predicate(line) is true; returns (matching line, lines before it)."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        lines = []
+        while True:
+            line = await self.read_line(max(deadline - loop.time(), 0.001))
+            if predicate(line):
+                return line, lines
+            lines.append(line)
+
+    async def ready(self, timeout=10.0):
+        self.send("isready")
+        await self.read_until(lambda line: line == "readyok", timeout)
+
+    async def new_game(self):
+        self.send("ucinewgame")
+        await self.ready()
+
+    async def go(self, position, clocks, increments, timeout):
+        """Search position ('position ...' arguments) and return (bestmove, score).
+
+        score is the last reported score in centipawns from the engine's point of view
+        (mate scores are mapped to +/-100000), or None if the engine reported none.
+        """
+        self.send(f"position {position}")
+        self.send(f"go wtime {max(int(clocks[0]), 1)} btime {max(int(clocks[1]), 1)} "
+                  f"winc {int(increments[0])} binc {int(increments[1])}")
+        line, info = await self.read_until(lambda text: text.startswith("bestmove"), timeout)
+        return line.split()[1] if len(line.split()) > 1 else "0000", last_score(info)
+
+    async def kill(self):
+        """Terminate at once, e.g. after a timeout left the engine in an unknown state."""
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+
+    async def quit(self):
+        if self.process is None or self.process.returncode is not None:
+            return
+        try:
+            self.send("quit")
+            await asyncio.wait_for(self.process.wait(), 2.0)
+        except (EngineError, asyncio.TimeoutError, ConnectionError):
+            self.process.kill()
+            await self.process.wait()
+
+
+def last_score(info_lines):
+    for line in reversed(info_lines):
+        tokens = line.split()
+        if tokens[:1] != ["info"] or "score" not in tokens:
+            continue
+        index = tokens.index("score")
+        try:
+            kind, value = tokens[index + 1], int(tokens[index + 2])
+        except (IndexError, ValueError):
+            continue  # Malformed score; look further back
+        if kind == "mate":
+            return 100000 if value > 0 else -100000
+        return value
+    return None
@@ -0,0 +1,201 @@
+"""Texel-style tuning data: evaluation features of labelled positions, scored in bulk.
+
+    python -m src.tuning.texel games.pgn [more.pgn ...] --out data/texel --workers 8
+
+The hand-written evaluation (evaluation.Evaluator) is linear in its weights: white's score
+is a sum of weights times small coefficients (piece counts, +/-1 per piece-square entry,
+net mobility, bishop pairs, the game phase for the two king tables). So each position is
+stored once as WIDTH (parameter index, coefficient) pairs, and the evaluations of a whole
+batch of weight vectors over every position are one gather and one multiply-add:
+
+    scores[m, n] = sum_k weights[m, indices[n, k]] * coefs[n, k]
+
+The loss of a weight vector is the mean squared error between the game result (1, 0.5, 0
+for white) and sigmoid(scale * score / 400), as in the Texel tuning method. Positions are
+extracted in parallel like the other PGN pipelines (see prepare.py): quiet positions only
+(side to move not in check, move played not a capture or promotion), after --skip-plies.
+The output directory holds indices.npy, coefs.npy and results.npy, memory-mapped by readers.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+from src.chessboard.chessboard import WHITE, FLAG_EN_PASSANT
+from src.chess_engine.attacks import KNIGHT_ATTACKS, rook_attacks, bishop_attacks
+from src.chess_engine.evaluation import MAX_PHASE, PARAMETER_COUNT, PHASE_WEIGHTS, parameter_offsets
+from src.chess_engine.movegen import in_check
+from src.data.pgn import iter_games
+from src.data.prepare import split_ranges
+
+WIDTH = 48  # Feature slots per position; unused slots point at a dummy parameter with coefficient 0
+PADDING = PARAMETER_COUNT  # Index of the dummy parameter
+TABLE_BLOCKS = ["pawn_table", "knight_table", "bishop_table", "rook_table", "queen_table"]
+OFFSETS = parameter_offsets()
+
+
+def position_features(board):
+    """{parameter index: coefficient} such that white's evaluation is sum(weight * coefficient).
+
+    Matches Evaluator.evaluate() except that the king tables are blended by phase without
+    rounding.
+    """
+    features = {}
+
+    def add(index, value):
+        features[index] = features.get(index, 0.0) + value
+
+    bbs = board.bitboards
+    occupied = board.occupied
+    phase = 0
+    for piece in range(12):
+        piece_type = piece % 6
+        bitboard = bbs[piece]
+        if piece_type == 5 or not bitboard:
+            continue
+        color = piece // 6
+        sign = 1 if color == WHITE else -1
+        own = board.occupancy[color]
+        count = bitboard.bit_count()
+        phase += PHASE_WEIGHTS[piece_type] * count
+        add(OFFSETS["material"] + piece_type, sign * count)
+        table = OFFSETS[TABLE_BLOCKS[piece_type]]
+        mobility = 0
+        while bitboard:
+            lsb = bitboard & -bitboard
+            bitboard ^= lsb
+            sq = lsb.bit_length() - 1
+            add(table + (sq if color == WHITE else sq ^ 56), sign)
+            if piece_type == 1:
+                attacks = KNIGHT_ATTACKS[sq]
+            elif piece_type == 2:
+                attacks = bishop_attacks(sq, occupied)
+            elif piece_type == 3:
+                attacks = rook_attacks(sq, occupied)
+            elif piece_type == 4:
+                attacks = rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+            else:
+                continue
+            mobility += (attacks & ~own).bit_count()
+        if piece_type:
+            add(OFFSETS["mobility"] + piece_type - 1, sign * mobility)
+
+    pairs = (1 if bbs[2] & (bbs[2] - 1) else 0) - (1 if bbs[8] & (bbs[8] - 1) else 0)
+    if pairs:
+        add(OFFSETS["bishop_pair"], pairs)
+
+    middlegame = min(phase, MAX_PHASE) / MAX_PHASE
+    white_king = bbs[5].bit_length() - 1
+    black_king = (bbs[11].bit_length() - 1) ^ 56
+    add(OFFSETS["king_table"] + white_king, middlegame)
+    add(OFFSETS["king_table"] + black_king, -middlegame)
+    add(OFFSETS["king_endgame_table"] + white_king, 1 - middlegame)
+    add(OFFSETS["king_endgame_table"] + black_king, -(1 - middlegame))
+    return {index: value for index, value in features.items() if value}
+
+
+def extract_range(task):
+    """Features of the quiet positions of the games in one byte range; returns arrays."""
+    path, start, end, skip_plies, sample = task
+    rng = random.Random(start)
+    rows_indices, rows_coefs, results = [], [], []
+    with open(path, "rb") as handle:
+        for game in iter_games(handle, start, end):
+            result = game.result
+            if result is None:
+                continue
+            for ply, (board, move) in enumerate(game.replay()):
+                if ply < skip_plies or (sample < 1 and rng.random() >= sample):
+                    continue
+                if (move >> 12) >= FLAG_EN_PASSANT or board.occupied >> ((move >> 6) & 63) & 1 or in_check(board):
+                    continue
+                features = position_features(board)
+                indices = [PADDING] * WIDTH
+                coefs = [0.0] * WIDTH
+                for slot, (index, value) in enumerate(features.items()):
+                    indices[slot], coefs[slot] = index, value
+                rows_indices.append(indices)
+                rows_coefs.append(coefs)
+                results.append((result + 1) / 2)
+    count = len(results)
+    return (np.array(rows_indices, dtype=np.int16).reshape(count, WIDTH),
+            np.array(rows_coefs, dtype=np.float32).reshape(count, WIDTH),
+            np.array(results, dtype=np.float32))
+
+
+def build_dataset(pgn_paths, out_dir, workers=None, skip_plies=8, sample=1.0):
+    workers = workers or os.cpu_count() or 1
+    tasks = [(path, start, end, skip_plies, sample)
+             for path in pgn_paths for start, end in split_ranges(path, workers)]
+    if workers == 1 or len(tasks) == 1:
+        parts = [extract_range(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            parts = pool.map(extract_range, tasks, chunksize=1)
+    os.makedirs(out_dir, exist_ok=True)
+    for field, column in (("indices", 0), ("coefs", 1), ("results", 2)):
+        np.save(os.path.join(out_dir, f"{field}.npy"), np.concatenate([part[column] for part in parts]))
+    return sum(len(part[2]) for part in parts)
+
+
+class TexelData:
+    def __init__(self, directory, limit=None):
+        """Memory-map a dataset written by build_dataset (optionally only its first limit positions)."""
+        self.directory = directory
+        self.indices = np.load(os.path.join(directory, "indices.npy"), mmap_mode="r")[:limit]
+        self.coefs = np.load(os.path.join(directory, "coefs.npy"), mmap_mode="r")[:limit]
+        self.results = np.load(os.path.join(directory, "results.npy"), mmap_mode="r")[:limit]
+
+    def __len__(self):
+        return len(self.results)
+
+    def scores(self, weights, start=0, end=None):
+        """White's evaluation of positions start:end under each row of weights: shape (M, n)."""
+        weights = np.atleast_2d(np.asarray(weights, dtype=np.float32))
+        padded = np.concatenate([weights, np.zeros((len(weights), 1), dtype=np.float32)], axis=1)
+        indices = np.asarray(self.indices[start:end], dtype=np.intp)
+        return np.einsum("mnk,nk->mn", padded[:, indices], self.coefs[start:end])
+
+    def loss(self, weights, scale=1.0, chunk=16384):
+        """Mean squared Texel error of each row of weights over the whole set: shape (M,)."""
+        weights = np.atleast_2d(weights)
+        total = np.zeros(len(weights))
+        for start in range(0, len(self), chunk):
+            scores = self.scores(weights, start, start + chunk)
+            predicted = 1 / (1 + np.power(10.0, -scale * scores / 400))
+            total += ((self.results[start:start + chunk] - predicted) ** 2).sum(axis=1)
+        return total / max(len(self), 1)
+
+    def fit_scale(self, weights, low=0.01, high=4.0, steps=30):
+        """Sigmoid scale that minimizes the loss of weights (golden-section search)."""
+        ratio = (5 ** 0.5 - 1) / 2
+        for _ in range(steps):
+            left, right = high - ratio * (high - low), low + ratio * (high - low)
+            if self.loss(weights, left)[0] < self.loss(weights, right)[0]:
+                high = right
+            else:
+                low = left
+        return (low + high) / 2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract Texel tuning positions from PGN files")
+    parser.add_argument("pgn", nargs="+", help="input PGN files")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--skip-plies", type=int, default=8, help="ignore the opening plies of every game")
+    parser.add_argument("--sample", type=float, default=1.0, help="keep this fraction of the quiet positions")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count = build_dataset(args.pgn, args.out, args.workers, args.skip_plies, args.sample)
+    print(f"{count} positions written to {args.out} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,295 @@
+"""Genetic-algorithm tuning of the evaluation weights (see evaluation.PARAMETER_LAYOUT).
+
+    python -m src.tuning.tuner --texel data/texel --population 64 --generations 300 \
+        --workers 32 --checkpoint tune.npz --out weights.json
+    python -m src.tuning.tuner --selfplay openings.epd --depth 2 --population 32 --workers 32 ...
+
+Individuals are flat weight vectors seeded around the current weights. Each generation
+keeps the best --elite unchanged (with their fitness) and breeds the rest by tournament
+selection, uniform crossover and Gaussian mutation scaled per block (a material value
+moves further than a single piece-square entry). Pawn material stays fixed as the
+centipawn anchor. Fitness is computed in a process pool, each worker scoring one slice of
+the population in a single call:
+
+- texel: minus the Texel loss over a position set built by texel.py, one batched NumPy
+  computation over every position and every individual of the slice;
+- selfplay: the score of a mini-match against the starting weights, every opening played
+  with both colours at a fixed search depth.
+
+The whole state (population, fitness, RNG state, history) is written to --checkpoint after
+every generation, and a run started on an existing checkpoint resumes from it. --out gets
+the best weights as JSON; use them with GameEngine.set_evaluation_parameters() or the UCI
+EvalParams option.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from src.chessboard.chessboard import Chessboard, WHITE
+from src.chess_engine.evaluation import DEFAULT_EVALUATOR, Evaluator, PARAMETER_COUNT, PARAMETER_LAYOUT
+from src.chess_engine.movegen import generate_legal_moves, in_check
+from src.chess_engine.search import Searcher, SearchLimits
+from src.chess_engine.transposition import TranspositionTable
+from src.match.runner import insufficient_material, load_openings
+from src.tuning.texel import TexelData
+
+# Standard deviation of a mutation, by layout block (piece-square tables use TABLE_MUTATION)
+BLOCK_MUTATION = {"material": 12.0, "mobility": 1.0, "bishop_pair": 6.0}
+TABLE_MUTATION = 5.0
+FROZEN = (0,)  # Pawn material
+
+
+def mutation_scales():
+    scales = []
+    for name, length in PARAMETER_LAYOUT:
+        scales += [BLOCK_MUTATION.get(name, TABLE_MUTATION)] * length
+    return np.array(scales)
+
+
+class TexelFitness:
+    def __init__(self, directory, scale=1.0, limit=None):
+        """Minus the Texel loss over the position set in directory (see texel.TexelData)."""
+        self.directory = directory
+        self.scale = scale
+        self.limit = limit
+        self.data = None  # Mapped on first use, in the process that scores
+
+    def __getstate__(self):
+        return dict(self.__dict__, data=None)  # Workers map the files themselves
+
+    def __call__(self, vectors):
+        if self.data is None:
+            self.data = TexelData(self.directory, self.limit)
+        return -self.data.loss(vectors, self.scale)
+
+
+class SelfPlayFitness:
+    def __init__(self, openings, base, depth=2, max_plies=200):
+        """Score (0..1) of each vector against the base weights over openings, both colours each."""
+        self.openings = openings
+        self.base = list(base)
+        self.depth = depth
+        self.max_plies = max_plies
+
+    def __call__(self, vectors):
+        return np.array([self.match(vector) for vector in vectors])
+
+    def match(self, vector):
+        candidate, base = Evaluator.from_parameters(vector), Evaluator.from_parameters(self.base)
+        points = 0.0
+        for fen in self.openings:
+            points += (1 + play_game(fen, (candidate, base), self.depth, self.max_plies)) / 2
+            points += (1 - play_game(fen, (base, candidate), self.depth, self.max_plies)) / 2
+        return points / (2 * len(self.openings))
+
+
+def play_game(fen, evaluators, depth, max_plies=200):
+    """Result for white (1, 0, -1) of a game between (white, black) evaluators at a fixed depth."""
+    board = Chessboard()
+    board.update_from_fen(fen)
+    searchers = [Searcher(TranspositionTable(1), evaluator) for evaluator in evaluators]
+    limits = SearchLimits(depth=depth)
+    for _ in range(max_plies):
+        if not generate_legal_moves(board):
+            return (-1 if board.side == WHITE else 1) if in_check(board) else 0
+        if board.halfmove_clock >= 100 or board.is_repetition(3) or insufficient_material(board):
+            return 0
+        board.make(searchers[board.side].search(board, limits).best_move)
+    return 0  # Unfinished games count as draws
+
+
+_fitness = None  # The fitness function of a worker process
+
+
+def _init_worker(fitness):
+    global _fitness
+    _fitness = fitness
+
+
+def _score(vectors):
+    return _fitness(vectors)
+
+
+class GeneticTuner:
+    def __init__(self, fitness, base=None, population=64, elite=2, tournament=3, crossover=0.7,
+                 mutation_rate=0.05, mutation_scale=1.0, workers=None, seed=None, checkpoint=None):
+        """fitness maps an (M, PARAMETER_COUNT) array of weight vectors to M scores (higher is better).
+
+        It must be picklable; each worker process gets one copy for the whole run. If checkpoint
+        names an existing file the run continues from it.
+        """
+        self.fitness = fitness
+        self.base = np.array(DEFAULT_EVALUATOR.parameters() if base is None else base, dtype=np.float64)
+        self.size = population
+        self.elite = elite
+        self.tournament = tournament
+        self.crossover = crossover
+        self.mutation_rate = mutation_rate
+        self.scales = mutation_scales() * mutation_scale
+        self.workers = workers or os.cpu_count() or 1
+        self.rng = np.random.default_rng(seed)
+        self.checkpoint = checkpoint
+        self.generation = 0
+        self.population = None
+        self.scores = None
+        self.history = []  # (generation, best score, mean score, seconds)
+        if checkpoint and os.path.exists(checkpoint):
+            self.load(checkpoint)
+
+    def _initial_population(self):
+        population = self.base + self.rng.normal(size=(self.size, PARAMETER_COUNT)) * self.scales
+        population[0] = self.base
+        population[:, FROZEN] = self.base[list(FROZEN)]
+        return population
+
+    def _select(self):
+        """Tournament selection: the fittest of a few random individuals."""
+        contestants = self.rng.integers(len(self.population), size=self.tournament)
+        return self.population[contestants[np.argmax(self.scores[contestants])]]
+
+    def _offspring(self, count):
+        children = np.empty((count, PARAMETER_COUNT))
+        for index in range(count):
+            child = self._select().copy()
+            if self.rng.random() < self.crossover:
+                other = self._select()
+                mix = self.rng.random(PARAMETER_COUNT) < 0.5
+                child[mix] = other[mix]
+            mutate = self.rng.random(PARAMETER_COUNT) < self.mutation_rate
+            child[mutate] += self.rng.normal(size=int(mutate.sum())) * self.scales[mutate]
+            children[index] = child
+        children[:, FROZEN] = self.base[list(FROZEN)]
+        return children
+
+    def _evaluate(self, vectors, pool):
+        if pool is None:
+            return np.asarray(self.fitness(vectors), dtype=np.float64)
+        slices = [part for part in np.array_split(vectors, min(self.workers, len(vectors))) if len(part)]
+        return np.concatenate([np.asarray(part, dtype=np.float64) for part in pool.map(_score, slices, chunksize=1)])
+
+    def run(self, generations, callback=None):
+        """Evolve until generation number generations; returns (best vector, best score)."""
+        pool = None
+        if self.workers > 1:
+            pool = multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=(self.fitness,))
+        try:
+            if self.population is None:
+                self.population = self._initial_population()
+                self.scores = self._evaluate(self.population, pool)
+                self.save()
+            while self.generation < generations:
+                start = time.perf_counter()
+                order = np.argsort(-self.scores)[:self.elite]
+                children = self._offspring(self.size - len(order))
+                child_scores = self._evaluate(children, pool)
+                self.population = np.concatenate([self.population[order], children])
+                self.scores = np.concatenate([self.scores[order], child_scores])
+                self.generation += 1
+                self.history.append((self.generation, float(self.scores.max()), float(self.scores.mean()),
+                                     time.perf_counter() - start))
+                self.save()
+                if callback is not None:
+                    callback(self)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return self.best()
+
+    def best(self):
+        index = int(np.argmax(self.scores))
+        return self.population[index], float(self.scores[index])
+
+    def save(self, path=None):
+        """Write the full state to path (the checkpoint by default), atomically."""
+        path = path or self.checkpoint
+        if not path:
+            return
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as handle:
+            np.savez(handle, population=self.population, scores=self.scores, base=self.base,
+                     generation=self.generation, history=np.array(self.history, dtype=np.float64).reshape(-1, 4),
+                     rng_state=json.dumps(self.rng.bit_generator.state))
+        os.replace(temporary, path)
+
+    def load(self, path):
+        with np.load(path) as data:
+            self.population = data["population"]
+            self.scores = data["scores"]
+            self.base = data["base"]
+            self.generation = int(data["generation"])
+            self.history = [(int(row[0]), row[1], row[2], row[3]) for row in data["history"]]
+            self.rng.bit_generator.state = json.loads(str(data["rng_state"]))
+        self.size = len(self.population)
+
+
+def write_weights(path, vector, score, generation):
+    with open(path, "w") as handle:
+        json.dump({"layout": PARAMETER_LAYOUT, "parameters": [int(round(value)) for value in vector],
+                   "score": score, "generation": generation}, handle)
+
+
+def load_weights(path):
+    """Parameter vector of a weights file written by the tuner."""
+    with open(path) as handle:
+        return json.load(handle)["parameters"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the evaluation weights with a genetic algorithm")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--texel", help="position set directory written by src.tuning.texel")
+    source.add_argument("--selfplay", help="EPD/FEN openings for self-play mini-matches")
+    parser.add_argument("--base", help="weights file to start from (default: the built-in weights)")
+    parser.add_argument("--population", type=int, default=64)
+    parser.add_argument("--generations", type=int, default=100, help="stop after this generation number")
+    parser.add_argument("--elite", type=int, default=2)
+    parser.add_argument("--mutation-rate", type=float, default=0.05, help="chance of mutating each weight")
+    parser.add_argument("--mutation-scale", type=float, default=1.0, help="multiplier for the mutation sizes")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--checkpoint",
+                        help="state file, written every generation and resumed from (with the same fitness options)")
+    parser.add_argument("--out", help="write the best weights here as JSON")
+    parser.add_argument("--limit", type=int, default=None, help="texel: use only the first N positions")
+    parser.add_argument("--scale", type=float, default=None, help="texel: sigmoid scale (default: fitted)")
+    parser.add_argument("--depth", type=int, default=2, help="selfplay: search depth")
+    parser.add_argument("--max-plies", type=int, default=200, help="selfplay: adjudicate longer games as draws")
+    args = parser.parse_args(argv)
+
+    base = load_weights(args.base) if args.base else DEFAULT_EVALUATOR.parameters()
+    if args.texel:
+        scale = args.scale
+        if scale is None:
+            scale = TexelData(args.texel, args.limit).fit_scale(base)
+            print(f"sigmoid scale {scale:.4f}")
+        fitness = TexelFitness(args.texel, scale, args.limit)
+    else:
+        fitness = SelfPlayFitness(load_openings(args.selfplay), base, args.depth, args.max_plies)
+
+    tuner = GeneticTuner(fitness, base, args.population, args.elite, mutation_rate=args.mutation_rate,
+                         mutation_scale=args.mutation_scale, workers=args.workers, seed=args.seed,
+                         checkpoint=args.checkpoint)
+    if tuner.generation:
+        print(f"resuming from generation {tuner.generation}")
+
+    def report(state):
+        generation, best, mean, seconds = state.history[-1]
+        print(f"generation {generation}: best {best:.6f} mean {mean:.6f} ({seconds:.1f}s)", flush=True)
+        if args.out:
+            write_weights(args.out, *state.best(), state.generation)
+
+    vector, score = tuner.run(args.generations, report)
+    if args.out:
+        write_weights(args.out, vector, score, tuner.generation)
+    print(f"best score {score:.6f} after {tuner.generation} generations")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())